@@ -1,27 +1,104 @@
-from flask import Flask, jsonify, request
+import os
+import tracemalloc
+import uuid
+from flask import Flask, Response, g, jsonify, request
+from swarm_framework.core.blobs import BlobStore
 from swarm_framework.core.engine import SwarmEngine
+from swarm_framework.core.idempotency import IdempotencyConflict, IdempotencyStore
+from swarm_framework.core.search import ContentIndex
 from swarm_framework.api.agents import AgentsAPI
+from swarm_framework.api.responses import (
+    DEFAULT_STREAM_MIN_SIZE, compress_response, json_response, request_json, stream_json_response, stream_response
+)
+from swarm_framework.api.serializers import AgentSerializer
+from swarm_framework.utils.logger import configure_logging, log, pop_context, push_context
+
+configure_logging(
+    level=os.environ.get("SWARM_LOG_LEVEL", "info"),
+    # Per-event cap on debug/info records, e.g. SWARM_LOG_RATE_LIMIT=50
+    rate_limit=float(os.environ["SWARM_LOG_RATE_LIMIT"]) if os.environ.get("SWARM_LOG_RATE_LIMIT") else None
+)
 
 app = Flask(__name__)
-engine = SwarmEngine()
+app.config.setdefault("COMPRESS_RESPONSES", True)
+# Compressed request size; the decoded size is limited by MAX_BODY_SIZE
+app.config.setdefault("MAX_CONTENT_LENGTH", 16 * 1024 * 1024)
+app.config.setdefault("MAX_BODY_SIZE", 32 * 1024 * 1024)
+if os.environ.get("SWARM_TRACE_MEMORY"):
+    # Peak is process-wide: numbers are per request only without concurrent requests
+    tracemalloc.start()
+content_dir = os.environ.get("SWARM_CONTENT_DIR", "content")
+engine = SwarmEngine(
+    content_store=BlobStore(content_dir),
+    content_index=ContentIndex(os.path.join(content_dir, "index.db")),
+    idempotency=IdempotencyStore(ttl=float(os.environ.get("SWARM_IDEMPOTENCY_TTL", 24 * 3600)))
+)
+if os.environ.get("SWARM_REUSE_MIN_SCORE"):
+    # Answer generation tasks with indexed content when a close enough match exists
+    engine.add_pre_task_hook(
+        engine.content_index.lookup_hook(float(os.environ["SWARM_REUSE_MIN_SCORE"]))
+    )
 agents_api = AgentsAPI(version="v1")
+serializer = AgentSerializer()
+
+@app.before_request
+def bind_request_id():
+    """Correlate logs of a request by its X-Request-ID, generated when missing"""
+    g.request_id = request.headers.get("X-Request-ID") or uuid.uuid4().hex
+    g.log_context = push_context(request_id=g.request_id)
+    if tracemalloc.is_tracing():
+        tracemalloc.reset_peak()
+        g.memory_start = tracemalloc.get_traced_memory()[0]
+
+@app.after_request
+def add_request_id(response):
+    response.headers["X-Request-ID"] = g.get("request_id", "")
+    if tracemalloc.is_tracing() and "memory_start" in g:
+        current, peak = tracemalloc.get_traced_memory()
+        log("Request memory", event="request_memory", path=request.path,
+            peak_kb=(peak - g.memory_start) // 1024, retained_kb=(current - g.memory_start) // 1024)
+    return response
+
+@app.teardown_request
+def unbind_request_id(exc):
+    token = g.pop("log_context", None)
+    if token is not None:
+        pop_context(token)
 
 # API routes
 @app.route("/api/v1/agents", methods=["GET"])
 def list_agents():
-    """Get list of all agents"""
-    agents = engine.list_agents()
-    return jsonify({
-        "agents": [
-            {
-                "name": agent.name,
-                "platform": agent.platform,
-                "functions": agent.functions,
-                "status": agent.get_status()
-            }
-            for agent in agents
-        ]
-    })
+    """Get list of agents, optionally filtered and paginated"""
+    args = request.args
+    try:
+        limit = int(args["limit"]) if "limit" in args else None
+    except ValueError:
+        return jsonify({"error": "Limit must be an integer"}), 400
+    try:
+        page = engine.query_agents(
+            type=args.get("type"),
+            platform=args.get("platform"),
+            status=args.get("status"),
+            tags=args.getlist("tag"),
+            limit=limit,
+            cursor=args.get("cursor")
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+        
+    agents = page.agents
+    etag = serializer.etag(agents)
+    if etag is not None:
+        # Total changes with agents outside the page, which the page hash does not cover
+        etag = f"{etag}-{page.total}-{page.next_cursor or ''}"
+    return json_response(
+        lambda: {
+            "agents": [serializer.serialize(agent) for agent in agents],
+            "next_cursor": page.next_cursor,
+            "total": page.total
+        },
+        etag=etag
+    )
 
 @app.route("/api/v1/agents", methods=["POST"])
 def create_agent():
@@ -32,15 +109,8 @@ def create_agent():
         return jsonify({"error": "Agent type is required"}), 400
         
     try:
-        agent = engine.create_agent(agent_type)
-        return jsonify({
-            "agent": {
-                "name": agent.name,
-                "platform": agent.platform,
-                "functions": agent.functions,
-                "status": agent.get_status()
-            }
-        })
+        agent = engine.create_agent(agent_type, tags=data.get("tags", []))
+        return json_response(lambda: {"agent": serializer.serialize(agent)})
     except ValueError as e:
         return jsonify({"error": str(e)}), 400
 
@@ -51,14 +121,10 @@ def get_agent(agent_name):
     if not agent:
         return jsonify({"error": "Agent not found"}), 404
         
-    return jsonify({
-        "agent": {
-            "name": agent.name,
-            "platform": agent.platform,
-            "functions": agent.functions,
-            "status": agent.get_status()
-        }
-    })
+    return json_response(
+        lambda: {"agent": serializer.serialize(agent)},
+        etag=serializer.etag([agent])
+    )
 
 @app.route("/api/v1/agents/<agent_name>/tasks", methods=["POST"])
 def run_task(agent_name):
@@ -67,18 +133,70 @@ def run_task(agent_name):
     if not agent:
         return jsonify({"error": "Agent not found"}), 404
         
-    task = request.json
+    task = request_json()
+    key = request.headers.get("Idempotency-Key")
+    if key is not None and not 0 < len(key) <= 255:
+        return jsonify({"error": "Idempotency-Key must be 1-255 characters"}), 400
     try:
-        result = engine.run_task(agent_name, task)
-        return jsonify(result)
+        result, replayed = engine.submit_task(agent_name, task, idempotency_key=key)
+    except IdempotencyConflict as e:
+        return jsonify({"error": str(e)}), 409
     except Exception as e:
         return jsonify({"error": str(e)}), 400
+    response = stream_json_response(result)
+    if replayed:
+        response.headers["Idempotent-Replayed"] = "true"
+    return response
+
+@app.route("/api/v1/content/search", methods=["GET"])
+def search_content():
+    """Full-text search over generated content"""
+    args = request.args
+    try:
+        limit = min(int(args.get("limit", 10)), ContentIndex.MAX_LIMIT)
+        offset = int(args.get("offset", 0))
+    except ValueError:
+        return jsonify({"error": "Limit and offset must be integers"}), 400
+    try:
+        hits = engine.content_index.search(
+            args.get("q", ""), limit=limit, offset=offset, match_all=args.get("match") == "all"
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return json_response(lambda: {"results": [hit.to_dict() for hit in hits]})
+
+@app.route("/api/v1/content/<key>", methods=["GET"])
+def get_content(key):
+    """Get generated content by key from task result content_ref"""
+    # Content is addressed by its hash, so the key is a strong, permanent ETag
+    if request.if_none_match.contains(key):
+        response = Response(status=304)
+        response.set_etag(key)
+        return response
+        
+    store = engine.content_store
+    try:
+        ref = store.stat(key)
+        if ref.size >= app.config.get("STREAM_MIN_SIZE", DEFAULT_STREAM_MIN_SIZE):
+            # Large pages are decompressed and re-encoded chunk by chunk
+            response = stream_response(store.iter_chunks(key), "text/plain", size=ref.size)
+        else:
+            response = compress_response(Response(store.get(key), mimetype="text/plain"))
+    except KeyError:
+        return jsonify({"error": "Content not found"}), 404
+        
+    response.set_etag(key)
+    response.cache_control.public = True
+    response.cache_control.max_age = 31536000
+    response.cache_control.immutable = True
+    return response
 
 @app.route("/api/v1/agents/<agent_name>", methods=["DELETE"])
 def remove_agent(agent_name):
     """Remove agent"""
     try:
         engine.remove_agent(agent_name)
+        serializer.forget(agent_name)
         return jsonify({"status": "success"})
     except ValueError as e:
         return jsonify({"error": str(e)}), 404
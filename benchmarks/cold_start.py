@@ -0,0 +1,72 @@
+"""Cold-start budget for settings and providers
+
+Usage: python -m benchmarks.cold_start
+"""
+import subprocess
+import sys
+import tempfile
+import time
+
+# Budget per startup phase, milliseconds
+BUDGET_MS = {
+    "import providers": 60.0,
+    "construct providers": 1.0,
+    "first access, empty db": 50.0,
+    "first access, seeded db": 10.0,
+}
+
+IMPORT_SNIPPET = (
+    "import time; started = time.perf_counter(); "
+    "import swarm_framework.settings.providers; "
+    "print((time.perf_counter() - started) * 1000)"
+)
+
+def measure_import() -> float:
+    """Import providers in fresh interpreter"""
+    process = subprocess.run(
+        [sys.executable, "-c", IMPORT_SNIPPET],
+        capture_output=True,
+        text=True,
+        check=True
+    )
+    return float(process.stdout.strip())
+
+def measure_start(storage_dir: str) -> tuple:
+    """Construct providers and touch them once, as a fresh worker would"""
+    from swarm_framework.settings.providers import (
+        EnhancedSettingsProvider,
+        EnhancedInstructionProvider
+    )
+
+    started = time.perf_counter()
+    settings_provider = EnhancedSettingsProvider(storage_dir)
+    instruction_provider = EnhancedInstructionProvider(storage_dir)
+    constructed = time.perf_counter()
+    settings_provider.get_setting("model")
+    instruction_provider._manager
+    accessed = time.perf_counter()
+    return (constructed - started) * 1000, (accessed - constructed) * 1000
+
+def main():
+    results = {"import providers": measure_import()}
+    with tempfile.TemporaryDirectory() as storage_dir:
+        construct_ms, empty_ms = measure_start(storage_dir)
+        _, seeded_ms = measure_start(storage_dir)
+    results["construct providers"] = construct_ms
+    results["first access, empty db"] = empty_ms
+    results["first access, seeded db"] = seeded_ms
+
+    print("Cold-start budget")
+    print(f"{'phase':<26} {'ms':>8} {'budget':>8}  status")
+    over = False
+    for phase, elapsed in results.items():
+        budget = BUDGET_MS[phase]
+        status = "ok" if elapsed <= budget else "OVER"
+        over = over or elapsed > budget
+        print(f"{phase:<26} {elapsed:8.2f} {budget:8.2f}  {status}")
+    total = sum(results.values())
+    print(f"{'total':<26} {total:8.2f} {sum(BUDGET_MS.values()):8.2f}")
+    return 1 if over else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
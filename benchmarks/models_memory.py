@@ -0,0 +1,62 @@
+"""Bytes per object of settings models and agents
+
+Usage: python -m benchmarks.models_memory [objects]
+"""
+import gc
+import sys
+import tracemalloc
+from swarm_framework.agents.content_creator import ContentCreator
+from swarm_framework.settings.models import (
+    InstructionTemplate, Setting, SettingOption, SettingsProfile, SettingType
+)
+
+MODELS = [("gpt-4", "GPT-4"), ("gpt-3.5-turbo", "GPT-3.5 Turbo"), ("claude-2", "Claude 2")]
+
+def select_setting(i: int) -> Setting:
+    # Every agent config repeats the same option list, as loaded from storage
+    return Setting(
+        key=f"agent_{i}.model",
+        type=SettingType.SELECT,
+        label="Модель",
+        default_value="gpt-4",
+        options=[SettingOption(value, label) for value, label in MODELS]
+    )
+
+def number_setting(i: int) -> Setting:
+    return Setting(key=f"agent_{i}.temperature", type=SettingType.NUMBER, label="Температура", default_value=0.7)
+
+def profile(i: int) -> SettingsProfile:
+    return SettingsProfile(id=f"profile_{i}", name=f"Профиль {i}", settings={"temperature": 0.7})
+
+def template(i: int) -> InstructionTemplate:
+    return InstructionTemplate(id=f"template_{i}", name=f"Шаблон {i}", content="Вы - {agent_name}")
+
+def agent(i: int) -> ContentCreator:
+    return ContentCreator()
+
+def measure(factory, count: int) -> float:
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    objects = [factory(i) for i in range(count)]
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    # The list holding the objects is not part of their cost
+    used -= sys.getsizeof(objects)
+    del objects
+    return used / count
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    print(f"{'object':<30} {'bytes/object':>12}")
+    for name, factory in (
+        ("Setting (SELECT, 3 options)", select_setting),
+        ("Setting (NUMBER)", number_setting),
+        ("SettingsProfile", profile),
+        ("InstructionTemplate", template),
+        ("ContentCreator", agent),
+    ):
+        print(f"{name:<30} {measure(factory, count):>12.0f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Prompt prefix reuse with the local stub provider
+
+Usage: python -m benchmarks.prompt_cache [pages]
+"""
+import sys
+from swarm_framework.agents.content_creator import ContentCreator
+from swarm_framework.llm.prompt import Prompt, PromptAssembler
+from swarm_framework.llm.stub import StubProvider
+from swarm_framework.settings.templates import CompiledTemplate
+
+INSTRUCTIONS = CompiledTemplate("""
+    # Инструкции по созданию контента
+    Вы - AI-ассистент, специализирующийся на создании {content_type}.
+
+    ## Стиль и тон:
+    {style_guide}
+""", {"content_type": "текстового контента", "style_guide": "- Профессиональный тон"}).render()
+
+SETTINGS = {
+    "model": "gpt-4",
+    "temperature": 0.7,
+    "max_tokens": 1000,
+    "system_prompt": "Вы - AI-ассистент, специализирующийся на выполнении различных задач.",
+    "tools": ["search", "calculator"]
+}
+
+class RequestFirstAssembler(PromptAssembler):
+    """Naive ordering for comparison: per-page request ahead of static parts"""
+
+    def assemble(self, instructions, request, system_prompt=None, settings=None) -> Prompt:
+        return super().assemble([request, *instructions], "", system_prompt, settings)
+
+def run(assembler: PromptAssembler, pages: int) -> dict:
+    provider = StubProvider()
+    agent = ContentCreator(
+        provider=provider,
+        instructions=[INSTRUCTIONS],
+        settings=SETTINGS,
+        assembler=assembler
+    )
+    prompt_tokens = cached_tokens = 0
+    for page in range(pages):
+        result = agent.run({"type": "generate", "prompt": f"Лучшие места для дайвинга, страница {page}"})
+        cached_tokens += result["cached_tokens"]
+        prompt_tokens += result["tokens_used"]
+    report = assembler.stats.report()
+    report["cached_share"] = cached_tokens / prompt_tokens if prompt_tokens else 0.0
+    return report
+
+def main():
+    pages = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    print(f"Prompt prefix reuse over {pages} pages (stub provider)")
+    print(f"{'assembly':<16} {'prefixes':>9} {'reuse':>8} {'cached tokens':>14}")
+    for label, assembler in [("request first", RequestFirstAssembler()), ("static first", PromptAssembler())]:
+        report = run(assembler, pages)
+        print(
+            f"{label:<16} {report['distinct_prefixes']:>9} "
+            f"{report['reuse_rate']:>8.1%} {report['cached_share']:>14.1%}"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Peak memory and time of decoding a compressed task body and encoding its result
+
+Compares fully buffered handling (read everything, decompress, parse;
+serialize, encode, compress) with the streamed helpers from api.bodies,
+and the same for serving stored content from BlobStore as
+GET /api/v1/content/<key> does.
+
+Usage: python -m benchmarks.request_bodies [megabytes ...]
+"""
+import gzip
+import io
+import json
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from swarm_framework.api.bodies import iter_compress, iter_json, read_json
+from swarm_framework.core.blobs import BlobStore
+
+def article(size: int) -> str:
+    paragraph = "Krabi dive sites: visibility, currents, season and prices for a day trip. "
+    return (paragraph * (size // len(paragraph) + 1))[:size]
+
+def buffered(compressed: bytes) -> int:
+    task = json.loads(gzip.decompress(io.BytesIO(compressed).read()))
+    result = {"content": task["content"], "tokens_used": len(task["content"]) // 4}
+    return len(gzip.compress(json.dumps(result, ensure_ascii=False).encode("utf-8"), compresslevel=6))
+
+def streamed(compressed: bytes) -> int:
+    task = read_json(io.BytesIO(compressed), "gzip")
+    result = {"content": task["content"], "tokens_used": len(task["content"]) // 4}
+    # A WSGI server writes chunks out as they are produced
+    return sum(len(chunk) for chunk in iter_json(result, "gzip"))
+
+def buffered_content(store: BlobStore, key: str) -> int:
+    return len(gzip.compress(store.get(key), compresslevel=6))
+
+def streamed_content(store: BlobStore, key: str) -> int:
+    return sum(len(chunk) for chunk in iter_compress(store.iter_chunks(key), "gzip"))
+
+def measure(handler, *args):
+    tracemalloc.start()
+    started = time.perf_counter()
+    sent = handler(*args)
+    elapsed = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak, sent
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [1, 4, 16]
+    root = tempfile.mkdtemp()
+    store = BlobStore(root)
+    try:
+        print(f"{'body MB':>8} {'mode':<17} {'peak MB':>8} {'x body':>7} {'ms':>8} {'sent KB':>8}")
+        for megabytes in sizes:
+            content = article(megabytes * 1024 * 1024)
+            compressed = gzip.compress(json.dumps({"type": "optimize", "content": content}).encode("utf-8"))
+            key = store.put(content).key
+            del content
+            for name, handler, args in (
+                ("task buffered", buffered, (compressed,)),
+                ("task streamed", streamed, (compressed,)),
+                ("content buffered", buffered_content, (store, key)),
+                ("content streamed", streamed_content, (store, key)),
+            ):
+                elapsed, peak, sent = measure(handler, *args)
+                print(f"{megabytes:>8} {name:<17} {peak / 2 ** 20:>8.1f} {peak / 2 ** 20 / megabytes:>7.2f} "
+                      f"{elapsed * 1000:>8.1f} {sent // 1024:>8}")
+    finally:
+        shutil.rmtree(root)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""Model routing against stub providers with different latency profiles
+
+Usage: python -m benchmarks.router [calls]
+"""
+import sys
+from swarm_framework.llm.prompt import PromptAssembler
+from swarm_framework.llm.router import ModelProfile, ModelRouter
+from swarm_framework.llm.stub import StubProvider
+
+MODELS = [
+    ModelProfile("gpt-4", "openai", tier="quality", quality=3, prompt_cost=0.03, completion_cost=0.06),
+    ModelProfile("claude-2", "anthropic", tier="quality", quality=2, prompt_cost=0.008, completion_cost=0.024),
+    ModelProfile("gpt-3.5-turbo", "openai-fast", tier="fast", quality=1, prompt_cost=0.0015, completion_cost=0.002),
+]
+
+def main():
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    providers = {
+        "openai": StubProvider("openai", latency=0.040, jitter=0.010, seed=1),
+        "anthropic": StubProvider("anthropic", latency=0.020, jitter=0.015, error_rate=0.05, seed=2),
+        "openai-fast": StubProvider("openai-fast", latency=0.005, jitter=0.002, seed=3),
+    }
+    router = ModelRouter(MODELS, providers, seed=42)
+    assembler = PromptAssembler()
+
+    for policy in ("fast", "quality", "cheap"):
+        errors = 0
+        for i in range(calls):
+            prompt = assembler.assemble(["Write travel content."], f"Page {i} about Phuket")
+            try:
+                router.complete(prompt, model=f"auto:{policy}")
+            except Exception:
+                errors += 1
+        chosen = {}
+        for decision in router.decisions(calls):
+            chosen[decision["model"]] = chosen.get(decision["model"], 0) + 1
+        print(f"policy {policy:<8} errors {errors:>3}  chosen {chosen}")
+
+    print(f"\n{'model':<15} {'tier':<8} {'calls':>6} {'p50 ms':>8} {'p95 ms':>8} {'errors':>7} {'cost $':>8}")
+    for name, stats in router.report().items():
+        p50 = (stats["p50"] or 0) * 1000
+        p95 = (stats["p95"] or 0) * 1000
+        print(f"{name:<15} {stats['tier']:<8} {stats['calls']:>6} {p50:>8.1f} {p95:>8.1f} "
+              f"{stats['error_rate']:>7.2%} {stats['cost']:>8.4f}")
+
+if __name__ == "__main__":
+    main()
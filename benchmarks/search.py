@@ -0,0 +1,74 @@
+"""Full-text query latency of ContentIndex on a synthetic corpus
+
+Usage: python -m benchmarks.search [documents]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+from swarm_framework.core.search import ContentIndex
+
+PLACES = ["Phuket", "Bali", "Krabi", "Cebu", "Malta", "Cozumel", "Dahab", "Sipadan", "Tenerife", "Zanzibar"]
+TOPICS = ["dive sites", "beaches", "restaurants", "hotels", "nightlife", "markets", "temples", "hikes"]
+WORDS = (
+    "reef wreck coral visibility current season guide price booking tour boat snorkel "
+    "family budget luxury view sunset local food street night water island bay cave "
+    "shark turtle manta depth certification school equipment rental transfer airport"
+).split()
+QUERIES = [
+    "best dive sites in Phuket",
+    "budget hotels Bali",
+    "night markets street food Krabi",
+    "manta snorkel tour Cozumel",
+    "wreck diving certification school",
+    "sunset view restaurants Malta",
+]
+
+def documents(count: int, rng: random.Random):
+    for i in range(count):
+        topic, place = rng.choice(TOPICS), rng.choice(PLACES)
+        body = " ".join(rng.choice(WORDS) for _ in range(rng.randint(80, 200)))
+        yield {
+            "doc_id": f"doc-{i}",
+            "title": f"Best {topic} in {place}",
+            "body": f"{place} {topic}. {body}"
+        }
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 300000
+    rng = random.Random(42)
+    with tempfile.TemporaryDirectory() as tmp:
+        index = ContentIndex(os.path.join(tmp, "index.db"))
+
+        started = time.perf_counter()
+        batch = []
+        for document in documents(count, rng):
+            batch.append(document)
+            if len(batch) == 5000:
+                index.add_many(batch)
+                batch = []
+        index.add_many(batch)
+        index.optimize()
+        print(f"Indexed {count} documents in {time.perf_counter() - started:.1f}s")
+
+        started = time.perf_counter()
+        for i in range(100):
+            index.add(f"Incremental article {i} about reef visibility", title=f"Update {i}")
+        print(f"Incremental add: {(time.perf_counter() - started) * 10:.2f} ms/doc")
+
+        print(f"{'query':<36} {'mode':<4} {'hits':>5} {'p50 ms':>8} {'max ms':>8}")
+        for query in QUERIES:
+            for match_all in (True, False):
+                timings, hits = [], []
+                for _ in range(20):
+                    started = time.perf_counter()
+                    hits = index.search(query, limit=10, match_all=match_all)
+                    timings.append((time.perf_counter() - started) * 1000)
+                timings.sort()
+                mode = "all" if match_all else "any"
+                print(f"{query:<36} {mode:<4} {len(hits):>5} {timings[len(timings) // 2]:>8.2f} {timings[-1]:>8.2f}")
+        index.close()
+
+if __name__ == "__main__":
+    main()
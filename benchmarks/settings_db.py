@@ -0,0 +1,70 @@
+"""Mixed read/write throughput of SettingsDatabase
+
+Usage: python -m benchmarks.settings_db [seconds]
+"""
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from swarm_framework.settings.database import SettingsDatabase
+
+THREADS = 8
+KEYS = [f"key_{i}" for i in range(100)]
+CONFIGS = [
+    # Значения SQLite по умолчанию: rollback-журнал и полный fsync
+    {"journal_mode": "DELETE", "synchronous": "FULL"},
+    {"journal_mode": "WAL", "synchronous": "FULL"},
+    {"journal_mode": "WAL", "synchronous": "NORMAL"},
+]
+WRITE_RATIOS = [0.01, 0.1, 0.5]
+
+def run(db: SettingsDatabase, write_ratio: float, seconds: float) -> dict:
+    """Run reader/writer threads for given time and count operations"""
+    counts = {"reads": 0, "writes": 0}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def worker(seed: int):
+        rng = random.Random(seed)
+        reads = writes = 0
+        while time.perf_counter() < deadline:
+            key = rng.choice(KEYS)
+            if rng.random() < write_ratio:
+                db.set_setting(key, str(rng.random()))
+                writes += 1
+            else:
+                db.get_setting(key)
+                reads += 1
+        with lock:
+            counts["reads"] += reads
+            counts["writes"] += writes
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return counts
+
+def main():
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 1.0
+    print(f"SettingsDatabase mixed load: {THREADS} threads, {seconds:.1f}s per run")
+    print(f"{'journal':<8} {'sync':<7} {'writes':>7} {'reads/s':>10} {'writes/s':>10} {'ops/s':>10}")
+    for config in CONFIGS:
+        for write_ratio in WRITE_RATIOS:
+            with tempfile.TemporaryDirectory() as directory:
+                db = SettingsDatabase(os.path.join(directory, "settings.db"), **config)
+                db.seed_settings({key: "0" for key in KEYS})
+                counts = run(db, write_ratio, seconds)
+                db.close()
+            reads = counts["reads"] / seconds
+            writes = counts["writes"] / seconds
+            print(
+                f"{config['journal_mode']:<8} {config['synchronous']:<7} {write_ratio:>6.0%} "
+                f"{reads:>10.0f} {writes:>10.0f} {reads + writes:>10.0f}"
+            )
+
+if __name__ == "__main__":
+    main()
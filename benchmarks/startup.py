@@ -0,0 +1,61 @@
+"""Startup-time report: import cost per module
+
+Usage: python -m benchmarks.startup [module ...]
+"""
+import subprocess
+import sys
+from typing import Dict, List
+
+DEFAULT_MODULES = ["swarm_framework.core.engine"]
+TOP_N = 20
+
+def measure_imports(modules: List[str]) -> List[Dict[str, object]]:
+    """Import modules in fresh interpreter and parse -X importtime output"""
+    code = "; ".join(f"import {module}" for module in modules)
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        check=True
+    )
+
+    entries = []
+    for line in process.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        if not self_us.strip().isdigit():
+            continue
+        entries.append({
+            "module": name.strip(),
+            "self_ms": int(self_us) / 1000,
+            "cumulative_ms": int(cumulative_us) / 1000
+        })
+    return entries
+
+def main():
+    modules = sys.argv[1:] or DEFAULT_MODULES
+    entries = measure_imports(modules)
+    total = sum(entry["self_ms"] for entry in entries)
+
+    print(f"Startup import report for: {', '.join(modules)}")
+    print(f"Total import time: {total:.1f} ms in {len(entries)} modules\n")
+    print(f"{'self ms':>9} {'cumul ms':>9}  module")
+    for entry in sorted(entries, key=lambda e: e["self_ms"], reverse=True)[:TOP_N]:
+        print(f"{entry['self_ms']:9.2f} {entry['cumulative_ms']:9.2f}  {entry['module']}")
+
+    own = [entry for entry in entries if entry["module"].lstrip().startswith("swarm_framework")]
+    print("\nswarm_framework modules:")
+    for entry in sorted(own, key=lambda e: e["cumulative_ms"], reverse=True):
+        print(f"{entry['self_ms']:9.2f} {entry['cumulative_ms']:9.2f}  {entry['module']}")
+
+    # Agent modules registered lazily are imported on first create_agent
+    from swarm_framework.agents.factory import AgentFactory
+    for name in AgentFactory.get_agent_type_names():
+        AgentFactory.create_agent(name)
+    print("\nLazy agent imports (first create_agent):")
+    for entry in AgentFactory.get_import_report():
+        print(f"{entry['seconds'] * 1000:9.2f} ms  {entry['agent_type']} ({entry['module']})")
+
+if __name__ == "__main__":
+    main()
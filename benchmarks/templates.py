@@ -0,0 +1,64 @@
+"""Instruction template renders per second
+
+Usage: python -m benchmarks.templates [iterations]
+"""
+import sys
+import time
+from swarm_framework.settings.models import InstructionTemplate
+from swarm_framework.settings.templates import TemplateEngine
+
+TEMPLATE = InstructionTemplate(
+    id="base_agent",
+    name="Базовый агент",
+    content="""
+    # Базовые инструкции
+    Вы - AI-ассистент по имени {agent_name}, специализирующийся на {specialization}.
+
+    ## Основные правила:
+    1. {rules}
+    2. Всегда следуйте указанным инструкциям
+
+    ## Доступные инструменты:
+    {tools}
+
+    ## Дополнительные параметры:
+    - Температура: {temperature}
+    - Максимальное количество токенов: {max_tokens}
+    """,
+    variables={
+        "specialization": "выполнении различных задач",
+        "rules": "Быть полезным и информативным",
+        "tools": "- Поиск\n- Калькулятор",
+        "temperature": "0.7",
+        "max_tokens": "1000"
+    }
+)
+
+def rate(label: str, iterations: int, render) -> None:
+    started = time.perf_counter()
+    for i in range(iterations):
+        render(i)
+    elapsed = time.perf_counter() - started
+    print(f"{label:<34} {iterations / elapsed:>12,.0f} renders/s")
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    engine = TemplateEngine()
+    plan = engine.compile(TEMPLATE)
+    distinct = [{"agent_name": f"agent-{i}"} for i in range(iterations)]
+    repeated = [{"agent_name": f"agent-{i % 100}"} for i in range(iterations)]
+
+    print(f"Template renders, {iterations} iterations")
+    rate("str.format, defaults merged", iterations,
+         lambda i: TEMPLATE.content.format(**{**TEMPLATE.variables, **distinct[i]}))
+    rate("compiled plan, distinct vars", iterations, lambda i: plan.render(distinct[i]))
+    rate("engine.render, distinct vars", iterations, lambda i: engine.render(TEMPLATE, distinct[i]))
+    rate("engine.render, 100 repeated sets", iterations, lambda i: engine.render(TEMPLATE, repeated[i]))
+
+    started = time.perf_counter()
+    engine.render_many(TEMPLATE, repeated)
+    elapsed = time.perf_counter() - started
+    print(f"{'render_many, 100 repeated sets':<34} {iterations / elapsed:>12,.0f} renders/s")
+
+if __name__ == "__main__":
+    main()
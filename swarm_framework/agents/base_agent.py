@@ -1,19 +1,40 @@
-from typing import Any, Dict, List
+import itertools
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
 from .interfaces import IAgent
 
+# Shared across agents so that (name, version) pairs never repeat
+# even when an agent is removed and re-created under the same name
+_state_versions = itertools.count(1)
+
+# Agents of a type share one function list instead of a copy each
+_function_lists: Dict[Tuple[str, ...], Tuple[str, ...]] = {}
+
+def _intern_functions(functions: Sequence[str]) -> Tuple[str, ...]:
+    functions = tuple(functions)
+    return _function_lists.setdefault(functions, functions)
+
+# Status of an agent without errors shares this list; it is never appended to
+_NO_ERRORS: Tuple[str, ...] = ()
+
 class BaseAgent(IAgent):
     """Base class for all agents"""
     
-    def __init__(self, name: str, platform: str, functions: List[str]):
+    __slots__ = ("_name", "_platform", "_functions", "_is_running", "_status",
+                 "_state_version", "_listeners")
+    
+    def __init__(self, name: str, platform: str, functions: Sequence[str]):
         self._name = name
         self._platform = platform
-        self._functions = functions
+        self._functions = _intern_functions(functions)
         self._is_running = False
         self._status = {
             "status": "initialized",
             "current_task": None,
-            "errors": []
+            "errors": _NO_ERRORS
         }
+        self._state_version = next(_state_versions)
+        # Allocated on first subscribe, most agents are never observed
+        self._listeners: Optional[List[Callable[["BaseAgent"], None]]] = None
         
     @property
     def name(self) -> str:
@@ -24,15 +45,21 @@ class BaseAgent(IAgent):
         return self._platform
         
     @property
-    def functions(self) -> List[str]:
+    def functions(self) -> Sequence[str]:
         return self._functions
         
+    @property
+    def state_version(self) -> int:
+        """Get version of agent state, bumped on every status change"""
+        return self._state_version
+        
     def run(self, task: Dict[str, Any]) -> Dict[str, Any]:
         """Run agent with given task"""
         try:
             self._is_running = True
             self._status["status"] = "running"
             self._status["current_task"] = task
+            self._touch()
             
             # Implement task execution logic in subclasses
             result = self._execute_task(task)
@@ -42,12 +69,15 @@ class BaseAgent(IAgent):
             
         except Exception as e:
             self._status["status"] = "error"
+            if self._status["errors"] is _NO_ERRORS:
+                self._status["errors"] = []
             self._status["errors"].append(str(e))
             raise
             
         finally:
             self._is_running = False
             self._status["current_task"] = None
+            self._touch()
             
     def get_status(self) -> Dict[str, Any]:
         """Get agent status"""
@@ -59,7 +89,26 @@ class BaseAgent(IAgent):
             self._is_running = False
             self._status["status"] = "stopped"
             self._status["current_task"] = None
+            self._touch()
             
+    def subscribe(self, listener: Callable[["BaseAgent"], None]) -> None:
+        """Subscribe to agent state changes"""
+        if self._listeners is None:
+            self._listeners = []
+        self._listeners.append(listener)
+        
+    def unsubscribe(self, listener: Callable[["BaseAgent"], None]) -> None:
+        """Unsubscribe from agent state changes"""
+        if self._listeners and listener in self._listeners:
+            self._listeners.remove(listener)
+            
+    def _touch(self) -> None:
+        """Mark agent state as changed and notify listeners"""
+        self._state_version = next(_state_versions)
+        if self._listeners:
+            for listener in list(self._listeners):
+                listener(self)
+        
     def _execute_task(self, task: Dict[str, Any]) -> Dict[str, Any]:
         """Execute task - to be implemented by subclasses"""
         raise NotImplementedError("Subclasses must implement _execute_task method")
@@ -1,10 +1,24 @@
-from typing import Any, Dict, List
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence, Union
 from .base_agent import BaseAgent
+from .sections import SectionCache, SectionState, fingerprint
+from ..llm.interfaces import ILLMProvider
+from ..llm.prompt import PromptAssembler
+
+SettingsSource = Union[Mapping[str, Any], Callable[[], Mapping[str, Any]]]
+
+def _no_settings() -> Mapping[str, Any]:
+    return {}
 
 class ContentCreator(BaseAgent):
     """Agent for content creation"""
     
-    def __init__(self):
+    __slots__ = ("_provider", "_instructions", "_settings", "_assembler", "_sections")
+    
+    def __init__(self, provider: Optional[ILLMProvider] = None,
+                 instructions: Sequence[str] = (),
+                 settings: Optional[SettingsSource] = None,
+                 assembler: Optional[PromptAssembler] = None,
+                 sections: Optional[SectionCache] = None):
         super().__init__(
             name="Content Creator",
             platform="OpenAI + Claude",
@@ -14,6 +28,37 @@ class ContentCreator(BaseAgent):
                 "Форматирование"
             ]
         )
+        self._provider = provider
+        # Rendered instruction templates, the static head of every prompt
+        self._instructions = tuple(instructions)
+        # A callable source lets compiled agent configs be swapped without re-creating the agent
+        if callable(settings):
+            self._settings = settings
+        elif settings:
+            fixed = settings
+            self._settings = lambda: fixed
+        else:
+            self._settings = _no_settings
+        # Created on first use: most agents in a large swarm never run a task
+        self._assembler = assembler
+        self._sections = sections
+        
+    @property
+    def assembler(self) -> PromptAssembler:
+        if self._assembler is None:
+            self._assembler = PromptAssembler()
+        return self._assembler
+        
+    @property
+    def sections(self) -> SectionCache:
+        if self._sections is None:
+            self._sections = SectionCache()
+        return self._sections
+        
+    def stop(self) -> None:
+        super().stop()
+        if self._provider is not None:
+            self._provider.close()
         
     def _execute_task(self, task: Dict[str, Any]) -> Dict[str, Any]:
         """Execute content creation task"""
@@ -25,6 +70,8 @@ class ContentCreator(BaseAgent):
             return self._optimize_content(task)
         elif task_type == "format":
             return self._format_content(task)
+        elif task_type == "update":
+            return self._update_page(task)
         else:
             raise ValueError(f"Unknown task type: {task_type}")
             
@@ -33,6 +80,9 @@ class ContentCreator(BaseAgent):
         prompt = task.get("prompt")
         max_tokens = task.get("max_tokens", 1000)
         
+        if self._provider is not None:
+            return self._complete(prompt or "", max_tokens, task.get("model"))
+            
         # TODO: Implement actual content generation using OpenAI/Claude
         generated_content = f"Generated content for prompt: {prompt}"
         
@@ -66,3 +116,130 @@ class ContentCreator(BaseAgent):
             "content": formatted_content,
             "style_applied": style
         }
+        
+    def _update_page(self, task: Dict[str, Any]) -> Dict[str, Any]:
+        """Build page from sections, re-running only stages whose inputs changed
+
+        Each section goes through generate -> optimize -> format. A stage
+        is re-run only if its input differs from the one its cached output
+        was produced from, so a changed price regenerates one section while
+        a changed style only re-formats.
+
+        The page text is returned once, as content; sections report their
+        id, re-run stages, text fingerprint and position in content, so the
+        result stays small once the engine replaces content with a reference.
+        """
+        page_id = task.get("page")
+        if not page_id:
+            raise ValueError("Page id is required for update")
+            
+        keywords = task.get("keywords", [])
+        style = task.get("style", "default")
+        max_tokens = task.get("max_tokens", 1000)
+        model = task.get("model")
+        
+        previous = self.sections.get(page_id)
+        sections: Dict[str, SectionState] = {}
+        report = []
+        texts = []
+        offset = 0
+        tokens_used = 0
+        for section in task.get("sections", []):
+            section_id = section.get("id")
+            if not section_id or section_id in sections:
+                raise ValueError(f"Section ids must be unique and non-empty: {section_id}")
+                
+            state = previous.get(section_id) or SectionState()
+            state = SectionState(dict(state.fingerprints), dict(state.outputs))
+            rerun = []
+            
+            request = self._section_request(section)
+            key = fingerprint(request, max_tokens, model, self._settings_fingerprint())
+            generated = state.output("generate", key)
+            if generated is None:
+                generated = self._generate_content({"prompt": request, "max_tokens": max_tokens, "model": model})
+                tokens_used += generated.get("tokens_used", 0)
+                state.store("generate", key, generated)
+                rerun.append("generate")
+                
+            key = fingerprint(generated["content"], keywords)
+            optimized = state.output("optimize", key)
+            if optimized is None:
+                optimized = self._optimize_content({"content": generated["content"], "keywords": keywords})
+                state.store("optimize", key, optimized)
+                rerun.append("optimize")
+                
+            key = fingerprint(optimized["content"], style)
+            formatted = state.output("format", key)
+            if formatted is None:
+                formatted = self._format_content({"content": optimized["content"], "style": style})
+                state.store("format", key, formatted)
+                rerun.append("format")
+                
+            sections[section_id] = state
+            text = formatted["content"]
+            if texts:
+                offset += 2
+            report.append({
+                "id": section_id,
+                "rerun": rerun,
+                "fingerprint": fingerprint(text),
+                "offset": offset,
+                "length": len(text)
+            })
+            texts.append(text)
+            offset += len(text)
+            
+        self.sections.put(page_id, sections)
+        return {
+            "content": "\n\n".join(texts),
+            "page": page_id,
+            "sections": report,
+            "regenerated": [item["id"] for item in report if "generate" in item["rerun"]],
+            "reused": [item["id"] for item in report if not item["rerun"]],
+            "tokens_used": tokens_used
+        }
+        
+    @staticmethod
+    def _section_request(section: Dict[str, Any]) -> str:
+        """Section prompt followed by its inputs in stable order"""
+        inputs = section.get("inputs") or {}
+        lines = [f"{key}: {inputs[key]}" for key in sorted(inputs)]
+        return "\n\n".join(part for part in (section.get("prompt", ""), "\n".join(lines)) if part)
+        
+    def _settings_fingerprint(self) -> str:
+        """Settings that shape generated text; a change regenerates every section"""
+        settings = self._settings()
+        return fingerprint({
+            key: value for key, value in settings.items()
+            if key not in self.assembler.volatile_settings
+        }, self._instructions)
+        
+    def _complete(self, request: str, max_tokens: int, model: Optional[str]) -> Dict[str, Any]:
+        """Generate content through provider with cache-friendly prompt"""
+        settings = self._settings()
+        prompt = self.assembler.assemble(
+            self._instructions,
+            request,
+            system_prompt=settings.get("system_prompt"),
+            settings=settings
+        )
+        response = self._provider.complete(
+            prompt,
+            model=model or settings.get("model", "gpt-4"),
+            max_tokens=max_tokens,
+            temperature=settings.get("temperature")
+        )
+        usage = response.get("usage", {})
+        result = {
+            "content": response["content"],
+            "tokens_used": usage.get("prompt_tokens", 0) + usage.get("completion_tokens", 0),
+            "cached_tokens": usage.get("cached_tokens", 0),
+            "prefix_fingerprint": prompt.prefix_fingerprint,
+            "model": response.get("model"),
+            "provider": response.get("provider")
+        }
+        for key in ("routing", "resilience"):
+            if key in response:
+                result[key] = response[key]
+        return result
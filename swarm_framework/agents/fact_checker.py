@@ -0,0 +1,295 @@
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence, Tuple, Union
+from .base_agent import BaseAgent
+from ..llm.interfaces import ILLMProvider, ProviderError
+from ..llm.prompt import PromptAssembler
+from ..utils.logger import bind_context
+
+SettingsSource = Union[Mapping[str, Any], Callable[[], Mapping[str, Any]]]
+
+VERDICTS = ("supported", "refuted", "unverifiable")
+
+VERIFY_INSTRUCTIONS = """
+# Fact verification
+Check the claim from the user message against reliable sources.
+Answer with JSON only:
+{"verdict": "supported" | "refuted" | "unverifiable", "confidence": 0.0-1.0, "sources": ["url", ...]}
+"""
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+|\n+")
+_WHITESPACE = re.compile(r"\s+")
+_TRANSLATE = str.maketrans({"«": '"', "»": '"', "“": '"', "”": '"', "’": "'", "–": "-", "—": "-"})
+
+@dataclass
+class Verification:
+    """Verification result of a single claim"""
+    claim: str
+    verdict: str
+    confidence: float = 0.0
+    sources: List[str] = field(default_factory=list)
+    cached: bool = False
+    # Provider error message when verdict is "error"
+    error: Optional[str] = None
+
+class VerificationCache:
+    """Verification results by normalized claim, expiring after ttl seconds"""
+
+    def __init__(self, ttl: float = 3600.0, max_size: int = 10000,
+                 clock: Callable[[], float] = time.monotonic):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._clock = clock
+        self._entries: "OrderedDict[str, Tuple[float, Verification]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Verification]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, verification = entry
+            if expires <= self._clock():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return verification
+
+    def put(self, key: str, verification: Verification) -> None:
+        with self._lock:
+            self._entries[key] = (self._clock() + self.ttl, verification)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+class FactChecker(BaseAgent):
+    """Agent for fact checking
+
+    Claims are extracted from articles, normalized and deduplicated
+    across the whole batch, so a fact repeated on many pages (opening
+    hours, addresses, prices) is verified once. Unique claims are verified
+    in parallel through the provider, and results are cached with a TTL.
+    """
+
+    __slots__ = ("_provider", "_settings", "_assembler", "_cache", "_max_workers",
+                 "_min_claim_words", "_executor", "_executor_lock")
+
+    def __init__(self, provider: Optional[ILLMProvider] = None,
+                 settings: Optional[SettingsSource] = None,
+                 assembler: Optional[PromptAssembler] = None,
+                 cache: Optional[VerificationCache] = None,
+                 max_workers: int = 8,
+                 min_claim_words: int = 4):
+        super().__init__(
+            name="Fact Checker",
+            platform="Perplexity AI",
+            functions=[
+                "Верификация данных",
+                "Актуализация информации",
+                "Проверка источников"
+            ]
+        )
+        self._provider = provider
+        if callable(settings):
+            self._settings = settings
+        else:
+            fixed = settings or {}
+            self._settings = lambda: fixed
+        # Created on first use: most agents in a large swarm never run a task
+        self._assembler = assembler
+        self._cache = cache
+        self._max_workers = max_workers
+        self._min_claim_words = min_claim_words
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+
+    @property
+    def provider(self) -> ILLMProvider:
+        """Verification provider; a local stub answering "unverifiable" when none was given"""
+        if self._provider is None:
+            from ..llm.stub import StubProvider
+            self._provider = StubProvider(
+                name="fact-checker-stub",
+                responder=lambda prompt, model: json.dumps(
+                    {"verdict": "unverifiable", "confidence": 0.0, "sources": []}
+                )
+            )
+        return self._provider
+
+    @property
+    def assembler(self) -> PromptAssembler:
+        if self._assembler is None:
+            self._assembler = PromptAssembler()
+        return self._assembler
+
+    @property
+    def cache(self) -> VerificationCache:
+        if self._cache is None:
+            self._cache = VerificationCache()
+        return self._cache
+
+    def _execute_task(self, task: Dict[str, Any]) -> Dict[str, Any]:
+        """Execute fact checking task"""
+        task_type = task.get("type")
+
+        if task_type == "extract":
+            return {"claims": self.extract_claims(task.get("content") or "")}
+        elif task_type == "verify":
+            return self._check_pages([{"id": None, "claims": task.get("claims", [])}], task)
+        elif task_type == "check":
+            return self._check_pages([{"id": task.get("id"), "content": task.get("content") or ""}], task)
+        elif task_type == "check_batch":
+            return self._check_pages(task.get("pages", []), task)
+        else:
+            raise ValueError(f"Unknown task type: {task_type}")
+
+    def extract_claims(self, content: str) -> List[str]:
+        """Extract checkable statements: sentences with numbers or proper names"""
+        claims = []
+        for sentence in _SENTENCE_END.split(content):
+            sentence = sentence.strip(" \t-*#>")
+            words = sentence.split()
+            if len(words) < self._min_claim_words or sentence.endswith("?"):
+                continue
+            has_number = any(char.isdigit() for char in sentence)
+            has_name = any(word[:1].isupper() for word in words[1:])
+            if has_number or has_name:
+                claims.append(sentence)
+        return claims
+
+    @staticmethod
+    def normalize_claim(claim: str) -> str:
+        """Normalized claim text used to deduplicate and cache claims"""
+        claim = claim.translate(_TRANSLATE).lower()
+        return _WHITESPACE.sub(" ", claim).strip(" .!;:")
+
+    def verify_claims(self, claims: Sequence[str], model: Optional[str] = None) -> Dict[str, Verification]:
+        """Verify claims, each unique normalized claim at most once
+
+        Returns verifications by normalized claim.
+        """
+        results: Dict[str, Verification] = {}
+        pending: Dict[str, str] = {}
+        for claim in claims:
+            key = self.normalize_claim(claim)
+            if key in results or key in pending:
+                continue
+            cached = self.cache.get(key)
+            if cached is not None:
+                results[key] = Verification(**{**asdict(cached), "cached": True})
+            else:
+                pending[key] = claim
+
+        if not pending:
+            return results
+        if len(pending) == 1:
+            key, claim = next(iter(pending.items()))
+            results[key] = self._verify(key, claim, model)
+            return results
+
+        futures = {
+            key: self._pool().submit(bind_context(self._verify, key, claim, model))
+            for key, claim in pending.items()
+        }
+        for key, future in futures.items():
+            results[key] = future.result()
+        return results
+
+    def stop(self) -> None:
+        super().stop()
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+                self._executor = None
+        if self._provider is not None:
+            self._provider.close()
+
+    def _check_pages(self, pages: Sequence[Mapping[str, Any]], task: Dict[str, Any]) -> Dict[str, Any]:
+        extracted = []
+        for page in pages:
+            claims = page.get("claims")
+            if claims is None:
+                claims = self.extract_claims(page.get("content") or "")
+            extracted.append((page.get("id"), list(claims)))
+
+        all_claims = [claim for _, claims in extracted for claim in claims]
+        verifications = self.verify_claims(all_claims, task.get("model"))
+
+        report_pages = []
+        for page_id, claims in extracted:
+            report_pages.append({
+                "id": page_id,
+                "claims": [
+                    {**asdict(verifications[self.normalize_claim(claim)]), "claim": claim}
+                    for claim in claims
+                ]
+            })
+        return {
+            "pages": report_pages,
+            "total_claims": len(all_claims),
+            "unique_claims": len(verifications),
+            "cache_hits": sum(1 for item in verifications.values() if item.cached)
+        }
+
+    def _verify(self, key: str, claim: str, model: Optional[str]) -> Verification:
+        settings = self._settings()
+        prompt = self.assembler.assemble(
+            [VERIFY_INSTRUCTIONS],
+            claim,
+            system_prompt=settings.get("system_prompt"),
+            settings=settings
+        )
+        try:
+            response = self.provider.complete(
+                prompt,
+                model=model or settings.get("model", "sonar"),
+                temperature=0
+            )
+        except ProviderError as e:
+            # Provider failures are reported but never cached
+            return Verification(claim=claim, verdict="error", error=str(e))
+
+        verification = self._parse(claim, response.get("content", ""))
+        self.cache.put(key, verification)
+        return verification
+
+    @staticmethod
+    def _parse(claim: str, content: str) -> Verification:
+        """Parse provider answer, falling back to a verdict keyword in free text"""
+        start, end = content.find("{"), content.rfind("}")
+        if start != -1 and end > start:
+            try:
+                data = json.loads(content[start:end + 1])
+                verdict = str(data.get("verdict", "")).lower()
+                if verdict in VERDICTS:
+                    return Verification(
+                        claim=claim,
+                        verdict=verdict,
+                        confidence=float(data.get("confidence", 0.0)),
+                        sources=[str(source) for source in data.get("sources", [])]
+                    )
+            except (ValueError, TypeError, AttributeError):
+                pass
+
+        lowered = content.lower()
+        for verdict in VERDICTS:
+            if verdict in lowered:
+                return Verification(claim=claim, verdict=verdict)
+        return Verification(claim=claim, verdict="unverifiable")
+
+    def _pool(self) -> ThreadPoolExecutor:
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self._max_workers,
+                    thread_name_prefix="fact-checker"
+                )
+            return self._executor
@@ -1,33 +1,176 @@
-from typing import Dict, Type
+import importlib
+import json
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Type
 from .interfaces import IAgent
 from .base_agent import BaseAgent
-from .content_creator import ContentCreator
+from ..utils.logger import log
+
+# Entry point group third-party packages use to provide agent types
+ENTRY_POINT_GROUP = "swarm_framework.agents"
+
+# Environment variable with path to JSON manifest {"agent_type": "module:Class"}
+MANIFEST_ENV_VAR = "SWARM_AGENT_MANIFEST"
 
 class AgentFactory:
-    """Factory for creating agents"""
-    
-    _agent_types: Dict[str, Type[BaseAgent]] = {
-        "content_creator": ContentCreator
+    """Factory for creating agents
+
+    Agent types are registered as "module:Class" targets and imported on
+    first use, so heavy agent dependencies don't slow down startup.
+    """
+
+    _agent_types: Dict[str, Type[BaseAgent]] = {}
+
+    _agent_targets: Dict[str, str] = {
+        "content_creator": f"{__package__}.content_creator:ContentCreator",
+        "fact_checker": f"{__package__}.fact_checker:FactChecker"
     }
-    
+
+    _import_times: Dict[str, Dict[str, object]] = {}
+    _discovered = False
+    _lock = threading.RLock()
+
     @classmethod
     def register_agent_type(cls, name: str, agent_class: Type[BaseAgent]) -> None:
         """Register new agent type"""
         if not issubclass(agent_class, BaseAgent):
             raise ValueError(f"Agent class must inherit from BaseAgent")
-            
+
         cls._agent_types[name] = agent_class
-        
+
+    @classmethod
+    def register_lazy_agent_type(cls, name: str, target: str) -> None:
+        """Register agent type imported on first use from "module:Class" target"""
+        module_name, _, class_name = target.partition(":")
+        if not module_name or not class_name:
+            raise ValueError(f"Agent target must be in format 'module:Class': {target}")
+
+        with cls._lock:
+            cls._agent_types.pop(name, None)
+            cls._agent_targets[name] = target
+
+    @classmethod
+    def discover_agent_types(cls, manifest_path: Optional[str] = None) -> None:
+        """Register agent types from entry points and manifest without importing them
+
+        Types already registered with a class are left untouched; invalid
+        targets are skipped. Raises ValueError if the manifest cannot be
+        read, after registering everything else. Discovery counts as done
+        either way, so a broken manifest is not re-read on every lookup.
+        """
+        # importlib.metadata is expensive to import, keep it off the startup path
+        from importlib import metadata
+
+        with cls._lock:
+            try:
+                try:
+                    entry_points = metadata.entry_points(group=ENTRY_POINT_GROUP)
+                except TypeError:
+                    entry_points = metadata.entry_points().get(ENTRY_POINT_GROUP, [])
+                targets = {entry_point.name: entry_point.value for entry_point in entry_points}
+
+                manifest_error = None
+                manifest_path = manifest_path or os.environ.get(MANIFEST_ENV_VAR)
+                if manifest_path:
+                    try:
+                        targets.update(cls._read_manifest(manifest_path))
+                    except ValueError as e:
+                        manifest_error = e
+
+                for name, target in targets.items():
+                    if name in cls._agent_types:
+                        continue
+                    try:
+                        cls.register_lazy_agent_type(name, target)
+                    except ValueError as e:
+                        log("Invalid agent type target", level="warning", event="agent_type_invalid",
+                            agent_type=name, error=str(e))
+            finally:
+                cls._discovered = True
+
+            if manifest_error is not None:
+                raise manifest_error
+
     @classmethod
-    def create_agent(cls, agent_type: str) -> IAgent:
-        """Create agent of specified type"""
-        if agent_type not in cls._agent_types:
-            raise ValueError(f"Unknown agent type: {agent_type}")
-            
-        agent_class = cls._agent_types[agent_type]
-        return agent_class()
-        
+    def create_agent(cls, agent_type: str, **options) -> IAgent:
+        """Create agent of specified type, passing options to its constructor"""
+        agent_class = cls._resolve(agent_type)
+        return agent_class(**options)
+
+    @classmethod
+    def get_agent_type_names(cls) -> List[str]:
+        """Get names of available agent types without importing them"""
+        cls._ensure_discovered()
+        return sorted(set(cls._agent_types) | set(cls._agent_targets))
+
     @classmethod
     def get_available_agent_types(cls) -> Dict[str, Type[BaseAgent]]:
-        """Get dictionary of available agent types"""
-        return cls._agent_types.copy()
+        """Get dictionary of available agent types, importing all of them"""
+        return {name: cls._resolve(name) for name in cls.get_agent_type_names()}
+
+    @classmethod
+    def get_import_report(cls) -> List[Dict[str, object]]:
+        """Get import cost of lazily loaded agent modules, slowest first"""
+        return sorted(
+            cls._import_times.values(),
+            key=lambda entry: entry["seconds"],
+            reverse=True
+        )
+
+    @classmethod
+    def _read_manifest(cls, path: str) -> Dict[str, str]:
+        try:
+            with open(path, encoding="utf-8") as manifest:
+                targets = json.load(manifest)
+        except (OSError, ValueError) as e:
+            raise ValueError(f"Cannot read agent manifest {path}: {e}") from e
+        if not isinstance(targets, dict) or not all(
+            isinstance(name, str) and isinstance(target, str) for name, target in targets.items()
+        ):
+            raise ValueError(f"Agent manifest {path} must map agent types to 'module:Class' targets")
+        return targets
+
+    @classmethod
+    def _ensure_discovered(cls) -> None:
+        """Run plugin discovery once; a broken manifest is logged, not raised"""
+        if not cls._discovered:
+            try:
+                cls.discover_agent_types()
+            except ValueError as e:
+                log("Agent discovery failed", level="error", event="agent_discovery_failed", error=str(e))
+
+    @classmethod
+    def _resolve(cls, agent_type: str) -> Type[BaseAgent]:
+        """Get agent class, importing its module on first use"""
+        agent_class = cls._agent_types.get(agent_type)
+        if agent_class is not None:
+            return agent_class
+
+        with cls._lock:
+            if agent_type in cls._agent_types:
+                return cls._agent_types[agent_type]
+
+            cls._ensure_discovered()
+            target = cls._agent_targets.get(agent_type)
+            if target is None:
+                raise ValueError(f"Unknown agent type: {agent_type}")
+
+            module_name, _, class_name = target.partition(":")
+            started = time.perf_counter()
+            try:
+                module = importlib.import_module(module_name)
+            except ImportError as e:
+                raise ValueError(f"Cannot import agent type {agent_type} from {target}: {e}") from e
+            cls._import_times[agent_type] = {
+                "agent_type": agent_type,
+                "module": module_name,
+                "seconds": time.perf_counter() - started
+            }
+
+            agent_class = getattr(module, class_name, None)
+            if not isinstance(agent_class, type):
+                raise ValueError(f"Agent class not found: {target}")
+            cls.register_agent_type(agent_type, agent_class)
+            return agent_class
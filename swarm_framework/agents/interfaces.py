@@ -4,6 +4,8 @@ from typing import Any, Dict, List
 class IAgent(ABC):
     """Interface for all agents"""
     
+    __slots__ = ()
+    
     @property
     @abstractmethod
     def name(self) -> str:
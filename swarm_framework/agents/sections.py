@@ -0,0 +1,56 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+
+def fingerprint(*parts: Any) -> str:
+    """Stable fingerprint of JSON-serializable inputs"""
+    data = json.dumps(parts, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str)
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()[:32]
+
+@dataclass
+class SectionState:
+    """Cached outputs of a section pipeline by stage"""
+    fingerprints: Dict[str, str] = field(default_factory=dict)
+    outputs: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+
+    def output(self, stage: str, key: str) -> Optional[Dict[str, Any]]:
+        """Output of stage if it was produced from input with given fingerprint"""
+        if self.fingerprints.get(stage) == key:
+            return self.outputs.get(stage)
+        return None
+
+    def store(self, stage: str, key: str, output: Dict[str, Any]) -> None:
+        self.fingerprints[stage] = key
+        self.outputs[stage] = output
+
+class SectionCache:
+    """Section states of recently updated pages"""
+
+    def __init__(self, max_pages: int = 1000):
+        self.max_pages = max_pages
+        self._pages: "OrderedDict[str, Dict[str, SectionState]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, page_id: str) -> Dict[str, SectionState]:
+        """Section states of page by section id; empty for an unknown page"""
+        with self._lock:
+            sections = self._pages.get(page_id)
+            if sections is None:
+                return {}
+            self._pages.move_to_end(page_id)
+            return dict(sections)
+
+    def put(self, page_id: str, sections: Dict[str, SectionState]) -> None:
+        """Replace section states of page; sections missing from the update are dropped"""
+        with self._lock:
+            self._pages[page_id] = dict(sections)
+            self._pages.move_to_end(page_id)
+            while len(self._pages) > self.max_pages:
+                self._pages.popitem(last=False)
+
+    def forget(self, page_id: str) -> None:
+        with self._lock:
+            self._pages.pop(page_id, None)
@@ -21,7 +21,7 @@ class AgentsAPI(BaseAPI):
                     },
                     {
                         "name": "Fact Checker",
-                        "platform": "Peerplexity AI",
+                        "platform": "Perplexity AI",
                         "functions": [
                             "Верификация данных",
                             "Актуализация информации",
@@ -0,0 +1,151 @@
+import json
+import zlib
+from typing import Any, BinaryIO, Iterable, Iterator, Optional
+
+# Decoded JSON body limit; compressed size is limited by Flask's MAX_CONTENT_LENGTH
+DEFAULT_MAX_BODY_SIZE = 32 * 1024 * 1024
+CHUNK_SIZE = 64 * 1024
+
+# zlib window bits for each content coding
+WBITS = {"gzip": 16 + zlib.MAX_WBITS, "deflate": zlib.MAX_WBITS, "identity": None}
+
+class BodyTooLarge(ValueError):
+    """Decoded request body exceeds the size limit"""
+    pass
+
+class UnsupportedEncoding(ValueError):
+    """Request Content-Encoding is not gzip, deflate or identity"""
+    pass
+
+def read_body(stream: BinaryIO, content_encoding: str = "identity",
+              max_size: int = DEFAULT_MAX_BODY_SIZE) -> bytearray:
+    """Read and decompress body chunk by chunk, stopping as soon as max_size is exceeded
+
+    Compressed bytes are never buffered whole, and a compression bomb is
+    cut off after max_size decoded bytes.
+    """
+    encoding = (content_encoding or "identity").strip().lower()
+    if encoding not in WBITS:
+        raise UnsupportedEncoding(f"Unsupported content encoding: {encoding}")
+    wbits = WBITS[encoding]
+    decompressor = zlib.decompressobj(wbits) if wbits is not None else None
+    body = bytearray()
+    while True:
+        chunk = stream.read(CHUNK_SIZE)
+        if not chunk:
+            break
+        if decompressor is None:
+            body += chunk
+        else:
+            # max_length bounds every step, so a tiny chunk can't expand past the limit unchecked
+            body += decompressor.decompress(chunk, max_size - len(body) + 1)
+            while decompressor.unconsumed_tail and len(body) <= max_size:
+                body += decompressor.decompress(decompressor.unconsumed_tail, max_size - len(body) + 1)
+        if len(body) > max_size:
+            raise BodyTooLarge(f"Request body exceeds {max_size} bytes")
+    if decompressor is not None:
+        body += decompressor.flush()
+        if not decompressor.eof:
+            raise ValueError("Truncated compressed body")
+        if len(body) > max_size:
+            raise BodyTooLarge(f"Request body exceeds {max_size} bytes")
+    return body
+
+def read_json(stream: BinaryIO, content_encoding: str = "identity",
+              max_size: int = DEFAULT_MAX_BODY_SIZE) -> Any:
+    """Parse UTF-8 JSON body read with read_body, None for an empty body
+
+    The raw bytes are dropped as soon as they are decoded, so the text
+    and the parsed value are never held together with them.
+    """
+    body = read_body(stream, content_encoding, max_size)
+    if not body:
+        return None
+    text = body.decode("utf-8")
+    del body
+    return json.loads(text)
+
+def estimate_json_size(payload: Any, limit: Optional[int] = None) -> int:
+    """Approximate serialized size of payload without serializing it
+
+    Counts string lengths plus a few bytes per value; stops as soon as
+    limit is reached, so deciding whether a payload is large is cheap.
+    """
+    size = 0
+    stack = [payload]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, str):
+            size += len(value) + 2
+        elif isinstance(value, dict):
+            size += 2
+            for key, item in value.items():
+                size += len(str(key)) + 4
+                stack.append(item)
+        elif isinstance(value, (list, tuple)):
+            size += 2 + len(value)
+            stack.extend(value)
+        else:
+            size += 8
+        if limit is not None and size >= limit:
+            break
+    return size
+
+def iter_json(payload: Any, encoding: Optional[str] = None, level: int = 6,
+              chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    """Serialize payload as JSON in chunks, compressing on the fly when encoding is given
+
+    Strings longer than chunk_size are escaped and encoded slice by slice,
+    so no serialized copy of a large content field is ever built.
+    """
+    return iter_compress(_iter_json_bytes(payload, chunk_size), encoding, level)
+
+def iter_compress(chunks: Iterable[bytes], encoding: Optional[str] = None,
+                  level: int = 6) -> Iterator[bytes]:
+    """Compress chunks with gzip or deflate as they come, pass them through without encoding"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, WBITS[encoding]) if encoding else None
+    for chunk in chunks:
+        if compressor is not None:
+            chunk = compressor.compress(chunk)
+        if chunk:
+            yield chunk
+    if compressor is not None:
+        yield compressor.flush()
+
+def _iter_json_bytes(payload: Any, chunk_size: int) -> Iterator[bytes]:
+    pending = []
+    size = 0
+    for part in _iter_encode(payload, chunk_size):
+        pending.append(part)
+        size += len(part)
+        if size >= chunk_size:
+            yield "".join(pending).encode("utf-8")
+            pending, size = [], 0
+    if pending:
+        yield "".join(pending).encode("utf-8")
+
+def _iter_encode(value: Any, chunk_size: int) -> Iterator[str]:
+    if isinstance(value, str) and len(value) > chunk_size:
+        yield '"'
+        for start in range(0, len(value), chunk_size):
+            # Escaping is per character, so slices escape the same as the whole string
+            yield _escape(value[start:start + chunk_size])
+        yield '"'
+    elif isinstance(value, dict):
+        yield "{"
+        for index, (key, item) in enumerate(value.items()):
+            yield ("," if index else "") + json.dumps(str(key), ensure_ascii=False) + ":"
+            yield from _iter_encode(item, chunk_size)
+        yield "}"
+    elif isinstance(value, (list, tuple)):
+        yield "["
+        for index, item in enumerate(value):
+            if index:
+                yield ","
+            yield from _iter_encode(item, chunk_size)
+        yield "]"
+    else:
+        yield json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+def _escape(text: str) -> str:
+    return json.encoder.encode_basestring(text)[1:-1]
@@ -0,0 +1,126 @@
+import gzip
+import zlib
+from typing import Any, Callable, Dict, Iterable, Optional
+from flask import Response, current_app, jsonify, request
+from werkzeug.exceptions import BadRequest, RequestEntityTooLarge, UnsupportedMediaType
+from .bodies import (
+    DEFAULT_MAX_BODY_SIZE, BodyTooLarge, UnsupportedEncoding,
+    estimate_json_size, iter_compress, iter_json, read_json
+)
+
+DEFAULT_COMPRESS_MIN_SIZE = 512
+DEFAULT_COMPRESS_LEVEL = 6
+# Bodies larger than this are sent as a chunked stream instead of one buffer
+DEFAULT_STREAM_MIN_SIZE = 256 * 1024
+
+def json_response(build: Callable[[], Dict[str, Any]], etag: Optional[str] = None,
+                  status: int = 200) -> Response:
+    """Build JSON response honoring If-None-Match and Accept-Encoding
+
+    The payload is built lazily so that unchanged resources answered
+    with 304 are never serialized.
+    """
+    # Weak ETags: gzip and identity encodings share the same tag
+    if etag is not None and request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+        response.set_etag(etag, weak=True)
+        return response
+
+    response = jsonify(build())
+    response.status_code = status
+    if etag is not None:
+        response.set_etag(etag, weak=True)
+    return compress_response(response)
+
+def compress_response(response: Response) -> Response:
+    """Gzip or deflate response body if enabled and accepted by client"""
+    if not current_app.config.get("COMPRESS_RESPONSES", False):
+        return response
+    if response.direct_passthrough or "Content-Encoding" in response.headers:
+        return response
+
+    response.vary.add("Accept-Encoding")
+    encoding = _encoding()
+    if encoding is None:
+        return response
+
+    body = response.get_data()
+    min_size = current_app.config.get("COMPRESS_MIN_SIZE", DEFAULT_COMPRESS_MIN_SIZE)
+    if len(body) < min_size:
+        return response
+
+    level = current_app.config.get("COMPRESS_LEVEL", DEFAULT_COMPRESS_LEVEL)
+    if encoding == "gzip":
+        response.set_data(gzip.compress(body, compresslevel=level))
+    else:
+        response.set_data(zlib.compress(body, level))
+    response.headers["Content-Encoding"] = encoding
+    return response
+
+def _encoding() -> Optional[str]:
+    """Best content coding accepted by client, None for identity"""
+    gzip_quality = request.accept_encodings.quality("gzip")
+    deflate_quality = request.accept_encodings.quality("deflate")
+    if gzip_quality <= 0 and deflate_quality <= 0:
+        return None
+    return "gzip" if gzip_quality >= deflate_quality else "deflate"
+
+def request_json() -> Any:
+    """JSON body of current request, decompressing gzip or deflate Content-Encoding
+
+    Replaces request.json for endpoints receiving large content: the body
+    is read from the input stream and decoded in one pass.
+    """
+    max_size = current_app.config.get("MAX_BODY_SIZE", DEFAULT_MAX_BODY_SIZE)
+    try:
+        return read_json(request.stream, request.headers.get("Content-Encoding", "identity"), max_size)
+    except BodyTooLarge as e:
+        raise RequestEntityTooLarge(str(e))
+    except UnsupportedEncoding as e:
+        raise UnsupportedMediaType(str(e))
+    except zlib.error as e:
+        raise BadRequest(f"Malformed compressed body: {e}")
+    except ValueError as e:
+        raise BadRequest(f"Malformed request body: {e}")
+
+def stream_json_response(payload: Any, size_hint: Optional[int] = None, status: int = 200) -> Response:
+    """JSON response sent as a chunked stream when large, so it is never held whole
+
+    size_hint is the approximate body size, estimated from the payload
+    itself when not given; smaller payloads go through jsonify and
+    compress_response.
+    """
+    stream_min_size = current_app.config.get("STREAM_MIN_SIZE", DEFAULT_STREAM_MIN_SIZE)
+    if size_hint is None:
+        size_hint = estimate_json_size(payload, stream_min_size)
+    if size_hint < stream_min_size:
+        response = jsonify(payload)
+        response.status_code = status
+        return compress_response(response)
+
+    encoding, level = _stream_encoding()
+    return _stream(iter_json(payload, encoding, level), "application/json", encoding, status)
+
+def stream_response(chunks: Iterable[bytes], mimetype: str, size: Optional[int] = None,
+                    status: int = 200) -> Response:
+    """Response streaming chunks as they are produced, compressed on the fly if accepted
+
+    size is the uncompressed length, sent as Content-Length when the
+    body goes out unencoded.
+    """
+    encoding, level = _stream_encoding()
+    response = _stream(iter_compress(chunks, encoding, level), mimetype, encoding, status)
+    if encoding is None and size is not None:
+        response.content_length = size
+    return response
+
+def _stream_encoding():
+    encoding = _encoding() if current_app.config.get("COMPRESS_RESPONSES", False) else None
+    return encoding, current_app.config.get("COMPRESS_LEVEL", DEFAULT_COMPRESS_LEVEL)
+
+def _stream(body: Iterable[bytes], mimetype: str, encoding: Optional[str], status: int) -> Response:
+    response = Response(body, status=status, mimetype=mimetype, direct_passthrough=True)
+    response.vary.add("Accept-Encoding")
+    if encoding is not None:
+        response.headers["Content-Encoding"] = encoding
+    return response
@@ -0,0 +1,51 @@
+import hashlib
+from typing import Any, Dict, Iterable, Optional, Tuple
+from ..agents.interfaces import IAgent
+
+class AgentSerializer:
+    """Serializer with cached, versioned agent representations"""
+
+    def __init__(self):
+        self._cache: Dict[str, Tuple[int, Dict[str, Any]]] = {}
+
+    def serialize(self, agent: IAgent) -> Dict[str, Any]:
+        """Get agent representation, rebuilt only when agent state changes"""
+        version = getattr(agent, "state_version", None)
+        if version is None:
+            return self._build(agent)
+
+        cached = self._cache.get(agent.name)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+
+        # Version is read before building, so a concurrent change can only
+        # make the cached payload newer than its tag and force a rebuild
+        payload = self._build(agent)
+        self._cache[agent.name] = (version, payload)
+        return payload
+
+    def etag(self, agents: Iterable[IAgent]) -> Optional[str]:
+        """Get ETag for agents without serializing them"""
+        digest = hashlib.sha1()
+        for agent in agents:
+            version = getattr(agent, "state_version", None)
+            if version is None:
+                return None
+            digest.update(f"{agent.name}:{version};".encode("utf-8"))
+        return digest.hexdigest()
+
+    def forget(self, name: str) -> None:
+        """Drop cached representation of removed agent"""
+        self._cache.pop(name, None)
+
+    @staticmethod
+    def _build(agent: IAgent) -> Dict[str, Any]:
+        """Build agent representation"""
+        status = agent.get_status()
+        return {
+            "name": agent.name,
+            "platform": agent.platform,
+            "functions": list(agent.functions),
+            # Snapshot status so later in-place updates don't leak into cache
+            "status": {**status, "errors": list(status.get("errors", []))}
+        }
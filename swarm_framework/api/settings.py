@@ -1,16 +1,86 @@
-from flask import Blueprint, jsonify, request
+import json
+import math
+import time
+from functools import lru_cache
+from flask import Blueprint, Response, jsonify, request
 from swarm_framework.settings.manager import SettingsManager
 
 settings_api = Blueprint('settings_api', __name__)
-settings_manager = SettingsManager()
+
+WATCH_TIMEOUT = 30.0
+MIN_WATCH_TIMEOUT = 1.0
+MAX_WATCH_TIMEOUT = 60.0
+# SSE-поток закрывается через это время; EventSource переподключается с Last-Event-ID
+MAX_STREAM_DURATION = 600.0
+
+@lru_cache(maxsize=None)
+def get_settings_manager() -> SettingsManager:
+    """Менеджер настроек создаётся при первом запросе, а не при импорте
+
+    Описания настроек по умолчанию регистрируются сразу, иначе пакетное
+    обновление не смогло бы проверить значения.
+    """
+    from swarm_framework.settings.providers import EnhancedSettingsProvider
+    return EnhancedSettingsProvider().manager
 
 @settings_api.route('/settings', methods=['GET'])
 def get_settings():
-    settings = settings_manager.get_settings()
+    settings = get_settings_manager().get_settings()
     return jsonify({key: setting.default_value for key, setting in settings.items()})
 
 @settings_api.route('/settings/<key>', methods=['PUT'])
 def update_setting(key):
     value = request.json.get('value')
-    settings_manager.update_setting(key, value)
+    get_settings_manager().update_setting(key, value)
+    return jsonify(success=True)
+
+@settings_api.route('/settings', methods=['PUT'])
+def update_settings():
+    values = (request.json or {}).get('settings')
+    if not isinstance(values, dict):
+        return jsonify(success=False, error="Field 'settings' must be an object"), 400
+    errors = get_settings_manager().update_settings(values)
+    if errors:
+        return jsonify(success=False, errors=errors), 400
     return jsonify(success=True)
+
+@settings_api.route('/settings/watch', methods=['GET'])
+def watch_settings():
+    """Long-poll изменений настроек или SSE при Accept: text/event-stream"""
+    watcher = get_settings_manager().watcher
+    since = request.args.get('since', type=int)
+    try:
+        timeout = float(request.args.get('timeout', WATCH_TIMEOUT))
+    except ValueError:
+        timeout = math.nan
+    if not math.isfinite(timeout):
+        return jsonify(success=False, error="Parameter 'timeout' must be a finite number"), 400
+    timeout = max(MIN_WATCH_TIMEOUT, min(timeout, MAX_WATCH_TIMEOUT))
+
+    if request.accept_mimetypes.best == 'text/event-stream':
+        if since is None:
+            since = request.headers.get('Last-Event-ID', type=int)
+        start = watcher.last_seq if since is None else since
+        return Response(_stream_changes(watcher, start, timeout), mimetype='text/event-stream')
+
+    # Без since клиент получает текущий номер и начинает ожидание с него
+    if since is None:
+        return jsonify(seq=watcher.last_seq, changes=[], reset=False)
+    seq, changes, reset = watcher.wait(since, timeout)
+    return jsonify(seq=seq, changes=[_change_to_dict(change) for change in changes], reset=reset)
+
+def _stream_changes(watcher, since: int, timeout: float):
+    deadline = time.monotonic() + MAX_STREAM_DURATION
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return
+        since, changes, reset = watcher.wait(since, min(timeout, remaining))
+        if not changes and not reset:
+            yield ": keep-alive\n\n"
+            continue
+        payload = {"seq": since, "changes": [_change_to_dict(c) for c in changes], "reset": reset}
+        yield f"id: {since}\nevent: settings\ndata: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+def _change_to_dict(change) -> dict:
+    return {"seq": change.seq, "version": change.version, "key": change.key, "value": change.value}
@@ -0,0 +1,232 @@
+import bz2
+import hashlib
+import lzma
+import mmap
+import os
+import struct
+import tempfile
+import zlib
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, Optional, Tuple, Union
+
+# File header: magic, codec id, uncompressed size
+_HEADER = struct.Struct(">4sBQ")
+_MAGIC = b"SWB1"
+
+# Codec id -> (name, compress, decompress); id 0 stores bytes as is
+_CODECS = {
+    0: ("raw", lambda data, level: data, bytes),
+    1: ("zlib", lambda data, level: zlib.compress(data, level), zlib.decompress),
+    2: ("bz2", lambda data, level: bz2.compress(data, max(1, level)), bz2.decompress),
+    3: ("lzma", lambda data, level: lzma.compress(data, preset=level), lzma.decompress),
+}
+_CODEC_IDS = {name: codec_id for codec_id, (name, _, _) in _CODECS.items()}
+# Codec id -> incremental decompressor factory for streamed reads
+_DECOMPRESSORS = {1: zlib.decompressobj, 2: bz2.BZ2Decompressor, 3: lzma.LZMADecompressor}
+
+@dataclass(frozen=True)
+class BlobRef:
+    """Reference to content stored in BlobStore"""
+    key: str
+    size: int
+    stored_size: int
+    codec: str
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"key": self.key, "size": self.size, "stored_size": self.stored_size, "codec": self.codec}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "BlobRef":
+        return cls(data["key"], data["size"], data["stored_size"], data["codec"])
+
+class BlobStore:
+    """Content-addressed store for generated content
+
+    The key of a blob is the SHA-256 of its uncompressed bytes, so identical
+    outputs of different tasks are stored once. Blobs are compressed with
+    a stdlib codec and kept raw when compression doesn't pay off. Files at
+    or above mmap_threshold bytes are read through a memory map instead of
+    being copied into a read buffer first.
+    """
+
+    def __init__(self, root: str, codec: str = "zlib", level: int = 6,
+                 mmap_threshold: int = 64 * 1024):
+        if codec not in _CODEC_IDS:
+            raise ValueError(f"Unknown codec: {codec}")
+        self.root = root
+        self.codec = codec
+        self.level = level
+        self.mmap_threshold = mmap_threshold
+        os.makedirs(root, exist_ok=True)
+
+    def put(self, content: Union[str, bytes]) -> BlobRef:
+        """Store content and return its reference; existing blobs are not rewritten"""
+        data = content.encode("utf-8") if isinstance(content, str) else bytes(content)
+        key = hashlib.sha256(data).hexdigest()
+        path = self._path(key)
+
+        existing = self._read_header(path)
+        if existing is not None:
+            codec_id, size, stored_size = existing
+            return BlobRef(key, size, stored_size, _CODECS[codec_id][0])
+
+        codec_id = _CODEC_IDS[self.codec]
+        payload = _CODECS[codec_id][1](data, self.level)
+        if len(payload) >= len(data):
+            codec_id, payload = 0, data
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write to a temporary file and rename, readers never see a partial blob
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(_HEADER.pack(_MAGIC, codec_id, len(data)))
+                f.write(payload)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+        return BlobRef(key, len(data), _HEADER.size + len(payload), _CODECS[codec_id][0])
+
+    def get(self, key: str) -> bytes:
+        """Get blob content; KeyError if blob doesn't exist"""
+        path = self._path(key)
+        try:
+            f = open(path, "rb")
+        except FileNotFoundError:
+            raise KeyError(f"Blob not found: {key}") from None
+
+        with f:
+            stored_size = os.fstat(f.fileno()).st_size
+            if stored_size >= self.mmap_threshold:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    codec_id, size = self._parse_header(key, mapped[:_HEADER.size])
+                    view = memoryview(mapped)
+                    try:
+                        return _CODECS[codec_id][2](view[_HEADER.size:])
+                    finally:
+                        view.release()
+            data = f.read()
+
+        codec_id, size = self._parse_header(key, data[:_HEADER.size])
+        return _CODECS[codec_id][2](memoryview(data)[_HEADER.size:])
+
+    def get_text(self, key: str) -> str:
+        return self.get(key).decode("utf-8")
+
+    def stat(self, key: str) -> BlobRef:
+        """Reference of a stored blob from its header; KeyError if blob doesn't exist"""
+        header = self._read_header(self._path(key))
+        if header is None:
+            raise KeyError(f"Blob not found: {key}")
+        codec_id, size, stored_size = header
+        return BlobRef(key, size, stored_size, _CODECS[codec_id][0])
+
+    def iter_chunks(self, key: str, chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+        """Blob content decompressed chunk by chunk, never held whole; KeyError if missing
+
+        The file is opened before the first chunk is requested, so a missing
+        blob fails at the call rather than in the middle of a response.
+        """
+        path = self._path(key)
+        try:
+            f = open(path, "rb")
+        except FileNotFoundError:
+            raise KeyError(f"Blob not found: {key}") from None
+        try:
+            codec_id, _ = self._parse_header(key, f.read(_HEADER.size))
+        except BaseException:
+            f.close()
+            raise
+        return self._iter_file(f, codec_id, chunk_size)
+
+    @staticmethod
+    def _iter_file(f, codec_id: int, chunk_size: int) -> Iterator[bytes]:
+        with f:
+            factory = _DECOMPRESSORS.get(codec_id)
+            if factory is None:
+                while True:
+                    chunk = f.read(chunk_size)
+                    if not chunk:
+                        return
+                    yield chunk
+
+            decompressor = factory()
+            is_zlib = codec_id == _CODEC_IDS["zlib"]
+            while True:
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    break
+                # Output is bounded per step: text compresses so well that one
+                # compressed chunk could otherwise expand to the whole blob
+                data = decompressor.decompress(chunk, chunk_size)
+                while data:
+                    yield data
+                    if is_zlib:
+                        data = decompressor.decompress(decompressor.unconsumed_tail, chunk_size)
+                    elif decompressor.needs_input or decompressor.eof:
+                        break
+                    else:
+                        data = decompressor.decompress(b"", chunk_size)
+            if is_zlib:
+                tail = decompressor.flush()
+                if tail:
+                    yield tail
+
+    def exists(self, key: str) -> bool:
+        return os.path.exists(self._path(key))
+
+    def delete(self, key: str) -> bool:
+        try:
+            os.unlink(self._path(key))
+            return True
+        except FileNotFoundError:
+            return False
+
+    def keys(self) -> Iterator[str]:
+        for prefix in sorted(os.listdir(self.root)):
+            directory = os.path.join(self.root, prefix)
+            if len(prefix) != 2 or not os.path.isdir(directory):
+                continue
+            for name in sorted(os.listdir(directory)):
+                if not name.endswith(".tmp"):
+                    yield prefix + name
+
+    def stats(self) -> Dict[str, int]:
+        """Number of blobs, total content size and size on disk"""
+        blobs = size = stored = 0
+        for key in self.keys():
+            header = self._read_header(self._path(key))
+            if header is None:
+                continue
+            blobs += 1
+            size += header[1]
+            stored += header[2]
+        return {"blobs": blobs, "size": size, "stored_size": stored}
+
+    def _path(self, key: str) -> str:
+        if len(key) != 64 or any(char not in "0123456789abcdef" for char in key):
+            raise KeyError(f"Invalid blob key: {key}")
+        return os.path.join(self.root, key[:2], key[2:])
+
+    @staticmethod
+    def _parse_header(key: str, header: bytes) -> Tuple[int, int]:
+        if len(header) < _HEADER.size:
+            raise ValueError(f"Corrupted blob: {key}")
+        magic, codec_id, size = _HEADER.unpack(header)
+        if magic != _MAGIC or codec_id not in _CODECS:
+            raise ValueError(f"Corrupted blob: {key}")
+        return codec_id, size
+
+    def _read_header(self, path: str) -> Optional[Tuple[int, int, int]]:
+        try:
+            with open(path, "rb") as f:
+                header = f.read(_HEADER.size)
+                stored_size = os.fstat(f.fileno()).st_size
+        except FileNotFoundError:
+            return None
+        magic, codec_id, size = _HEADER.unpack(header) if len(header) == _HEADER.size else (None, 0, 0)
+        if magic != _MAGIC or codec_id not in _CODECS:
+            return None
+        return codec_id, size, stored_size
@@ -1,17 +1,46 @@
-from typing import Dict, List, Optional
+import time
+import uuid
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 from ..agents.interfaces import IAgent
 from ..agents.factory import AgentFactory
+from .blobs import BlobRef, BlobStore
+from .idempotency import IdempotencyStore
+from .registry import AgentPage, AgentRegistry
+from .search import ContentIndex, PreTaskHook
+from ..utils.logger import log, log_context
 
 class SwarmEngine:
     """Core engine for managing agents"""
     
-    def __init__(self):
-        self._agents: Dict[str, IAgent] = {}
+    def __init__(self, content_store: Optional[BlobStore] = None,
+                 content_index: Optional[ContentIndex] = None,
+                 idempotency: Optional[IdempotencyStore] = None):
+        self._agents = AgentRegistry()
+        self._idempotency = idempotency or IdempotencyStore()
+        self._content_store = content_store
+        self._content_index = content_index
+        self._pre_task_hooks: List[PreTaskHook] = []
         
-    def create_agent(self, agent_type: str) -> IAgent:
+    @property
+    def content_store(self) -> Optional[BlobStore]:
+        return self._content_store
+        
+    @property
+    def content_index(self) -> Optional[ContentIndex]:
+        return self._content_index
+        
+    @property
+    def idempotency(self) -> IdempotencyStore:
+        return self._idempotency
+        
+    def add_pre_task_hook(self, hook: PreTaskHook) -> None:
+        """Add hook called before a task runs; a non-None result is returned instead of running it"""
+        self._pre_task_hooks.append(hook)
+        
+    def create_agent(self, agent_type: str, tags: Iterable[str] = (), **options) -> IAgent:
         """Create and register new agent"""
-        agent = AgentFactory.create_agent(agent_type)
-        self._agents[agent.name] = agent
+        agent = AgentFactory.create_agent(agent_type, **options)
+        self._agents.add(agent, agent_type, tags)
         return agent
         
     def get_agent(self, name: str) -> Optional[IAgent]:
@@ -20,22 +49,103 @@ class SwarmEngine:
         
     def list_agents(self) -> List[IAgent]:
         """Get list of all registered agents"""
-        return list(self._agents.values())
+        return self._agents.all()
+        
+    def query_agents(self, type: Optional[str] = None, platform: Optional[str] = None,
+                     status: Optional[str] = None, tags: Iterable[str] = (),
+                     limit: Optional[int] = None, cursor: Optional[str] = None) -> AgentPage:
+        """Get page of agents matching filters"""
+        return self._agents.query(
+            type=type,
+            platform=platform,
+            status=status,
+            tags=tags,
+            limit=limit,
+            cursor=cursor
+        )
         
     def remove_agent(self, name: str) -> None:
         """Remove agent by name"""
-        if name in self._agents:
-            agent = self._agents[name]
+        agent = self._agents.remove(name)
+        if agent:
             agent.stop()
-            del self._agents[name]
             
-    def run_task(self, agent_name: str, task: Dict) -> Dict:
-        """Run task on specified agent"""
+    def run_task(self, agent_name: str, task: Dict, idempotency_key: Optional[str] = None) -> Dict:
+        """Run task on specified agent
+        
+        With idempotency_key the task runs once: repeated calls with the
+        same key get the stored result or wait for the running execution,
+        and reusing the key for another task raises IdempotencyConflict.
+        """
+        return self.submit_task(agent_name, task, idempotency_key)[0]
+        
+    def submit_task(self, agent_name: str, task: Dict,
+                    idempotency_key: Optional[str] = None) -> Tuple[Dict, bool]:
+        """Run task like run_task, also returning whether the result was replayed"""
         agent = self.get_agent(agent_name)
         if not agent:
             raise ValueError(f"Agent not found: {agent_name}")
             
-        return agent.run(task)
+        if idempotency_key is None:
+            return self._run_task(agent_name, agent, task), False
+        result, replayed = self._idempotency.execute(
+            agent_name, idempotency_key, task,
+            lambda: self._run_task(agent_name, agent, task)
+        )
+        if replayed:
+            log("Task result replayed", level="debug", event="task_replayed", agent=agent_name,
+                idempotency_key=idempotency_key)
+        return result, replayed
+        
+    def _run_task(self, agent_name: str, agent: IAgent, task: Dict) -> Dict:
+        # Everything logged while the task runs carries its correlation ids
+        with log_context(task_id=task.get("id") or uuid.uuid4().hex, agent=agent_name):
+            for hook in self._pre_task_hooks:
+                result = hook(agent_name, task)
+                if result is not None:
+                    log("Task answered by hook", level="debug", event="task_reused")
+                    return result
+                    
+            started = time.monotonic()
+            try:
+                result = agent.run(task)
+            except Exception as e:
+                log("Task failed", level="error", event="task_failed", task_type=task.get("type"),
+                    error=str(e), duration=round(time.monotonic() - started, 3))
+                raise
+            log("Task completed", level="debug", event="task_completed", task_type=task.get("type"),
+                duration=round(time.monotonic() - started, 3))
+            return self._store_content(agent_name, task, result)
+        
+    def get_content(self, ref: Dict[str, Any]) -> str:
+        """Get content of task result by its content_ref"""
+        if self._content_store is None:
+            raise ValueError("Content store is not configured")
+        return self._content_store.get_text(BlobRef.from_dict(ref).key)
+        
+    def _store_content(self, agent_name: str, task: Dict[str, Any],
+                       result: Dict[str, Any]) -> Dict[str, Any]:
+        """Index generated content and replace it with a reference into content store"""
+        content = result.get("content")
+        if not isinstance(content, str):
+            return result
+            
+        ref = None
+        if self._content_store is not None:
+            result = dict(result)
+            del result["content"]
+            ref = self._content_store.put(content)
+            result["content_ref"] = ref.to_dict()
+            
+        if self._content_index is not None:
+            self._content_index.add(
+                content,
+                title=task.get("prompt") or task.get("page") or "",
+                doc_id=ref.key if ref is not None else None,
+                ref=ref.to_dict() if ref is not None else None,
+                metadata={"agent": agent_name, "task_type": task.get("type")}
+            )
+        return result
         
     def get_agent_status(self, agent_name: str) -> Dict:
         """Get status of specified agent"""
@@ -0,0 +1,109 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Tuple
+
+class IdempotencyConflict(Exception):
+    """Idempotency key reused with a different payload"""
+    pass
+
+@dataclass
+class _Entry:
+    fingerprint: str
+    future: Future
+    expires_at: float
+
+class IdempotencyStore:
+    """Results of recent executions by idempotency key
+
+    The first call with a key runs; calls with the same key and payload
+    made while it runs wait for it, and calls made after it finished get
+    its stored result until ttl expires. Failed executions are not
+    stored, so a retry after an error runs again. At most max_keys
+    finished results are kept, oldest evicted first.
+    """
+
+    def __init__(self, ttl: float = 24 * 3600, max_keys: int = 10000,
+                 clock: Callable[[], float] = time.monotonic):
+        self.ttl = ttl
+        self.max_keys = max_keys
+        self._clock = clock
+        # Insertion order is expiry order since ttl is the same for all keys
+        self._entries: "OrderedDict[Tuple[str, str], _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def execute(self, scope: str, key: str, payload: Any,
+                run: Callable[[], Dict[str, Any]]) -> Tuple[Dict[str, Any], bool]:
+        """Run once per (scope, key); returns result and whether it was replayed"""
+        fingerprint = self.fingerprint(payload)
+        with self._lock:
+            self._expire()
+            entry = self._entries.get((scope, key))
+            if entry is not None:
+                if entry.fingerprint != fingerprint:
+                    raise IdempotencyConflict(f"Idempotency key {key} was used with a different payload")
+                owner = False
+            else:
+                entry = _Entry(fingerprint, Future(), self._clock() + self.ttl)
+                self._entries[(scope, key)] = entry
+                self._evict()
+                owner = True
+
+        if not owner:
+            return entry.future.result(), True
+
+        try:
+            result = run()
+        except BaseException as e:
+            with self._lock:
+                if self._entries.get((scope, key)) is entry:
+                    del self._entries[(scope, key)]
+            # Callers waiting on the execution get the same error and may retry
+            entry.future.set_exception(e)
+            raise
+        entry.future.set_result(result)
+        return result, False
+
+    def forget(self, scope: str, key: str) -> None:
+        with self._lock:
+            self._entries.pop((scope, key), None)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    @staticmethod
+    def fingerprint(payload: Any) -> str:
+        data = json.dumps(payload, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str)
+        return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+    def _expire(self) -> None:
+        now = self._clock()
+        while self._entries:
+            key, entry = next(iter(self._entries.items()))
+            if entry.expires_at > now:
+                break
+            del self._entries[key]
+            if not entry.future.done():
+                # Still running after ttl: keep it attachable until it finishes
+                entry.expires_at = now + self.ttl
+                self._entries[key] = entry
+                break
+
+    def _evict(self) -> None:
+        excess = len(self._entries) - self.max_keys
+        if excess <= 0:
+            return
+        victims = []
+        for key, entry in self._entries.items():
+            # Running executions are never evicted, their callers are attached to them
+            if entry.future.done():
+                victims.append(key)
+                if len(victims) == excess:
+                    break
+        for key in victims:
+            del self._entries[key]
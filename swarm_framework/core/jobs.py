@@ -0,0 +1,351 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import asdict, dataclass
+from typing import Any, BinaryIO, Callable, Deque, Dict, Iterator, List, Optional, Set, Tuple
+from ..utils.logger import bind_context, log, log_context
+
+_CREATE_JOB = """
+    CREATE TABLE IF NOT EXISTS job (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        job_id TEXT NOT NULL,
+        agent TEXT NOT NULL,
+        input_path TEXT NOT NULL,
+        input_head TEXT NOT NULL,
+        watermark INTEGER NOT NULL,
+        watermark_offset INTEGER NOT NULL,
+        started_at REAL NOT NULL,
+        finished_at REAL
+    )
+"""
+_CREATE_ITEMS = """
+    CREATE TABLE IF NOT EXISTS items (
+        line INTEGER PRIMARY KEY,
+        offset INTEGER NOT NULL,
+        item_id TEXT NOT NULL,
+        status TEXT NOT NULL,
+        error TEXT,
+        result TEXT,
+        finished_at REAL NOT NULL
+    )
+"""
+_SELECT_JOB = "SELECT job_id, agent, input_path, input_head, watermark, watermark_offset, finished_at FROM job"
+_INSERT_JOB = """
+    INSERT INTO job (id, job_id, agent, input_path, input_head, watermark, watermark_offset, started_at)
+    VALUES (1, ?, ?, ?, ?, 0, 0, ?)
+"""
+_UPDATE_WATERMARK = "UPDATE job SET watermark = ?, watermark_offset = ?, finished_at = ? WHERE id = 1"
+_UPSERT_ITEM = """
+    INSERT INTO items (line, offset, item_id, status, error, result, finished_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(line) DO UPDATE SET
+        status = excluded.status, error = excluded.error,
+        result = excluded.result, finished_at = excluded.finished_at
+"""
+_SELECT_DONE_AHEAD = "SELECT line FROM items WHERE line >= ?"
+_SELECT_FAILED = "SELECT line, offset FROM items WHERE status = 'failed' ORDER BY line"
+_SELECT_FAILURES = "SELECT line, item_id, error FROM items WHERE status = 'failed' ORDER BY line LIMIT ?"
+_COUNT_ITEMS = "SELECT status, COUNT(*) FROM items GROUP BY status"
+
+# Bytes of the input hashed to detect that a checkpoint belongs to another file
+_HEAD_SIZE = 64 * 1024
+
+@dataclass
+class JobProgress:
+    """Progress of a bulk job; rate is items per second over the recent window"""
+    job_id: str
+    total: int
+    processed: int
+    succeeded: int
+    failed: int
+    skipped: int
+    in_flight: int
+    elapsed: float
+    rate: float
+    eta: Optional[float]
+
+    @property
+    def remaining(self) -> int:
+        return max(self.total - self.skipped - self.processed, 0)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {**asdict(self), "remaining": self.remaining}
+
+@dataclass
+class _Item:
+    line: int
+    offset: int
+    item_id: str
+    task: Optional[Dict[str, Any]]
+    error: Optional[str] = None
+
+class BulkJobRunner:
+    """Runs a task for every line of a JSON Lines file through SwarmEngine
+
+    Lines are read lazily and at most max_workers * 2 tasks are in flight,
+    so the input is never loaded whole. Each line is a task (merged over
+    defaults) whose "id" names the item in reports, the line number
+    otherwise. Outcomes are checkpointed to SQLite every checkpoint_every
+    items or checkpoint_interval seconds, together with the watermark:
+    the first line not yet finished and its byte offset. Running again
+    with the same checkpoint resumes by seeking to the watermark and
+    skipping lines finished out of order after it; at most the work of
+    one checkpoint interval is repeated after a crash. Failed lines are
+    recorded and retried on a later run with retry_failed.
+    """
+
+    def __init__(self, engine, agent_name: str, input_path: str, checkpoint_path: str,
+                 job_id: Optional[str] = None, defaults: Optional[Dict[str, Any]] = None,
+                 max_workers: int = 8, checkpoint_every: int = 100, checkpoint_interval: float = 5.0,
+                 progress_interval: float = 10.0, rate_window: float = 60.0,
+                 on_progress: Optional[Callable[[JobProgress], None]] = None,
+                 retry_failed: bool = False):
+        self.engine = engine
+        self.agent_name = agent_name
+        self.input_path = os.path.abspath(input_path)
+        self.checkpoint_path = checkpoint_path
+        self.job_id = job_id or os.path.splitext(os.path.basename(input_path))[0]
+        self.defaults = dict(defaults or {})
+        self.max_workers = max_workers
+        self.checkpoint_every = checkpoint_every
+        self.checkpoint_interval = checkpoint_interval
+        self.progress_interval = progress_interval
+        self.rate_window = rate_window
+        self.on_progress = on_progress
+        self.retry_failed = retry_failed
+        self._stopped = threading.Event()
+        self._progress: Optional[JobProgress] = None
+
+    @property
+    def progress(self) -> Optional[JobProgress]:
+        """Latest progress snapshot, None before the job started"""
+        return self._progress
+
+    def stop(self) -> None:
+        """Stop reading new lines; running tasks finish and are checkpointed"""
+        self._stopped.set()
+
+    def run(self) -> JobProgress:
+        """Process the input from the last checkpoint to the end, returns final progress"""
+        self._stopped.clear()
+        conn = self._open()
+        try:
+            with log_context(job=self.job_id):
+                return self._run(conn)
+        finally:
+            conn.close()
+
+    def failures(self, limit: int = 100) -> List[Dict[str, Any]]:
+        """Failed lines recorded in the checkpoint"""
+        conn = sqlite3.connect(self.checkpoint_path)
+        try:
+            rows = conn.execute(_SELECT_FAILURES, (limit,)).fetchall()
+        finally:
+            conn.close()
+        return [{"line": line, "id": item_id, "error": error} for line, item_id, error in rows]
+
+    def _run(self, conn: sqlite3.Connection) -> JobProgress:
+        watermark, watermark_offset = conn.execute("SELECT watermark, watermark_offset FROM job").fetchone()
+        # Lines after the watermark that finished before the last checkpoint
+        finished_ahead: Set[int] = {row[0] for row in conn.execute(_SELECT_DONE_AHEAD, (watermark,))}
+        counts = dict(conn.execute(_COUNT_ITEMS).fetchall())
+        retries = conn.execute(_SELECT_FAILED).fetchall() if self.retry_failed else []
+
+        self._total = self._count_lines()
+        self._skipped = counts.get("done", 0) + (0 if self.retry_failed else counts.get("failed", 0))
+        self._processed = self._succeeded = self._failed = 0
+        self._started = time.monotonic()
+        self._completions: Deque[float] = deque()
+        self._watermark = watermark
+        self._offsets: Dict[int, int] = {}
+        self._finished_ahead = finished_ahead
+        # Next line to read; the watermark never passes it, offsets of later lines are unknown
+        self._next_line, self._next_offset = watermark, watermark_offset
+        self._pending_rows: List[Tuple] = []
+        self._last_checkpoint = self._last_report = time.monotonic()
+
+        log("Bulk job started", event="bulk_started", agent=self.agent_name, total=self._total,
+            skipped=self._skipped, watermark=watermark, retries=len(retries))
+
+        window = self.max_workers * 2
+        running: Dict[Future, _Item] = {}
+        exhausted = False
+        try:
+            with open(self.input_path, "rb") as source, \
+                    ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="bulk-job") as executor:
+                items = self._items(source, retries, watermark, watermark_offset)
+                while True:
+                    while not exhausted and not self._stopped.is_set() and len(running) < window:
+                        item = next(items, None)
+                        if item is None:
+                            exhausted = True
+                            break
+                        if item.task is None:
+                            self._finish(conn, item, None, item.error)
+                            continue
+                        running[executor.submit(bind_context(self._execute, item))] = item
+                    if not running:
+                        break
+
+                    done, _ = wait(list(running), timeout=self.progress_interval, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        item = running.pop(future)
+                        error = future.exception()
+                        if error is None:
+                            self._finish(conn, item, future.result(), None)
+                        else:
+                            self._finish(conn, item, None, str(error))
+                    self._report(len(running))
+        finally:
+            # Also on errors and interrupts: whatever finished is not repeated on resume
+            finished = exhausted and not running and not self._stopped.is_set()
+            self._checkpoint(conn, finished)
+
+        progress = self._report(0, force=True)
+        log("Bulk job finished" if finished else "Bulk job stopped", event="bulk_finished",
+            **progress.to_dict())
+        return progress
+
+    def _items(self, source: BinaryIO, retries: List[Tuple[int, int]],
+               watermark: int, offset: int) -> Iterator[_Item]:
+        """Failed lines to retry first, then lines from the watermark on"""
+        for line, line_offset in retries:
+            source.seek(line_offset)
+            yield self._parse(line, line_offset, source.readline())
+
+        source.seek(offset)
+        line = watermark
+        while True:
+            line_offset = source.tell()
+            raw = source.readline()
+            if not raw:
+                return
+            self._offsets[line] = line_offset
+            self._next_line, self._next_offset = line + 1, source.tell()
+            if not raw.strip():
+                # Blank lines count as finished so the watermark can pass them
+                self._finished_ahead.add(line)
+            if line in self._finished_ahead:
+                self._advance()
+            else:
+                yield self._parse(line, line_offset, raw)
+            line += 1
+
+    def _parse(self, line: int, offset: int, raw: bytes) -> _Item:
+        try:
+            task = json.loads(raw)
+            if not isinstance(task, dict):
+                raise ValueError("line is not a JSON object")
+        except ValueError as e:
+            return _Item(line, offset, f"line-{line}", None, f"Invalid task: {e}")
+        return _Item(line, offset, str(task.get("id") or f"line-{line}"), {**self.defaults, **task})
+
+    def _execute(self, item: _Item) -> Dict[str, Any]:
+        return self.engine.run_task(self.agent_name, item.task)
+
+    def _finish(self, conn: sqlite3.Connection, item: _Item, result: Optional[Dict[str, Any]],
+                error: Optional[str]) -> None:
+        now = time.monotonic()
+        self._processed += 1
+        if error is None:
+            self._succeeded += 1
+            # Content itself lives in the content store or with the caller, not in the checkpoint
+            summary = json.dumps({key: value for key, value in result.items() if key != "content"},
+                                 ensure_ascii=False, default=str)
+            self._pending_rows.append((item.line, item.offset, item.item_id, "done", None, summary, time.time()))
+        else:
+            self._failed += 1
+            log("Bulk job item failed", level="warning", event="bulk_item_failed",
+                line=item.line, item=item.item_id, error=error)
+            self._pending_rows.append((item.line, item.offset, item.item_id, "failed", error, None, time.time()))
+        self._completions.append(now)
+
+        if item.line >= self._watermark:
+            self._finished_ahead.add(item.line)
+            self._advance()
+        if (len(self._pending_rows) >= self.checkpoint_every
+                or now - self._last_checkpoint >= self.checkpoint_interval):
+            self._checkpoint(conn)
+
+    def _advance(self) -> None:
+        while self._watermark < self._next_line and self._watermark in self._finished_ahead:
+            self._finished_ahead.discard(self._watermark)
+            self._offsets.pop(self._watermark, None)
+            self._watermark += 1
+
+    def _checkpoint(self, conn: sqlite3.Connection, finished: bool = False) -> None:
+        """Write finished items and the watermark in one transaction"""
+        offset = self._offsets.get(self._watermark, self._next_offset)
+        with conn:
+            conn.executemany(_UPSERT_ITEM, self._pending_rows)
+            conn.execute(_UPDATE_WATERMARK, (self._watermark, offset, time.time() if finished else None))
+        self._pending_rows = []
+        self._last_checkpoint = time.monotonic()
+
+    def _report(self, in_flight: int, force: bool = False) -> JobProgress:
+        now = time.monotonic()
+        while self._completions and self._completions[0] < now - self.rate_window:
+            self._completions.popleft()
+        span = min(now - self._started, self.rate_window)
+        rate = len(self._completions) / span if span > 0 else 0.0
+        progress = JobProgress(
+            job_id=self.job_id,
+            total=self._total,
+            processed=self._processed,
+            succeeded=self._succeeded,
+            failed=self._failed,
+            skipped=self._skipped,
+            in_flight=in_flight,
+            elapsed=now - self._started,
+            rate=rate,
+            eta=None
+        )
+        if not progress.remaining:
+            progress.eta = 0.0
+        elif rate > 0:
+            progress.eta = progress.remaining / rate
+        self._progress = progress
+        if force or now - self._last_report >= self.progress_interval:
+            self._last_report = now
+            if not force:
+                log("Bulk job progress", event="bulk_progress", **progress.to_dict())
+            if self.on_progress is not None:
+                self.on_progress(progress)
+        return progress
+
+    def _count_lines(self) -> int:
+        """Non-blank lines of the input; a plain scan, cheap next to running the tasks"""
+        count = 0
+        with open(self.input_path, "rb") as source:
+            for raw in source:
+                if raw.strip():
+                    count += 1
+        return count
+
+    def _open(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.checkpoint_path)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(_CREATE_JOB)
+        conn.execute(_CREATE_ITEMS)
+        head = self._input_head()
+        row = conn.execute(_SELECT_JOB).fetchone()
+        if row is None:
+            with conn:
+                conn.execute(_INSERT_JOB, (self.job_id, self.agent_name, self.input_path, head, time.time()))
+        elif row[3] != head or row[0] != self.job_id:
+            conn.close()
+            raise ValueError(
+                f"Checkpoint {self.checkpoint_path} belongs to job {row[0]} over {row[2]}, "
+                f"remove it to start over"
+            )
+        return conn
+
+    def _input_head(self) -> str:
+        with open(self.input_path, "rb") as source:
+            return hashlib.sha256(source.read(_HEAD_SIZE)).hexdigest()
@@ -0,0 +1,186 @@
+import bisect
+import heapq
+import threading
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Set
+from ..agents.interfaces import IAgent
+
+@dataclass
+class AgentPage:
+    """Page of agents returned by registry query"""
+
+    agents: List[IAgent]
+    next_cursor: Optional[str]
+    total: int
+
+class AgentRegistry:
+    """Agent registry with secondary indexes on type, platform, status and tags
+
+    Every agent gets a sequence number on registration. Indexes map field
+    values to sets of sequence numbers, so a filtered query costs the size
+    of the smallest matching index rather than the size of the registry,
+    and the sequence number doubles as a stable pagination cursor.
+    """
+
+    INDEXED_FIELDS = ("type", "platform", "status", "tag")
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._next_seq = 1
+        self._seq_by_name: Dict[str, int] = {}
+        self._agents: Dict[int, IAgent] = {}
+        self._order: List[int] = []
+        self._values: Dict[int, Dict[str, Set[str]]] = {}
+        self._indexes: Dict[str, Dict[str, Set[int]]] = {
+            field: defaultdict(set) for field in self.INDEXED_FIELDS
+        }
+
+    def __len__(self) -> int:
+        return len(self._agents)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._seq_by_name
+
+    def add(self, agent: IAgent, agent_type: str, tags: Iterable[str] = ()) -> None:
+        """Register agent, replacing any agent with the same name"""
+        with self._lock:
+            if agent.name in self._seq_by_name:
+                self.remove(agent.name)
+
+            seq = self._next_seq
+            self._next_seq += 1
+            self._seq_by_name[agent.name] = seq
+            self._agents[seq] = agent
+            self._order.append(seq)
+            self._values[seq] = {
+                "type": {agent_type},
+                "platform": {agent.platform},
+                "status": {agent.get_status()["status"]},
+                "tag": set(tags)
+            }
+            for field, values in self._values[seq].items():
+                for value in values:
+                    self._indexes[field][value].add(seq)
+
+        # Agents without change notifications keep their initial status
+        if hasattr(agent, "subscribe"):
+            agent.subscribe(self._on_agent_changed)
+
+    def remove(self, name: str) -> Optional[IAgent]:
+        """Unregister agent by name"""
+        with self._lock:
+            seq = self._seq_by_name.pop(name, None)
+            if seq is None:
+                return None
+
+            agent = self._agents.pop(seq)
+            del self._order[bisect.bisect_left(self._order, seq)]
+            for field, values in self._values.pop(seq).items():
+                for value in values:
+                    self._discard(field, value, seq)
+
+        if hasattr(agent, "unsubscribe"):
+            agent.unsubscribe(self._on_agent_changed)
+        return agent
+
+    def get(self, name: str) -> Optional[IAgent]:
+        """Get agent by name"""
+        seq = self._seq_by_name.get(name)
+        return self._agents.get(seq) if seq is not None else None
+
+    def all(self) -> List[IAgent]:
+        """Get all agents in registration order"""
+        with self._lock:
+            return [self._agents[seq] for seq in self._order]
+
+    def query(self, type: Optional[str] = None, platform: Optional[str] = None,
+              status: Optional[str] = None, tags: Iterable[str] = (),
+              limit: Optional[int] = None, cursor: Optional[str] = None) -> AgentPage:
+        """Find agents matching all given filters
+
+        Results are ordered by registration; pass ``next_cursor`` of the
+        previous page as ``cursor`` to continue.
+        """
+        after = self._parse_cursor(cursor)
+        if limit is not None and limit < 1:
+            raise ValueError("Limit must be positive")
+
+        filters = [("type", type), ("platform", platform), ("status", status)]
+        filters.extend(("tag", tag) for tag in tags)
+        filters = [(field, value) for field, value in filters if value is not None]
+
+        with self._lock:
+            if filters:
+                seqs = self._match(filters)
+                total = len(seqs)
+                candidates = [seq for seq in seqs if seq > after]
+                if limit is None:
+                    page = sorted(candidates)
+                else:
+                    page = heapq.nsmallest(limit + 1, candidates)
+            else:
+                total = len(self._order)
+                start = bisect.bisect_right(self._order, after)
+                end = None if limit is None else start + limit + 1
+                page = self._order[start:end]
+
+            next_cursor = None
+            if limit is not None and len(page) > limit:
+                page = page[:limit]
+                next_cursor = str(page[-1])
+
+            return AgentPage(
+                agents=[self._agents[seq] for seq in page],
+                next_cursor=next_cursor,
+                total=total
+            )
+
+    def _match(self, filters: List[tuple]) -> Set[int]:
+        """Intersect index sets starting from the smallest one"""
+        sets = [self._indexes[field].get(value, set()) for field, value in filters]
+        sets.sort(key=len)
+        result = set(sets[0])
+        for other in sets[1:]:
+            if not result:
+                break
+            result &= other
+        return result
+
+    def _on_agent_changed(self, agent: IAgent) -> None:
+        """Reindex agent status after state change"""
+        with self._lock:
+            seq = self._seq_by_name.get(agent.name)
+            if seq is None or self._agents[seq] is not agent:
+                return
+
+            status = agent.get_status()["status"]
+            values = self._values[seq]
+            if values["status"] == {status}:
+                return
+            for old in values["status"]:
+                self._discard("status", old, seq)
+            values["status"] = {status}
+            self._indexes["status"][status].add(seq)
+
+    def _discard(self, field: str, value: str, seq: int) -> None:
+        """Remove sequence number from index, dropping empty buckets"""
+        bucket = self._indexes[field].get(value)
+        if bucket is None:
+            return
+        bucket.discard(seq)
+        if not bucket:
+            del self._indexes[field][value]
+
+    @staticmethod
+    def _parse_cursor(cursor: Optional[str]) -> int:
+        """Convert pagination cursor to sequence number"""
+        if cursor is None or cursor == "":
+            return 0
+        try:
+            after = int(cursor)
+        except ValueError:
+            raise ValueError(f"Invalid cursor: {cursor}")
+        if after < 0:
+            raise ValueError(f"Invalid cursor: {cursor}")
+        return after
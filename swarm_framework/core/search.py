@@ -0,0 +1,323 @@
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+# Words too common to help ranking; dropping them keeps OR queries selective
+STOPWORDS = frozenset(
+    "a an and are as at be by for from how in is it of on or that the this to what with "
+    "в и на с по для из к о от что как".split()
+)
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+def tokenize(text: str) -> List[str]:
+    """Distinct query terms, folded like the unicode61 tokenizer folds indexed text"""
+    folded = "".join(
+        char for char in unicodedata.normalize("NFKD", text.lower())
+        if not unicodedata.combining(char)
+    )
+    terms = []
+    for token in _TOKEN.findall(folded):
+        if token not in STOPWORDS and token not in terms:
+            terms.append(token)
+    return terms
+
+_CREATE_DOCUMENTS = """
+    CREATE TABLE IF NOT EXISTS documents (
+        id INTEGER PRIMARY KEY,
+        doc_id TEXT UNIQUE NOT NULL,
+        ref TEXT,
+        metadata TEXT NOT NULL,
+        indexed_at REAL NOT NULL
+    )
+"""
+_CREATE_INDEX = """
+    CREATE VIRTUAL TABLE IF NOT EXISTS documents_fts USING fts5(
+        title, body, tokenize = 'unicode61 remove_diacritics 2'
+    )
+"""
+_SELECT_ROWID = "SELECT id FROM documents WHERE doc_id = ?"
+_INSERT_DOCUMENT = "INSERT INTO documents (doc_id, ref, metadata, indexed_at) VALUES (?, ?, ?, ?)"
+_UPDATE_DOCUMENT = "UPDATE documents SET ref = ?, metadata = ?, indexed_at = ? WHERE id = ?"
+_DELETE_DOCUMENT = "DELETE FROM documents WHERE id = ?"
+_INSERT_FTS = "INSERT INTO documents_fts (rowid, title, body) VALUES (?, ?, ?)"
+_DELETE_FTS = "DELETE FROM documents_fts WHERE rowid = ?"
+_CREATE_VOCAB = """
+    CREATE VIRTUAL TABLE IF NOT EXISTS documents_vocab USING fts5vocab(documents_fts, 'row')
+"""
+_SELECT_FREQUENCY = "SELECT doc FROM documents_vocab WHERE term = ?"
+_SEARCH = """
+    SELECT d.doc_id, d.ref, d.metadata, f.title,
+           snippet(documents_fts, 1, ?, ?, '…', ?) AS snippet,
+           bm25(documents_fts, ?, 1.0) AS score
+    FROM documents_fts AS f
+    JOIN documents AS d ON d.id = f.rowid
+    WHERE documents_fts MATCH ?
+    ORDER BY {order}
+    LIMIT ?
+"""
+_COUNT = "SELECT COUNT(*) FROM documents"
+
+@dataclass
+class SearchHit:
+    """Search result: document, ranking score (higher is better) and snippet
+
+    coverage is the share of query terms the document matched.
+    """
+    doc_id: str
+    title: str
+    snippet: str
+    score: float
+    coverage: float
+    ref: Optional[Dict[str, Any]]
+    metadata: Dict[str, Any]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "doc_id": self.doc_id,
+            "title": self.title,
+            "snippet": self.snippet,
+            "score": self.score,
+            "coverage": self.coverage,
+            "content_ref": self.ref,
+            "metadata": self.metadata
+        }
+
+PreTaskHook = Callable[[str, Dict[str, Any]], Optional[Dict[str, Any]]]
+
+class ContentIndex:
+    """Full-text index of generated content on SQLite FTS5
+
+    Documents are added one at a time as agents produce content, so the
+    index is always up to date without rebuilds. Results are ranked with
+    BM25, title matches weighted above body matches.
+
+    Ranking cost grows with the number of matching documents, so queries
+    never OR all terms together. Terms are ordered from rare to common
+    and matched in tiers: first documents with all selective terms, then
+    with one common term fewer, and so on until the page is filled.
+    Terms found in more than max_df_ratio of documents are ignored unless
+    nothing else is left. A tier expected to match more than max_ranked
+    documents is returned newest first instead of scored in full.
+    Pages are bounded: limit up to MAX_LIMIT, offset up to MAX_OFFSET.
+    """
+
+    CACHED_FREQUENCY = 1000
+    MAX_LIMIT = 100
+    # Every tier fetches offset + limit rows with snippets, deep pages cost the whole prefix
+    MAX_OFFSET = 1000
+
+    def __init__(self, db_path: str, title_weight: float = 5.0, snippet_tokens: int = 24,
+                 max_df_ratio: float = 0.5, max_ranked: int = 10000):
+        self.db_path = db_path
+        self.title_weight = title_weight
+        self.snippet_tokens = snippet_tokens
+        self.max_df_ratio = max_df_ratio
+        self.max_ranked = max_ranked
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(_CREATE_DOCUMENTS)
+        self._conn.execute(_CREATE_INDEX)
+        self._conn.execute(_CREATE_VOCAB)
+        self._total = self._conn.execute(_COUNT).fetchone()[0]
+        # Term -> (document frequency, document count when it was read); counting
+        # a common term scans its whole posting list, so its frequency is reused
+        # until the corpus grows noticeably
+        self._frequencies: Dict[str, Tuple[int, int]] = {}
+        self._lock = threading.Lock()
+
+    def add(self, body: str, title: str = "", doc_id: Optional[str] = None,
+            ref: Optional[Dict[str, Any]] = None, metadata: Optional[Dict[str, Any]] = None) -> str:
+        """Index document, replacing the previous version with the same doc_id"""
+        with self._lock, self._transaction() as conn:
+            doc_id, created = self._upsert(conn, body, title, doc_id, ref, metadata)
+        self._total += created
+        return doc_id
+
+    def add_many(self, documents: Iterable[Dict[str, Any]]) -> int:
+        """Index documents ({"body", "title", "doc_id", "ref", "metadata"}) in one transaction"""
+        count = created = 0
+        with self._lock, self._transaction() as conn:
+            for document in documents:
+                created += self._upsert(
+                    conn,
+                    document["body"],
+                    document.get("title", ""),
+                    document.get("doc_id"),
+                    document.get("ref"),
+                    document.get("metadata")
+                )[1]
+                count += 1
+        self._total += created
+        return count
+
+    def remove(self, doc_id: str) -> bool:
+        with self._lock, self._transaction() as conn:
+            row = conn.execute(_SELECT_ROWID, (doc_id,)).fetchone()
+            if row is None:
+                return False
+            conn.execute(_DELETE_FTS, (row[0],))
+            conn.execute(_DELETE_DOCUMENT, (row[0],))
+        self._total -= 1
+        return True
+
+    def search(self, query: str, limit: int = 10, offset: int = 0,
+               match_all: bool = False, highlight: Sequence[str] = ("<b>", "</b>")) -> List[SearchHit]:
+        """Ranked search with snippets
+
+        Query is free text: terms are matched as words and stopwords are
+        dropped. By default documents matching more selective terms come
+        first; with match_all every term must match (terms found in most
+        documents are skipped, they would only slow the query down).
+        Raises ValueError if limit or offset is out of bounds.
+        """
+        if not 1 <= limit <= self.MAX_LIMIT:
+            raise ValueError(f"Limit must be between 1 and {self.MAX_LIMIT}")
+        if not 0 <= offset <= self.MAX_OFFSET:
+            raise ValueError(f"Offset must be between 0 and {self.MAX_OFFSET}")
+        terms = tokenize(query)
+        if not terms:
+            return []
+
+        wanted = offset + limit
+        hits: List[SearchHit] = []
+        seen = set()
+        with self._lock:
+            for tier, estimate in self._tiers(terms, match_all):
+                expression = " AND ".join(f'"{term}"' for term in tier)
+                order = "score" if estimate <= self.max_ranked else "f.rowid DESC"
+                rows = self._conn.execute(_SEARCH.format(order=order), (
+                    highlight[0], highlight[1], self.snippet_tokens,
+                    self.title_weight, expression, wanted + len(seen)
+                )).fetchall()
+                for doc_id, ref, metadata, title, snippet, score in rows:
+                    if doc_id in seen:
+                        continue
+                    seen.add(doc_id)
+                    hits.append(SearchHit(
+                        doc_id=doc_id,
+                        title=title,
+                        snippet=snippet,
+                        score=-score,
+                        coverage=len(tier) / len(terms),
+                        ref=json.loads(ref) if ref else None,
+                        metadata=json.loads(metadata)
+                    ))
+                    if len(hits) >= wanted:
+                        break
+                if len(hits) >= wanted:
+                    break
+        return hits[offset:]
+
+    def count(self) -> int:
+        return self._total
+
+    def optimize(self) -> None:
+        """Merge index segments; worth running after large bulk loads"""
+        with self._lock:
+            self._conn.execute("INSERT INTO documents_fts (documents_fts) VALUES ('optimize')")
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def lookup_hook(self, min_score: float, task_types: Sequence[str] = ("generate",),
+                    field: str = "prompt") -> PreTaskHook:
+        """Pre-task hook answering tasks with already indexed content
+
+        Returns the best document matching every term of task[field] if
+        its score reaches min_score; a task with "reuse": false always runs.
+        """
+        def hook(agent_name: str, task: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+            if task.get("type") not in task_types or not task.get("reuse", True):
+                return None
+            text = task.get(field)
+            if not text:
+                return None
+            hits = self.search(text, limit=1, match_all=True)
+            if not hits or hits[0].score < min_score:
+                return None
+            hit = hits[0]
+            result = {"reused": True, "match": hit.to_dict()}
+            if hit.ref is not None:
+                result["content_ref"] = hit.ref
+            return result
+        return hook
+
+    def _tiers(self, terms: List[str], match_all: bool) -> List[Tuple[List[str], int]]:
+        """Term sets to match in order, each with an upper bound of matches"""
+        frequencies = {term: self._document_frequency(term) for term in terms}
+
+        def estimate(tier: List[str]) -> int:
+            # Matches of an AND query if terms occurred independently
+            matches = float(self._total)
+            for term in tier:
+                matches *= frequencies[term] / max(self._total, 1)
+            return int(matches)
+
+        if match_all and not all(frequencies.values()):
+            # A term missing from the index means no document has them all
+            return []
+
+        known = sorted((term for term in terms if frequencies[term]), key=frequencies.get)
+        selective = [
+            term for term in known
+            if frequencies[term] <= self.max_df_ratio * self._total
+        ] or known
+        if match_all:
+            return [(selective, estimate(selective))]
+        return [
+            (selective[:size], estimate(selective[:size]))
+            for size in range(len(selective), 0, -1)
+        ]
+
+    def _document_frequency(self, term: str) -> int:
+        cached = self._frequencies.get(term)
+        if cached is not None and self._total <= cached[1] * 1.01 + 100:
+            return cached[0]
+        row = self._conn.execute(_SELECT_FREQUENCY, (term,)).fetchone()
+        frequency = row[0] if row else 0
+        # Rare terms are cheap to count and their frequency changes fast in relative terms
+        if frequency >= self.CACHED_FREQUENCY:
+            if len(self._frequencies) >= 100000:
+                self._frequencies.clear()
+            self._frequencies[term] = (frequency, self._total)
+        return frequency
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield self._conn
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._conn.execute("COMMIT")
+
+    @staticmethod
+    def _upsert(conn: sqlite3.Connection, body: str, title: str, doc_id: Optional[str],
+                ref: Optional[Dict[str, Any]], metadata: Optional[Dict[str, Any]]) -> Tuple[str, bool]:
+        """Insert or replace document, returns doc_id and whether it is new"""
+        doc_id = doc_id or hashlib.sha256(body.encode("utf-8")).hexdigest()
+        values = (
+            json.dumps(ref) if ref is not None else None,
+            json.dumps(metadata or {}, ensure_ascii=False),
+            time.time()
+        )
+        row = conn.execute(_SELECT_ROWID, (doc_id,)).fetchone()
+        if row is None:
+            rowid = conn.execute(_INSERT_DOCUMENT, (doc_id,) + values).lastrowid
+        else:
+            rowid = row[0]
+            conn.execute(_UPDATE_DOCUMENT, values + (rowid,))
+            conn.execute(_DELETE_FTS, (rowid,))
+        conn.execute(_INSERT_FTS, (rowid, title, body))
+        return doc_id, row is None
@@ -0,0 +1,29 @@
+from abc import ABC, abstractmethod
+from typing import Any, Dict
+from .prompt import Prompt
+
+class ProviderError(Exception):
+    """Error returned by LLM provider"""
+    pass
+
+class ILLMProvider(ABC):
+    """Interface for LLM providers"""
+    
+    @property
+    @abstractmethod
+    def name(self) -> str:
+        """Get provider name"""
+        pass
+        
+    @abstractmethod
+    def complete(self, prompt: Prompt, model: str, **params: Any) -> Dict[str, Any]:
+        """Complete prompt with given model
+
+        Returns dict with "content", "model", "provider" and "usage"
+        ({"prompt_tokens", "cached_tokens", "completion_tokens"}).
+        """
+        pass
+        
+    def close(self) -> None:
+        """Release threads or connections held by the provider; it stays usable"""
+        pass
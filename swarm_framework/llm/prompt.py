@@ -0,0 +1,142 @@
+import hashlib
+import json
+import textwrap
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+PART_SEPARATOR = "\n\n"
+
+# Settings that change per call and must never leak into the cached prefix
+VOLATILE_SETTINGS = frozenset({"temperature", "max_tokens", "seed"})
+
+@dataclass(frozen=True)
+class Prompt:
+    """Assembled prompt: byte-stable static prefix followed by per-request text"""
+
+    prefix: str
+    request: str
+    fingerprints: Tuple[str, ...]
+
+    @property
+    def prefix_fingerprint(self) -> str:
+        """Fingerprint of the whole static prefix"""
+        return self.fingerprints[-1] if self.fingerprints else ""
+
+    @property
+    def text(self) -> str:
+        return f"{self.prefix}{PART_SEPARATOR}{self.request}" if self.prefix else self.request
+
+    def messages(self) -> List[Dict[str, str]]:
+        """Chat messages with static prefix as system message"""
+        messages = [{"role": "system", "content": self.prefix}] if self.prefix else []
+        messages.append({"role": "user", "content": self.request})
+        return messages
+
+class PrefixStats:
+    """Reuse statistics of prompt prefix fingerprints"""
+
+    def __init__(self, max_fingerprints: int = 10000):
+        self.max_fingerprints = max_fingerprints
+        self._seen: "OrderedDict[str, int]" = OrderedDict()
+        self._total = 0
+        self._reused = 0
+        self._lock = threading.Lock()
+
+    def record(self, fingerprint: str) -> bool:
+        """Record prefix use, returns True if the prefix was seen before"""
+        with self._lock:
+            self._total += 1
+            count = self._seen.get(fingerprint)
+            if count is not None:
+                self._reused += 1
+                self._seen[fingerprint] = count + 1
+                self._seen.move_to_end(fingerprint)
+                return True
+            self._seen[fingerprint] = 1
+            if len(self._seen) > self.max_fingerprints:
+                self._seen.popitem(last=False)
+            return False
+
+    @property
+    def reuse_rate(self) -> float:
+        return self._reused / self._total if self._total else 0.0
+
+    def report(self, top: int = 10) -> Dict[str, Any]:
+        with self._lock:
+            most_used = sorted(self._seen.items(), key=lambda item: item[1], reverse=True)[:top]
+            return {
+                "prompts": self._total,
+                "reused": self._reused,
+                "reuse_rate": self.reuse_rate,
+                "distinct_prefixes": len(self._seen),
+                "top_prefixes": [{"fingerprint": fp, "uses": uses} for fp, uses in most_used]
+            }
+
+class PromptAssembler:
+    """Assemble prompts with static parts first and byte-stable
+
+    Static parts (rendered instructions, system prompt, settings) are
+    normalized so that equal content always yields equal bytes: common
+    indentation and trailing whitespace are stripped, line endings are
+    unified, and settings are serialized with sorted keys. The per-request
+    text always goes last, so providers can reuse the cached prefix.
+    """
+
+    def __init__(self, stats: Optional[PrefixStats] = None,
+                 volatile_settings: frozenset = VOLATILE_SETTINGS):
+        self.stats = stats or PrefixStats()
+        self.volatile_settings = volatile_settings
+
+    def assemble(self, instructions: Sequence[str], request: str,
+                 system_prompt: Optional[str] = None,
+                 settings: Optional[Mapping[str, Any]] = None) -> Prompt:
+        parts = [self.normalize(part) for part in instructions]
+        if system_prompt:
+            parts.append(self.normalize(system_prompt))
+        if settings:
+            # System prompt is a part of its own, not a serialized setting
+            parts.append(self.serialize_settings(
+                {key: value for key, value in settings.items() if key != "system_prompt"}
+            ))
+        parts = [part for part in parts if part]
+
+        # Cumulative fingerprints show which layer breaks prefix reuse
+        digest = hashlib.sha256()
+        fingerprints = []
+        for index, part in enumerate(parts):
+            if index:
+                digest.update(PART_SEPARATOR.encode("utf-8"))
+            digest.update(part.encode("utf-8"))
+            fingerprints.append(digest.copy().hexdigest()[:16])
+
+        prompt = Prompt(
+            prefix=PART_SEPARATOR.join(parts),
+            request=self.normalize(request),
+            fingerprints=tuple(fingerprints)
+        )
+        if prompt.prefix:
+            self.stats.record(prompt.prefix_fingerprint)
+        return prompt
+
+    def serialize_settings(self, settings: Mapping[str, Any]) -> str:
+        stable = {
+            key: value for key, value in settings.items()
+            if key not in self.volatile_settings
+        }
+        if not stable:
+            return ""
+        return "## Settings\n" + json.dumps(
+            stable,
+            sort_keys=True,
+            ensure_ascii=False,
+            separators=(",", ":"),
+            default=str
+        )
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+        lines = [line.rstrip() for line in textwrap.dedent(text).split("\n")]
+        return "\n".join(lines).strip("\n")
@@ -0,0 +1,275 @@
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+from .interfaces import ILLMProvider, ProviderError
+from .prompt import Prompt
+from .router import ModelStats
+from ..utils.logger import bind_context, log
+
+class CircuitOpenError(ProviderError):
+    """Provider skipped because its circuit breaker is open"""
+    pass
+
+class CircuitBreaker:
+    """Circuit breaker of a single provider
+
+    After failure_threshold consecutive failures the breaker opens and
+    calls are rejected immediately. After reset_timeout seconds it lets
+    half_open_probes calls through; a successful probe closes it, a
+    failed one opens it again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0,
+                 half_open_probes: int = 1, clock: Callable[[], float] = time.monotonic):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_probes = half_open_probes
+        self._clock = clock
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probes = 0
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == self.OPEN and self._clock() - self._opened_at >= self.reset_timeout:
+                return self.HALF_OPEN
+            return self._state
+
+    def allow(self) -> bool:
+        """Whether a call may go to the provider now; reserves a probe when half-open"""
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.OPEN:
+                if self._clock() - self._opened_at < self.reset_timeout:
+                    return False
+                self._state = self.HALF_OPEN
+                self._probes = 0
+            if self._probes >= self.half_open_probes:
+                return False
+            self._probes += 1
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self._state != self.CLOSED:
+                log("Circuit breaker closed", event="breaker_closed", provider=self.name)
+            self._state = self.CLOSED
+            self._failures = 0
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    log("Circuit breaker opened", level="warning", event="breaker_opened",
+                        provider=self.name, failures=self._failures)
+                self._state = self.OPEN
+                self._opened_at = self._clock()
+
+class BreakerRegistry:
+    """Circuit breakers by provider name, shared by every agent using the registry"""
+
+    def __init__(self, **options: Any):
+        self._options = options
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> CircuitBreaker:
+        breaker = self._breakers.get(name)
+        if breaker is None:
+            with self._lock:
+                breaker = self._breakers.setdefault(name, CircuitBreaker(name, **self._options))
+        return breaker
+
+    def states(self) -> Dict[str, str]:
+        return {name: breaker.state for name, breaker in sorted(self._breakers.items())}
+
+@dataclass(frozen=True)
+class HedgePolicy:
+    """When to send a backup request
+
+    The delay is the given percentile of the latency observed for the
+    route being hedged, clamped to [min_delay, max_delay]; default_delay
+    is used until min_samples calls were observed.
+    """
+    enabled: bool = True
+    percentile: float = 0.95
+    min_delay: float = 0.05
+    max_delay: float = 10.0
+    default_delay: float = 2.0
+    min_samples: int = 20
+    max_hedges: int = 1
+
+@dataclass(frozen=True)
+class Route:
+    """Provider and model to send a request to; model None keeps the requested one"""
+    provider: ILLMProvider
+    model: Optional[str] = None
+
+    @property
+    def key(self) -> Tuple[str, Optional[str]]:
+        return self.provider.name, self.model
+
+class ResilientProvider(ILLMProvider):
+    """Provider wrapper with request hedging and per-provider circuit breakers
+
+    The request goes to the first route whose breaker allows it. If no
+    answer arrives within the hedge delay, a backup request goes to the
+    next route and the first successful answer wins; the slower request
+    finishes in the background and only feeds statistics. A failed route
+    fails over to the next one immediately. Routes behind an open
+    breaker are skipped without waiting. Responses slower than
+    slow_call_threshold count as breaker failures even though they are
+    used, so a degrading backend is shed before it starts timing out.
+
+    Each agent gets its own instance and hedge policy; pass a shared
+    BreakerRegistry to let agents share what they learn about providers.
+    """
+
+    def __init__(self, routes: Sequence[Route], hedging: Optional[HedgePolicy] = None,
+                 breakers: Optional[BreakerRegistry] = None,
+                 slow_call_threshold: Optional[float] = None,
+                 max_workers: int = 8, window: int = 200):
+        if not routes:
+            raise ValueError("At least one route is required")
+        self._routes = list(routes)
+        self.hedging = hedging or HedgePolicy()
+        self.breakers = breakers or BreakerRegistry()
+        self.slow_call_threshold = slow_call_threshold
+        self._stats: Dict[Tuple[str, Optional[str]], ModelStats] = {
+            route.key: ModelStats(window) for route in self._routes
+        }
+        self._max_workers = max_workers
+        # Created on first call and dropped by close(), so idle agents hold no threads
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._counters = {"requests": 0, "hedged": 0, "hedge_wins": 0, "failovers": 0, "rejected": 0}
+        self._lock = threading.Lock()
+
+    @property
+    def name(self) -> str:
+        return self._routes[0].provider.name
+
+    def complete(self, prompt: Prompt, model: str, **params: Any) -> Dict[str, Any]:
+        remaining = list(self._routes)
+        pending: Dict[Future, Route] = {}
+        errors: List[str] = []
+        launched: List[Route] = []
+
+        def launch() -> bool:
+            while remaining:
+                route = remaining.pop(0)
+                if self.breakers.get(route.provider.name).allow():
+                    future = self._pool().submit(bind_context(self._attempt, route, prompt, model, params))
+                    pending[future] = route
+                    launched.append(route)
+                    return True
+                errors.append(f"{route.provider.name}: circuit open")
+            return False
+
+        self._count("requests")
+        if not launch():
+            self._count("rejected")
+            raise CircuitOpenError(f"All providers unavailable: {'; '.join(errors)}")
+
+        hedges = 0
+        while pending:
+            timeout = None
+            if self.hedging.enabled and hedges < self.hedging.max_hedges and remaining:
+                timeout = self.hedge_delay(launched[-1])
+            done, _ = wait(list(pending), timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                if launch():
+                    hedges += 1
+                    self._count("hedged")
+                continue
+
+            for future in done:
+                route = pending.pop(future)
+                try:
+                    response = future.result()
+                except ProviderError as e:
+                    errors.append(f"{route.provider.name}: {e}")
+                    continue
+                if route is not launched[0]:
+                    self._count("hedge_wins" if hedges else "failovers")
+                response["resilience"] = {
+                    "provider": route.provider.name,
+                    "model": route.model or model,
+                    "attempts": len(launched),
+                    "hedged": hedges > 0
+                }
+                return response
+
+            if not pending and launch():
+                continue
+        raise ProviderError(f"All providers failed: {'; '.join(errors)}")
+
+    def hedge_delay(self, route: Route) -> float:
+        """Delay before hedging a request sent to route"""
+        policy = self.hedging
+        with self._lock:
+            stats = self._stats[route.key]
+            observed = stats.percentile(policy.percentile) if stats.samples >= policy.min_samples else None
+        delay = policy.default_delay if observed is None else observed
+        return min(policy.max_delay, max(policy.min_delay, delay))
+
+    def close(self) -> None:
+        """Shut the hedging pool down; losing requests still running finish in the background"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+    def report(self) -> Dict[str, Any]:
+        """Hedging counters, breaker states and latency of every route"""
+        with self._lock:
+            routes = {
+                f"{name}:{model or '*'}": stats.report()
+                for (name, model), stats in self._stats.items()
+            }
+            counters = dict(self._counters)
+        return {**counters, "breakers": self.breakers.states(), "routes": routes}
+
+    def _attempt(self, route: Route, prompt: Prompt, model: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        breaker = self.breakers.get(route.provider.name)
+        started = time.monotonic()
+        try:
+            response = route.provider.complete(prompt, route.model or model, **params)
+        except Exception as e:
+            latency = time.monotonic() - started
+            breaker.record_failure()
+            with self._lock:
+                self._stats[route.key].record(latency, ok=False)
+            if isinstance(e, ProviderError):
+                raise
+            raise ProviderError(str(e)) from e
+
+        latency = time.monotonic() - started
+        if self.slow_call_threshold is not None and latency > self.slow_call_threshold:
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+        with self._lock:
+            self._stats[route.key].record(latency, ok=True)
+        return response
+
+    def _pool(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self._max_workers, thread_name_prefix="llm-hedge")
+            return self._executor
+
+    def _count(self, counter: str) -> None:
+        with self._lock:
+            self._counters[counter] += 1
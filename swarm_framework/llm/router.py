@@ -0,0 +1,282 @@
+import random
+import threading
+import time
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from typing import Any, Deque, Dict, List, Mapping, Optional, Sequence, Tuple
+from .interfaces import ILLMProvider, ProviderError
+from .prompt import Prompt
+from ..utils.logger import log
+
+# Model setting values starting with this prefix name a routing policy
+AUTO_PREFIX = "auto:"
+
+@dataclass(frozen=True)
+class ModelProfile:
+    """Model served by a provider, with its tier, quality rank and price per 1K tokens"""
+    name: str
+    provider: str
+    tier: str = "quality"
+    quality: int = 0
+    prompt_cost: float = 0.0
+    completion_cost: float = 0.0
+    cached_prompt_cost: Optional[float] = None
+
+    def cost(self, prompt_tokens: int, completion_tokens: int, cached_tokens: int = 0) -> float:
+        cached_price = self.prompt_cost if self.cached_prompt_cost is None else self.cached_prompt_cost
+        return (
+            (prompt_tokens - cached_tokens) * self.prompt_cost
+            + cached_tokens * cached_price
+            + completion_tokens * self.completion_cost
+        ) / 1000
+
+@dataclass(frozen=True)
+class RoutingPolicy:
+    """Constraints and preference used to pick a model for a task
+
+    prefer is "latency" (lowest p95), "cost" (cheapest expected call)
+    or "quality" (highest quality rank).
+    """
+    name: str
+    tiers: Tuple[str, ...] = ("fast", "quality")
+    prefer: str = "latency"
+    max_p95: Optional[float] = None
+    max_error_rate: float = 0.2
+    max_cost: Optional[float] = None
+
+DEFAULT_POLICIES = {
+    # Interactive requests: any tier, fastest model that is healthy
+    "fast": RoutingPolicy("fast", tiers=("fast", "quality"), prefer="latency", max_p95=5.0),
+    # Batch generation: quality tier only, latency doesn't matter
+    "quality": RoutingPolicy("quality", tiers=("quality",), prefer="quality", max_error_rate=0.3),
+    "cheap": RoutingPolicy("cheap", tiers=("fast", "quality"), prefer="cost"),
+}
+
+class ModelStats:
+    """Rolling latency and error statistics of a model over the last calls"""
+
+    def __init__(self, window: int = 200):
+        self._latencies: Deque[float] = deque(maxlen=window)
+        self._outcomes: Deque[bool] = deque(maxlen=window)
+        self._completion_tokens: Deque[int] = deque(maxlen=window)
+        self.calls = 0
+        self.cost = 0.0
+
+    def record(self, latency: float, ok: bool, completion_tokens: int = 0, cost: float = 0.0) -> None:
+        self.calls += 1
+        self._outcomes.append(ok)
+        if ok:
+            self._latencies.append(latency)
+            self._completion_tokens.append(completion_tokens)
+            self.cost += cost
+
+    @property
+    def samples(self) -> int:
+        return len(self._outcomes)
+
+    @property
+    def error_rate(self) -> float:
+        return self._outcomes.count(False) / len(self._outcomes) if self._outcomes else 0.0
+
+    @property
+    def mean_completion_tokens(self) -> float:
+        if not self._completion_tokens:
+            return 0.0
+        return sum(self._completion_tokens) / len(self._completion_tokens)
+
+    def percentile(self, p: float) -> Optional[float]:
+        if not self._latencies:
+            return None
+        latencies = sorted(self._latencies)
+        return latencies[min(len(latencies) - 1, int(p * len(latencies)))]
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "samples": self.samples,
+            "p50": self.percentile(0.5),
+            "p95": self.percentile(0.95),
+            "p99": self.percentile(0.99),
+            "error_rate": self.error_rate,
+            "cost": self.cost
+        }
+
+@dataclass
+class RoutingDecision:
+    """Chosen model and why, with the candidates that were considered"""
+    policy: str
+    model: str
+    reason: str
+    candidates: List[Dict[str, Any]] = field(default_factory=list)
+    timestamp: float = field(default_factory=time.time)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+class ModelRouter(ILLMProvider):
+    """Provider that picks a model per call from live latency, errors and cost
+
+    A call with model "auto:<policy>" (or a bare policy name) is routed:
+    models outside the policy tiers or constraints are filtered out, and
+    the rest are ranked by the policy preference. Models with fewer than
+    min_samples calls are probed first so their statistics get filled.
+    A call naming a concrete model goes to that model and still feeds
+    its statistics. Recent decisions are kept for inspection.
+    """
+
+    def __init__(self, models: Sequence[ModelProfile], providers: Mapping[str, ILLMProvider],
+                 policies: Optional[Mapping[str, RoutingPolicy]] = None,
+                 window: int = 200, min_samples: int = 5, explore_rate: float = 0.02,
+                 history: int = 1000, seed: Optional[int] = None):
+        self._models = {model.name: model for model in models}
+        self._providers = dict(providers)
+        missing = {model.provider for model in models} - set(self._providers)
+        if missing:
+            raise ValueError(f"No provider for models: {', '.join(sorted(missing))}")
+        self.policies = dict(policies or DEFAULT_POLICIES)
+        self.min_samples = min_samples
+        self.explore_rate = explore_rate
+        self._stats = {name: ModelStats(window) for name in self._models}
+        self._decisions: Deque[RoutingDecision] = deque(maxlen=history)
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    @property
+    def name(self) -> str:
+        return "router"
+
+    @property
+    def models(self) -> Dict[str, ModelProfile]:
+        return dict(self._models)
+
+    def stats(self, model: str) -> ModelStats:
+        return self._stats[model]
+
+    def choose(self, policy_name: str, prompt_tokens: int = 0) -> RoutingDecision:
+        """Pick a model for a call under the named policy"""
+        policy = self.policies.get(policy_name)
+        if policy is None:
+            raise ValueError(f"Unknown routing policy: {policy_name}")
+
+        with self._lock:
+            candidates = []
+            for model in self._models.values():
+                stats = self._stats[model.name]
+                expected_cost = model.cost(prompt_tokens, int(stats.mean_completion_tokens))
+                candidates.append({
+                    "model": model.name,
+                    "tier": model.tier,
+                    "quality": model.quality,
+                    "p95": stats.percentile(0.95),
+                    "error_rate": stats.error_rate,
+                    "samples": stats.samples,
+                    "expected_cost": expected_cost,
+                    "rejected": self._rejection(policy, model, stats, expected_cost)
+                })
+
+            eligible = [c for c in candidates if c["rejected"] is None]
+            cold = [c for c in eligible if c["samples"] < self.min_samples]
+            if cold:
+                chosen, reason = min(cold, key=lambda c: c["samples"]), "probe: too few samples"
+            elif eligible and self._random.random() < self.explore_rate:
+                # Rejected models are explored too, otherwise their stale stats never recover
+                allowed = [c for c in candidates if c["tier"] in policy.tiers]
+                chosen, reason = self._random.choice(allowed), "explore"
+            elif eligible:
+                chosen = min(eligible, key=lambda c: self._rank(policy, c))
+                reason = f"best {policy.prefer}"
+            else:
+                # Nothing satisfies the policy: degrade to the healthiest model of allowed tiers
+                allowed = [c for c in candidates if c["tier"] in policy.tiers] or candidates
+                chosen = min(allowed, key=lambda c: (c["error_rate"], c["p95"] or 0.0))
+                reason = "fallback: no model within policy"
+
+            decision = RoutingDecision(policy.name, chosen["model"], reason, candidates)
+            self._decisions.append(decision)
+        return decision
+
+    def complete(self, prompt: Prompt, model: str, **params: Any) -> Dict[str, Any]:
+        policy = model[len(AUTO_PREFIX):] if model.startswith(AUTO_PREFIX) else model
+        if policy in self.policies and model not in self._models:
+            decision = self.choose(policy, prompt_tokens=len(prompt.text.split()))
+        elif model in self._models:
+            decision = RoutingDecision("pinned", model, "requested explicitly")
+            with self._lock:
+                self._decisions.append(decision)
+        else:
+            raise ValueError(f"Unknown model or routing policy: {model}")
+
+        response = self.call(decision.model, prompt, **params)
+        response["routing"] = {"policy": decision.policy, "model": decision.model, "reason": decision.reason}
+        return response
+
+    def call(self, model: str, prompt: Prompt, **params: Any) -> Dict[str, Any]:
+        """Call a concrete model and record its latency, outcome and cost"""
+        profile = self._models[model]
+        provider = self._providers[profile.provider]
+        started = time.monotonic()
+        try:
+            response = provider.complete(prompt, model, **params)
+        except ProviderError:
+            self._record(model, time.monotonic() - started, ok=False)
+            raise
+
+        usage = response.get("usage", {})
+        cost = profile.cost(
+            usage.get("prompt_tokens", 0),
+            usage.get("completion_tokens", 0),
+            usage.get("cached_tokens", 0)
+        )
+        self._record(model, time.monotonic() - started, ok=True,
+                     completion_tokens=usage.get("completion_tokens", 0), cost=cost)
+        response["cost"] = cost
+        return response
+
+    def decisions(self, limit: int = 100) -> List[Dict[str, Any]]:
+        """Most recent routing decisions, newest first"""
+        with self._lock:
+            recent = list(self._decisions)[-limit:]
+        return [decision.to_dict() for decision in reversed(recent)]
+
+    def report(self) -> Dict[str, Any]:
+        """Statistics of every model and how often each was chosen"""
+        with self._lock:
+            chosen: Dict[str, int] = {}
+            for decision in self._decisions:
+                chosen[decision.model] = chosen.get(decision.model, 0) + 1
+            return {
+                name: {**stats.report(), "tier": self._models[name].tier, "chosen": chosen.get(name, 0)}
+                for name, stats in self._stats.items()
+            }
+
+    def _record(self, model: str, latency: float, ok: bool, completion_tokens: int = 0,
+                cost: float = 0.0) -> None:
+        with self._lock:
+            self._stats[model].record(latency, ok, completion_tokens, cost)
+        if not ok:
+            log("Model call failed", level="warning", event="model_failed", model=model,
+                latency=round(latency, 3))
+
+    @staticmethod
+    def _rejection(policy: RoutingPolicy, model: ModelProfile, stats: ModelStats,
+                   expected_cost: float) -> Optional[str]:
+        """Why a model is outside the policy, None if it is eligible"""
+        if model.tier not in policy.tiers:
+            return f"tier {model.tier}"
+        if stats.samples and stats.error_rate > policy.max_error_rate:
+            return f"error rate {stats.error_rate:.2f}"
+        p95 = stats.percentile(0.95)
+        if policy.max_p95 is not None and p95 is not None and p95 > policy.max_p95:
+            return f"p95 {p95:.3f}s"
+        if policy.max_cost is not None and expected_cost > policy.max_cost:
+            return f"cost {expected_cost:.4f}"
+        return None
+
+    @staticmethod
+    def _rank(policy: RoutingPolicy, candidate: Dict[str, Any]) -> tuple:
+        p95 = candidate["p95"] if candidate["p95"] is not None else float("inf")
+        if policy.prefer == "cost":
+            return (candidate["expected_cost"], p95)
+        if policy.prefer == "quality":
+            return (-candidate["quality"], candidate["expected_cost"], p95)
+        return (p95, candidate["expected_cost"])
@@ -0,0 +1,76 @@
+import random
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Sequence
+from .interfaces import ILLMProvider, ProviderError
+from .prompt import Prompt
+
+def count_tokens(text: str) -> int:
+    """Rough token estimate used by stub provider"""
+    return len(text.split())
+
+class StubProvider(ILLMProvider):
+    """Local provider for tests and benchmarks
+
+    Emulates provider-side prompt caching: a prompt whose static prefix
+    was seen before reports the prefix tokens as cached. Latency and error
+    rate are configurable to model slow or flaky backends.
+    """
+
+    def __init__(self, name: str = "stub", models: Sequence[str] = ("stub",),
+                 latency: float = 0.0, jitter: float = 0.0, error_rate: float = 0.0,
+                 responder: Optional[Callable[[Prompt, str], str]] = None,
+                 cache_size: int = 1024, seed: Optional[int] = None):
+        self._name = name
+        self.models = tuple(models)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.responder = responder or (lambda prompt, model: f"[{model}] {prompt.request}")
+        self.cache_size = cache_size
+        self.calls = 0
+        self._prefix_cache: "OrderedDict[str, None]" = OrderedDict()
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    def complete(self, prompt: Prompt, model: str, **params: Any) -> Dict[str, Any]:
+        with self._lock:
+            self.calls += 1
+            delay = max(0.0, self.latency + self._random.uniform(-self.jitter, self.jitter))
+            failed = self._random.random() < self.error_rate
+            cached = self._lookup_prefix(prompt)
+
+        if delay:
+            time.sleep(delay)
+        if failed:
+            raise ProviderError(f"{self.name}: simulated failure for model {model}")
+
+        content = self.responder(prompt, model)
+        prefix_tokens = count_tokens(prompt.prefix)
+        return {
+            "content": content,
+            "model": model,
+            "provider": self.name,
+            "usage": {
+                "prompt_tokens": prefix_tokens + count_tokens(prompt.request),
+                "cached_tokens": prefix_tokens if cached else 0,
+                "completion_tokens": count_tokens(content)
+            }
+        }
+
+    def _lookup_prefix(self, prompt: Prompt) -> bool:
+        fingerprint = prompt.prefix_fingerprint
+        if not fingerprint:
+            return False
+        if fingerprint in self._prefix_cache:
+            self._prefix_cache.move_to_end(fingerprint)
+            return True
+        self._prefix_cache[fingerprint] = None
+        if len(self._prefix_cache) > self.cache_size:
+            self._prefix_cache.popitem(last=False)
+        return False
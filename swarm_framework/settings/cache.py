@@ -0,0 +1,75 @@
+import json
+import threading
+import time
+from typing import Any, Dict, Iterator, Tuple
+from .database import SettingsDatabase
+
+class SettingsCache:
+    """Кэш значений настроек в памяти процесса
+
+    Чтение - это поиск в словаре. Не чаще раза в refresh_interval секунд
+    кэш сверяет свою версию с версией в базе (один запрос к одной строке)
+    и при расхождении перечитывает только изменившиеся ключи, поэтому
+    записи из других процессов становятся видны с этой задержкой.
+    Возвращаемые значения общие для всех читателей и не должны изменяться.
+    """
+
+    def __init__(self, db: SettingsDatabase, refresh_interval: float = 1.0):
+        self._db = db
+        self.refresh_interval = refresh_interval
+        self._values: Dict[str, Any] = {}
+        # -1: кэш ещё не загружен, версия 0 есть у строк старых баз
+        self._version = -1
+        self._next_check = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def get(self, key: str, default: Any = None) -> Any:
+        if time.monotonic() >= self._next_check:
+            self.refresh()
+        return self._values.get(key, default)
+
+    def items(self) -> Iterator[Tuple[str, Any]]:
+        if time.monotonic() >= self._next_check:
+            self.refresh()
+        return iter(list(self._values.items()))
+
+    def refresh(self) -> None:
+        """Сверить версию с базой и дочитать изменения"""
+        with self._lock:
+            version, changes = self._db.get_changes(self._version)
+            for key, raw in changes.items():
+                self._values[key] = self.decode(raw)
+            self._version = version
+            self._next_check = time.monotonic() + self.refresh_interval
+
+    def put(self, key: str, value: Any, version: int) -> None:
+        """Учесть запись, сделанную этим процессом"""
+        self.put_many({key: value}, version)
+
+    def put_many(self, values: Dict[str, Any], version: int) -> None:
+        """Учесть пакетную запись, сделанную этим процессом"""
+        with self._lock:
+            self._values.update(values)
+            # Если между версиями были чужие записи, их дочитает refresh
+            if version == self._version + 1:
+                self._version = version
+
+    def invalidate(self) -> None:
+        """Сверить версию при следующем чтении"""
+        self._next_check = 0.0
+
+    @staticmethod
+    def encode(value: Any) -> str:
+        return json.dumps(value, ensure_ascii=False)
+
+    @staticmethod
+    def decode(raw: str) -> Any:
+        try:
+            return json.loads(raw)
+        except (TypeError, ValueError):
+            # Значения, записанные до перехода на JSON, хранятся как есть
+            return raw
@@ -1,45 +1,388 @@
+import os
 import sqlite3
-from typing import Any, Dict, Optional
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+JOURNAL_MODES = ("DELETE", "TRUNCATE", "PERSIST", "MEMORY", "WAL", "OFF")
+SYNCHRONOUS_LEVELS = ("OFF", "NORMAL", "FULL", "EXTRA")
+
+# SQL держится в константах: sqlite3 кэширует подготовленные выражения
+# по тексту запроса, и соединения пула переиспользуют их между вызовами
+SELECT_SETTING = 'SELECT value FROM settings WHERE key = ?'
+SELECT_ALL_SETTINGS = 'SELECT key, value FROM settings'
+SELECT_CHANGED_SETTINGS = 'SELECT key, value FROM settings WHERE version > ?'
+UPSERT_SETTING = '''
+    INSERT INTO settings (key, value, version) VALUES (?, ?, ?)
+    ON CONFLICT(key) DO UPDATE SET value = excluded.value, version = excluded.version
+'''
+INSERT_SETTING_IF_ABSENT = '''
+    INSERT INTO settings (key, value, version) VALUES (?, ?, ?)
+    ON CONFLICT(key) DO NOTHING
+'''
+SELECT_VERSION = 'SELECT version FROM settings_version WHERE id = 1'
+BUMP_VERSION = 'UPDATE settings_version SET version = version + 1 WHERE id = 1'
+LOG_CHANGES = '''
+    INSERT INTO settings_changelog (version, key, value)
+    SELECT version, key, value FROM settings WHERE version = ?
+'''
+PRUNE_CHANGELOG = 'DELETE FROM settings_changelog WHERE seq <= ?'
+SELECT_CHANGELOG = '''
+    SELECT seq, version, key, value FROM settings_changelog
+    WHERE seq > ? ORDER BY seq LIMIT ?
+'''
+SELECT_CHANGELOG_BOUNDS = 'SELECT MIN(seq), MAX(seq) FROM settings_changelog'
+SELECT_PROFILES = 'SELECT id, data FROM profiles'
+INSERT_PROFILE = 'INSERT INTO profiles (id, data) VALUES (?, ?)'
+UPDATE_PROFILE = 'UPDATE profiles SET data = ? WHERE id = ?'
+SELECT_AGENT_PROFILES = 'SELECT agent, profile_id, overrides FROM agent_profiles'
+UPSERT_AGENT_PROFILE = '''
+    INSERT INTO agent_profiles (agent, profile_id, overrides) VALUES (?, ?, ?)
+    ON CONFLICT(agent) DO UPDATE SET
+        profile_id = excluded.profile_id, overrides = excluded.overrides
+'''
+SELECT_TEMPLATES = 'SELECT id, data FROM templates'
+INSERT_TEMPLATE = 'INSERT INTO templates (id, data) VALUES (?, ?)'
+UPDATE_TEMPLATE = 'UPDATE templates SET data = ? WHERE id = ?'
+SELECT_METADATA = 'SELECT id, value FROM metadata WHERE key = ?'
+INSERT_METADATA = 'INSERT INTO metadata (key, value) VALUES (?, ?)'
+SELECT_STAMP = 'SELECT value FROM stamps WHERE name = ?'
+UPSERT_STAMP = '''
+    INSERT INTO stamps (name, value) VALUES (?, ?)
+    ON CONFLICT(name) DO UPDATE SET value = excluded.value
+'''
 
 class SettingsDatabase:
-    def __init__(self, db_path: str = "settings.db"):
-        self.connection = sqlite3.connect(db_path)
-        self._create_tables()
+    """Хранилище настроек в SQLite с пулом соединений
+
+    Соединения открываются лениво и возвращаются в пул после каждого
+    запроса, поэтому база безопасна для многопоточного сервера. В режиме
+    WAL чтения не ждут завершения записи.
+    """
+
+    def __init__(self, db_path: str = "settings.db", pool_size: int = 8,
+                 journal_mode: str = "WAL", synchronous: str = "NORMAL",
+                 busy_timeout: float = 5.0, cached_statements: int = 128,
+                 changelog_retention: int = 10000):
+        journal_mode = journal_mode.upper()
+        if journal_mode not in JOURNAL_MODES:
+            raise ValueError(f"Unknown journal mode: {journal_mode}")
+        synchronous = synchronous.upper()
+        if synchronous not in SYNCHRONOUS_LEVELS:
+            raise ValueError(f"Unknown synchronous level: {synchronous}")
+        if pool_size < 1:
+            raise ValueError("Pool size must be positive")
+
+        self.db_path = db_path
+        self.journal_mode = journal_mode
+        self.synchronous = synchronous
+        self.busy_timeout = busy_timeout
+        self.cached_statements = cached_statements
+        self.changelog_retention = changelog_retention
+        # База в памяти существует только внутри одного соединения
+        self.pool_size = 1 if db_path == ":memory:" else pool_size
+
+        # Свободные соединения (LIFO) и все открытые, включая выданные
+        self._idle: List[sqlite3.Connection] = []
+        self._connections: Set[sqlite3.Connection] = set()
+        self._lock = threading.Lock()
+        self._available = threading.Condition(self._lock)
+        self._schema_ready = False
+
+    @contextmanager
+    def connect(self) -> Iterator[sqlite3.Connection]:
+        """Взять соединение из пула на время блока"""
+        connection = self._acquire()
+        try:
+            yield connection
+        finally:
+            self._release(connection)
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """Соединение с одной транзакцией на весь блок"""
+        with self.connect() as connection:
+            with connection:
+                yield connection
+
+    def close(self) -> None:
+        """Закрыть все соединения пула
+
+        Выданные соединения закрываются при возврате в пул. Пул остаётся
+        рабочим: следующие запросы откроют новые соединения.
+        """
+        with self._available:
+            for connection in self._idle:
+                connection.close()
+            self._idle = []
+            self._connections = set()
+            # Ожидающие потоки откроют новые соединения вместо закрытых
+            self._available.notify_all()
+
+    def _acquire(self) -> sqlite3.Connection:
+        with self._available:
+            while True:
+                if self._idle:
+                    return self._idle.pop()
+                if len(self._connections) < self.pool_size:
+                    connection = self._open()
+                    self._connections.add(connection)
+                    return connection
+                self._available.wait()
+
+    def _release(self, connection: sqlite3.Connection) -> None:
+        with self._available:
+            if connection in self._connections:
+                self._idle.append(connection)
+            else:
+                # Соединение выдано до close()
+                connection.close()
+            self._available.notify()
+
+    def _open(self) -> sqlite3.Connection:
+        if not self._schema_ready:
+            directory = os.path.dirname(self.db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
 
-    def _create_tables(self):
-        with self.connection:
-            self.connection.execute('''
+        connection = sqlite3.connect(
+            self.db_path,
+            timeout=self.busy_timeout,
+            check_same_thread=False,
+            cached_statements=self.cached_statements
+        )
+        if self.db_path != ":memory:":
+            connection.execute(f"PRAGMA journal_mode={self.journal_mode}")
+        connection.execute(f"PRAGMA synchronous={self.synchronous}")
+
+        if not self._schema_ready:
+            self._create_tables(connection)
+            self._schema_ready = True
+        return connection
+
+    def _create_tables(self, connection: sqlite3.Connection):
+        with connection:
+            connection.execute('''
                 CREATE TABLE IF NOT EXISTS settings (
                     key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    version INTEGER NOT NULL DEFAULT 0
+                )
+            ''')
+            columns = {row[1] for row in connection.execute('PRAGMA table_info(settings)')}
+            if "version" not in columns:
+                connection.execute(
+                    'ALTER TABLE settings ADD COLUMN version INTEGER NOT NULL DEFAULT 0'
+                )
+            connection.execute(
+                'CREATE INDEX IF NOT EXISTS settings_version_idx ON settings (version)'
+            )
+            # Монотонный номер версии всех настроек, общий для всех процессов
+            connection.execute('''
+                CREATE TABLE IF NOT EXISTS settings_version (
+                    id INTEGER PRIMARY KEY CHECK (id = 1),
+                    version INTEGER NOT NULL
+                )
+            ''')
+            connection.execute(
+                'INSERT OR IGNORE INTO settings_version (id, version) VALUES (1, 0)'
+            )
+            # Журнал изменений с порядковыми номерами для подписчиков
+            connection.execute('''
+                CREATE TABLE IF NOT EXISTS settings_changelog (
+                    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                    version INTEGER NOT NULL,
+                    key TEXT NOT NULL,
                     value TEXT NOT NULL
                 )
             ''')
-            self.connection.execute('''
+            connection.execute('''
+                CREATE TABLE IF NOT EXISTS profiles (
+                    id TEXT PRIMARY KEY,
+                    data TEXT NOT NULL
+                )
+            ''')
+            connection.execute('''
+                CREATE TABLE IF NOT EXISTS agent_profiles (
+                    agent TEXT PRIMARY KEY,
+                    profile_id TEXT,
+                    overrides TEXT NOT NULL
+                )
+            ''')
+            connection.execute('''
+                CREATE TABLE IF NOT EXISTS templates (
+                    id TEXT PRIMARY KEY,
+                    data TEXT NOT NULL
+                )
+            ''')
+            connection.execute('''
                 CREATE TABLE IF NOT EXISTS metadata (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
                     key TEXT NOT NULL,
                     value TEXT NOT NULL
                 )
             ''')
+            connection.execute('''
+                CREATE TABLE IF NOT EXISTS stamps (
+                    name TEXT PRIMARY KEY,
+                    value TEXT NOT NULL
+                )
+            ''')
 
     def get_setting(self, key: str) -> Optional[str]:
-        cursor = self.connection.execute('SELECT value FROM settings WHERE key = ?', (key,))
-        row = cursor.fetchone()
+        with self.connect() as connection:
+            row = connection.execute(SELECT_SETTING, (key,)).fetchone()
         return row[0] if row else None
 
-    def set_setting(self, key: str, value: str) -> None:
-        with self.connection:
-            self.connection.execute('''
-                INSERT INTO settings (key, value) VALUES (?, ?)
-                ON CONFLICT(key) DO UPDATE SET value = excluded.value
-            ''', (key, value))
+    def get_all_settings(self) -> Dict[str, str]:
+        with self.connect() as connection:
+            rows = connection.execute(SELECT_ALL_SETTINGS).fetchall()
+        return {row[0]: row[1] for row in rows}
+
+    def set_setting(self, key: str, value: str) -> int:
+        """Записать значение и вернуть новую версию настроек"""
+        return self.set_settings({key: value})
+
+    def set_settings(self, values: Dict[str, str]) -> int:
+        """Записать несколько значений одной транзакцией под одной версией"""
+        with self.transaction() as connection:
+            version = self._bump_version(connection)
+            connection.executemany(
+                UPSERT_SETTING,
+                [(key, value, version) for key, value in values.items()]
+            )
+            self._log_changes(connection, version)
+        return version
+
+    def get_version(self) -> int:
+        """Текущая версия настроек: один запрос к одной строке"""
+        with self.connect() as connection:
+            return connection.execute(SELECT_VERSION).fetchone()[0]
+
+    def get_changes(self, since: int) -> Tuple[int, Dict[str, str]]:
+        """Версия и значения, изменённые после версии since"""
+        with self.connect() as connection:
+            # Чтение в одной транзакции, чтобы версия соответствовала строкам
+            connection.execute('BEGIN')
+            try:
+                version = connection.execute(SELECT_VERSION).fetchone()[0]
+                if version == since:
+                    return version, {}
+                rows = connection.execute(SELECT_CHANGED_SETTINGS, (since,)).fetchall()
+            finally:
+                connection.rollback()
+        return version, {row[0]: row[1] for row in rows}
+
+    def get_changelog(self, since: int, limit: int = 1000) -> List[Tuple[int, int, str, str]]:
+        """Записи журнала (seq, version, key, value) с номером больше since"""
+        with self.connect() as connection:
+            return connection.execute(SELECT_CHANGELOG, (since, limit)).fetchall()
+
+    def get_changelog_bounds(self) -> Tuple[int, int]:
+        """Первый и последний номер в журнале; (0, 0) для пустого журнала"""
+        with self.connect() as connection:
+            first, last = connection.execute(SELECT_CHANGELOG_BOUNDS).fetchone()
+        return first or 0, last or 0
+
+    def get_profiles(self) -> Dict[str, str]:
+        with self.connect() as connection:
+            rows = connection.execute(SELECT_PROFILES).fetchall()
+        return {row[0]: row[1] for row in rows}
+
+    def insert_profile(self, profile_id: str, data: str) -> None:
+        """Добавить профиль; KeyError, если профиль уже существует"""
+        try:
+            with self.transaction() as connection:
+                connection.execute(INSERT_PROFILE, (profile_id, data))
+        except sqlite3.IntegrityError:
+            raise KeyError(f"Profile already exists: {profile_id}")
+
+    def update_profile(self, profile_id: str, data: str) -> None:
+        """Обновить профиль; KeyError, если профиля нет"""
+        with self.transaction() as connection:
+            cursor = connection.execute(UPDATE_PROFILE, (data, profile_id))
+        if cursor.rowcount == 0:
+            raise KeyError(f"Profile not found: {profile_id}")
+
+    def get_agent_profiles(self) -> Dict[str, Tuple[Optional[str], str]]:
+        """Привязки агентов: имя -> (id профиля, переопределения в JSON)"""
+        with self.connect() as connection:
+            rows = connection.execute(SELECT_AGENT_PROFILES).fetchall()
+        return {row[0]: (row[1], row[2]) for row in rows}
+
+    def set_agent_profile(self, agent: str, profile_id: Optional[str], overrides: str) -> None:
+        with self.transaction() as connection:
+            connection.execute(UPSERT_AGENT_PROFILE, (agent, profile_id, overrides))
+
+    def get_templates(self) -> Dict[str, str]:
+        with self.connect() as connection:
+            rows = connection.execute(SELECT_TEMPLATES).fetchall()
+        return {row[0]: row[1] for row in rows}
+
+    def insert_template(self, template_id: str, data: str) -> None:
+        """Добавить шаблон; KeyError, если шаблон уже существует"""
+        try:
+            with self.transaction() as connection:
+                connection.execute(INSERT_TEMPLATE, (template_id, data))
+        except sqlite3.IntegrityError:
+            raise KeyError(f"Template already exists: {template_id}")
+
+    def update_template(self, template_id: str, data: str) -> None:
+        """Обновить шаблон; KeyError, если шаблона нет"""
+        with self.transaction() as connection:
+            cursor = connection.execute(UPDATE_TEMPLATE, (data, template_id))
+        if cursor.rowcount == 0:
+            raise KeyError(f"Template not found: {template_id}")
 
     def get_metadata(self, key: str) -> Dict[int, str]:
-        cursor = self.connection.execute('SELECT id, value FROM metadata WHERE key = ?', (key,))
-        return {row[0]: row[1] for row in cursor.fetchall()}
+        with self.connect() as connection:
+            rows = connection.execute(SELECT_METADATA, (key,)).fetchall()
+        return {row[0]: row[1] for row in rows}
 
     def add_metadata(self, key: str, value: str) -> None:
-        with self.connection:
-            self.connection.execute('''
-                INSERT INTO metadata (key, value) VALUES (?, ?)
-            ''', (key, value))
+        with self.transaction() as connection:
+            connection.execute(INSERT_METADATA, (key, value))
+
+    def get_stamp(self, name: str) -> Optional[str]:
+        with self.connect() as connection:
+            row = connection.execute(SELECT_STAMP, (name,)).fetchone()
+        return row[0] if row else None
+
+    def seed_settings(self, values: Dict[str, str], stamp: Optional[str] = None,
+                      version: Optional[str] = None) -> bool:
+        """Записать значения по умолчанию, не перезаписывая существующие
+
+        Если передана метка версии, запись выполняется один раз на базу:
+        при совпадающей метке возвращается False без записи.
+        """
+        with self.transaction() as connection:
+            if stamp is not None:
+                row = connection.execute(SELECT_STAMP, (stamp,)).fetchone()
+                if row and row[0] == version:
+                    return False
+            version = self._bump_version(connection)
+            connection.executemany(
+                INSERT_SETTING_IF_ABSENT,
+                [(key, value, version) for key, value in values.items()]
+            )
+            self._log_changes(connection, version)
+            if stamp is not None:
+                connection.execute(UPSERT_STAMP, (stamp, version))
+            return True
+
+    def set_stamp(self, name: str, value: str) -> None:
+        with self.transaction() as connection:
+            connection.execute(UPSERT_STAMP, (name, value))
+
+    @staticmethod
+    def _bump_version(connection: sqlite3.Connection) -> int:
+        """Увеличить версию настроек внутри текущей транзакции"""
+        connection.execute(BUMP_VERSION)
+        return connection.execute(SELECT_VERSION).fetchone()[0]
+
+    def _log_changes(self, connection: sqlite3.Connection, version: int) -> None:
+        """Записать в журнал строки, получившие версию, и обрезать старые записи"""
+        cursor = connection.execute(LOG_CHANGES, (version,))
+        if cursor.rowcount > 0:
+            last_seq = connection.execute('SELECT last_insert_rowid()').fetchone()[0]
+            connection.execute(PRUNE_CHANGELOG, (last_seq - self.changelog_retention,))
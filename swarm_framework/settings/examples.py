@@ -12,6 +12,7 @@ from .providers import (
     EnhancedInstructionProvider,
     EnhancedToolProvider
 )
+from .tools import ToolCall
 
 def example_settings_usage():
     """Пример использования системы настроек"""
@@ -88,6 +89,9 @@ def example_settings_usage():
             "name": "Data Analyzer",
             "description": "Инструмент для анализа данных",
             "version": "1.0.0",
+            "timeout": 5.0,
+            "max_concurrency": 4,
+            "pure": ["analyze"],
             "functions": {
                 "analyze": lambda data: {"mean": sum(data)/len(data)},
                 "visualize": lambda data: "Chart visualization"
@@ -95,10 +99,16 @@ def example_settings_usage():
         }
     )
     
-    analyzer_tool = tool_provider.get_tool("data_analyzer")
-    if analyzer_tool:
-        result = analyzer_tool["functions"]["analyze"]([1, 2, 3, 4, 5])
-        print("\nРезультат анализа:", result)
+    result = tool_provider.call_tool("data_analyzer", "analyze", (1, 2, 3, 4, 5))
+    print("\nРезультат анализа:", result)
+    
+    # Независимые вызовы одного шага выполняются параллельно
+    results = tool_provider.call_tools([
+        ToolCall("data_analyzer", "analyze", ((1, 2, 3, 4, 5),)),
+        ToolCall("data_analyzer", "visualize", ([1, 2, 3],))
+    ])
+    print("Результаты вызовов:", [r.value if r.ok else str(r.error) for r in results])
+    print("Статистика инструментов:", tool_provider.get_tool_stats())
 
 def main():
     """Запуск примеров использования"""
@@ -1,57 +1,197 @@
-from typing import Any, Dict, Optional
-from .models import Setting, SettingsProfile, InstructionTemplate
+from dataclasses import replace
+from typing import Any, Dict, List, Mapping, Optional
+from .models import Setting, SettingType, SettingsProfile, InstructionTemplate
 from .database import SettingsDatabase
+from .cache import SettingsCache
+from .watch import SettingsWatcher
+from .profiles import ProfileResolver
+from .templates import TemplateStore
+from .validators import CompiledValidation, SettingValidator, SettingsSchema
+
+_MISSING = object()
 
 class SettingsManager:
-    def __init__(self, storage_dir: str = "settings"):
+    def __init__(self, storage_dir: str = "settings", refresh_interval: float = 1.0):
+        # База открывается лениво, при первом запросе
         self.db = SettingsDatabase(f"{storage_dir}/settings.db")
+        self._cache = SettingsCache(self.db, refresh_interval)
+        self._watcher: Optional[SettingsWatcher] = None
+        self._profiles: Optional[ProfileResolver] = None
+        self.templates = TemplateStore(self.db)
+        self._definitions: Dict[str, Setting] = {}
+        # Планы проверки по ключу; пересобираются только для изменённых описаний
+        self._plans: Dict[str, CompiledValidation] = {}
+        self._validator = SettingValidator()
+        self._schema: Optional[SettingsSchema] = None
 
     def register_setting(self, setting: Setting) -> None:
-        self.db.set_setting(setting.key, setting.default_value)
+        self.register_settings([setting])
+
+    def register_settings(self, settings: List[Setting], stamp: Optional[str] = None,
+                          version: Optional[str] = None) -> bool:
+        """Зарегистрировать описания настроек и записать их значения по умолчанию
+
+        Описания хранятся в памяти, значения по умолчанию попадают в базу
+        только если их там ещё нет. С меткой версии запись выполняется
+        один раз на базу. Возвращает True, если база была заполнена.
+        """
+        for setting in settings:
+            self._definitions[setting.key] = setting
+            self._plans.pop(setting.key, None)
+        self._schema = None
+        defaults = {setting.key: SettingsCache.encode(setting.default_value) for setting in settings}
+        seeded = self.db.seed_settings(defaults, stamp, version)
+        if seeded:
+            self._cache.invalidate()
+            self._notify_watcher()
+        return seeded
 
     def update_setting(self, key: str, value: Any) -> None:
-        self.db.set_setting(key, value)
+        version = self.db.set_setting(key, SettingsCache.encode(value))
+        self._cache.put(key, value, version)
+        self._notify_watcher()
+
+    def update_settings(self, values: Dict[str, Any]) -> Dict[str, str]:
+        """Проверить и записать несколько настроек одной транзакцией
+
+        Сначала проверяются все значения; при любой ошибке, в том числе
+        для незарегистрированной настройки, ничего не записывается.
+        Возвращает ошибки по ключам, пустой словарь - успех.
+        """
+        schema = self.schema
+        errors = schema.validate(values)
+        for key in values:
+            if key not in schema.plans:
+                errors[key] = "Неизвестная настройка"
+        if errors or not values:
+            return errors
+
+        encoded = {key: SettingsCache.encode(value) for key, value in values.items()}
+        version = self.db.set_settings(encoded)
+        self._cache.put_many(dict(values), version)
+        self._notify_watcher()
+        return {}
+
+    @property
+    def schema(self) -> SettingsSchema:
+        """Планы проверки зарегистрированных настроек"""
+        if self._schema is None:
+            for key, setting in self._definitions.items():
+                if key not in self._plans:
+                    self._plans[key] = self._validator.compile(setting)
+            self._schema = SettingsSchema(self._plans)
+        return self._schema
+
+    def validate_value(self, key: str, value: Any) -> tuple[bool, Optional[str]]:
+        """Проверить значение по готовому плану, без чтения настройки из базы"""
+        plan = self.schema.plans.get(key)
+        if plan is None:
+            return False, "Неизвестная настройка"
+        return plan(value)
+
+    def validate_profile(self, profile_id: str) -> Dict[str, str]:
+        """Проверить значения профиля; KeyError, если профиля нет"""
+        profile = self.get_profile(profile_id)
+        if profile is None:
+            raise KeyError(f"Profile not found: {profile_id}")
+        return self.schema.validate(profile.settings)
+
+    def validate_agent_configs(self, configs: Mapping[str, Mapping[str, Any]],
+                               partial: bool = False) -> Dict[str, Dict[str, str]]:
+        """Проверить конфигурации агентов за один проход
+
+        Возвращает ошибки по агентам и ключам; агенты без ошибок не входят.
+        """
+        return self.schema.validate_batch(configs, partial)
+
+    @property
+    def watcher(self) -> SettingsWatcher:
+        """Лента изменений настроек, создаётся при первом обращении"""
+        if self._watcher is None:
+            self._watcher = SettingsWatcher(self.db)
+        return self._watcher
+
+    def get_value(self, key: str, default: Any = None) -> Any:
+        """Текущее значение настройки из кэша, без обращения к базе"""
+        value = self._cache.get(key, _MISSING)
+        if value is _MISSING:
+            definition = self._definitions.get(key)
+            return definition.default_value if definition else default
+        return value
 
     def get_setting(self, key: str) -> Optional[Setting]:
-        value = self.db.get_setting(key)
-        return Setting(key=key, default_value=value) if value else None
+        value = self._cache.get(key, _MISSING)
+        if value is _MISSING:
+            return self._definitions.get(key)
+        return self._with_value(key, value)
 
     def get_settings(self) -> Dict[str, Setting]:
-        settings = self.db.get_metadata("settings")
-        return {key: Setting(key=key, default_value=value) for key, value in settings.items()}
+        settings = dict(self._definitions)
+        for key, value in self._cache.items():
+            settings[key] = self._with_value(key, value)
+        return settings
+
+    @property
+    def profiles(self) -> ProfileResolver:
+        """Слоистые профили настроек, загружаются при первом обращении"""
+        if self._profiles is None:
+            self._profiles = ProfileResolver(self.db, self._load_global_values, self.watcher)
+        return self._profiles
 
     def create_profile(self, profile: SettingsProfile) -> None:
-        # Implementation for creating a profile
-        pass
+        self.profiles.create_profile(profile)
 
     def update_profile(self, profile_id: str, settings: Dict[str, Any]) -> None:
-        # Implementation for updating a profile
-        pass
+        self.profiles.update_profile(profile_id, settings)
 
     def get_profile(self, profile_id: str) -> Optional[SettingsProfile]:
-        # Implementation for retrieving a profile
-        pass
+        return self.profiles.get_profile(profile_id)
 
     def get_profiles(self) -> Dict[str, SettingsProfile]:
-        # Implementation for retrieving all profiles
-        pass
+        return self.profiles.get_profiles()
+
+    def assign_profile(self, agent: str, profile_id: Optional[str]) -> None:
+        self.profiles.assign_profile(agent, profile_id)
+
+    def set_agent_overrides(self, agent: str, overrides: Dict[str, Any]) -> None:
+        self.profiles.set_agent_overrides(agent, overrides)
+
+    def get_agent_config(self, agent: str) -> Mapping[str, Any]:
+        """Итоговая конфигурация агента с учётом профиля и переопределений"""
+        return self.profiles.get_agent_config(agent)
 
     def create_template(self, template: InstructionTemplate) -> None:
-        # Implementation for creating a template
-        pass
+        self.templates.create(template)
 
     def update_template(self, template_id: str, content: str, variables: Dict[str, str] = None) -> None:
-        # Implementation for updating a template
-        pass
+        self.templates.update(template_id, content, variables)
 
     def get_template(self, template_id: str) -> Optional[InstructionTemplate]:
-        # Implementation for retrieving a template
-        pass
+        return self.templates.get(template_id)
 
     def get_templates(self) -> Dict[str, InstructionTemplate]:
-        # Implementation for retrieving all templates
-        pass
+        return self.templates.get_all()
 
     def render_template(self, template_id: str, variables: Dict[str, str] = None) -> str:
-        # Implementation for rendering a template
-        pass
+        return self.templates.render(template_id, variables)
+
+    def render_many(self, template_id: str, variables_list: List[Dict[str, str]]) -> List[str]:
+        """Рендеринг шаблона для пакета наборов переменных"""
+        return self.templates.render_many(template_id, variables_list)
+
+    def _with_value(self, key: str, value: Any) -> Setting:
+        """Описание настройки с текущим значением в default_value"""
+        definition = self._definitions.get(key)
+        if definition is None:
+            return Setting(key=key, type=SettingType.JSON, label=key, default_value=value)
+        return replace(definition, default_value=value)
+
+    def _load_global_values(self) -> Dict[str, Any]:
+        """Актуальные глобальные значения для слоя профилей"""
+        self._cache.refresh()
+        return {key: setting.default_value for key, setting in self.get_settings().items()}
+
+    def _notify_watcher(self) -> None:
+        """Доставить собственные записи подписчикам без ожидания опроса"""
+        if self._watcher is not None:
+            self._watcher.poll()
@@ -1,8 +1,12 @@
+import threading
 from dataclasses import dataclass, field
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 from datetime import datetime
 from enum import Enum
 
+# Сколько разных списков опций хранить в общем пуле, дальше списки не разделяются
+MAX_INTERNED_OPTION_LISTS = 10000
+
 class SettingType(Enum):
     """Расширенные типы настроек"""
     STRING = "string"
@@ -22,7 +26,7 @@ class SettingType(Enum):
     KEY_VALUE = "key_value"
     RICH_TEXT = "rich_text"
 
-@dataclass
+@dataclass(slots=True)
 class SettingValidation:
     """Правила валидации настройки"""
     required: bool = False
@@ -35,36 +39,81 @@ class SettingValidation:
     custom_validator: Optional[callable] = None
     error_message: Optional[str] = None
 
-@dataclass
+class _LazyMetadata:
+    """Словарь метаданных создаётся только при записи: у большинства объектов их нет"""
+    __slots__ = ()
+
+    def ensure_metadata(self) -> Dict[str, Any]:
+        """Метаданные для записи, словарь создаётся при первом обращении"""
+        if self.metadata is None:
+            self.metadata = {}
+        return self.metadata
+
+class _Timestamps:
+    """updated_at по умолчанию указывает на тот же объект, что и created_at"""
+    __slots__ = ()
+
+    def __post_init__(self) -> None:
+        if self.updated_at is None:
+            self.updated_at = self.created_at
+
+@dataclass(frozen=True, slots=True)
 class SettingOption:
-    """Расширенная опция настройки"""
+    """Расширенная опция настройки
+
+    Неизменяемая: одинаковые списки опций разделяются между настройками.
+    """
     value: str
     label: str
     description: Optional[str] = None
     icon: Optional[str] = None
     disabled: bool = False
     group: Optional[str] = None
-    metadata: Dict[str, Any] = field(default_factory=dict)
+    metadata: Optional[Dict[str, Any]] = None
 
-@dataclass
-class Setting:
+_option_lists: Dict[Tuple[SettingOption, ...], Tuple[SettingOption, ...]] = {}
+_option_lists_lock = threading.Lock()
+
+def intern_options(options: Iterable[SettingOption]) -> Tuple[SettingOption, ...]:
+    """Общий экземпляр списка опций: одинаковые списки SELECT-настроек хранятся один раз"""
+    options = tuple(options)
+    try:
+        hash(options)
+    except TypeError:
+        # Опции с метаданными-словарями не хешируются, такой список остаётся собственным
+        return options
+    with _option_lists_lock:
+        interned = _option_lists.get(options)
+        if interned is None:
+            if len(_option_lists) >= MAX_INTERNED_OPTION_LISTS:
+                return options
+            interned = _option_lists[options] = options
+        return interned
+
+@dataclass(slots=True)
+class Setting(_LazyMetadata, _Timestamps):
     """Расширенный класс настройки"""
     key: str
     type: SettingType
     label: str
     description: Optional[str] = None
     default_value: Any = None
-    options: Optional[List[SettingOption]] = None
+    options: Optional[Tuple[SettingOption, ...]] = None
     validation: Optional[SettingValidation] = None
     depends_on: Optional[Dict[str, Any]] = None
     affects: Optional[List[str]] = None
-    metadata: Dict[str, Any] = field(default_factory=dict)
+    metadata: Optional[Dict[str, Any]] = None
     version: str = "1.0.0"
     created_at: datetime = field(default_factory=datetime.now)
-    updated_at: datetime = field(default_factory=datetime.now)
+    updated_at: Optional[datetime] = None
+
+    def __post_init__(self) -> None:
+        _Timestamps.__post_init__(self)
+        if self.options is not None:
+            self.options = intern_options(self.options)
 
-@dataclass
-class SettingsProfile:
+@dataclass(slots=True)
+class SettingsProfile(_LazyMetadata, _Timestamps):
     """Профиль настроек"""
     id: str
     name: str
@@ -72,19 +121,19 @@ class SettingsProfile:
     settings: Dict[str, Any] = field(default_factory=dict)
     is_default: bool = False
     created_at: datetime = field(default_factory=datetime.now)
-    updated_at: datetime = field(default_factory=datetime.now)
-    metadata: Dict[str, Any] = field(default_factory=dict)
+    updated_at: Optional[datetime] = None
+    metadata: Optional[Dict[str, Any]] = None
 
-@dataclass
-class InstructionTemplate:
+@dataclass(slots=True)
+class InstructionTemplate(_LazyMetadata, _Timestamps):
     """Шаблон инструкции"""
     id: str
     name: str
-    description: Optional[str] = None
     content: str
+    description: Optional[str] = None
     variables: Dict[str, str] = field(default_factory=dict)
     tags: List[str] = field(default_factory=list)
     version: str = "1.0.0"
     created_at: datetime = field(default_factory=datetime.now)
-    updated_at: datetime = field(default_factory=datetime.now)
-    metadata: Dict[str, Any] = field(default_factory=dict)
+    updated_at: Optional[datetime] = None
+    metadata: Optional[Dict[str, Any]] = None
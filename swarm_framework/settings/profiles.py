@@ -0,0 +1,193 @@
+import json
+import threading
+from collections import defaultdict
+from dataclasses import asdict, replace
+from datetime import datetime
+from types import MappingProxyType
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Set
+from .database import SettingsDatabase
+from .models import SettingsProfile
+from .watch import SettingChange, SettingsWatcher
+
+class ProfileResolver:
+    """Слоистые настройки: глобальные значения → профиль → переопределения агента
+
+    Итоговая конфигурация каждого агента заранее собирается в плоский
+    неизменяемый словарь, так что чтение во время задачи - один поиск по
+    ключу. При изменении слоя пересобираются только затронутые агенты:
+    для профиля - его агенты, для глобального значения - агенты, у которых
+    ключ не переопределён профилем или агентом.
+
+    Изменения глобальных значений приходят через ленту изменений, в том
+    числе из других процессов. Профили и привязки агентов, изменённые
+    другими процессами, подхватываются вызовом reload().
+    """
+
+    def __init__(self, db: SettingsDatabase, load_globals: Callable[[], Dict[str, Any]],
+                 watcher: Optional[SettingsWatcher] = None):
+        self._db = db
+        self._load_globals = load_globals
+        self._watcher = watcher
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._subscribed = False
+        self._globals: Dict[str, Any] = {}
+        self._profiles: Dict[str, SettingsProfile] = {}
+        self._bindings: Dict[str, Optional[str]] = {}
+        self._overrides: Dict[str, Dict[str, Any]] = {}
+        self._compiled: Dict[str, Mapping[str, Any]] = {}
+        self._agents_by_profile: Dict[Optional[str], Set[str]] = defaultdict(set)
+
+    def reload(self) -> None:
+        """Перечитать все слои из базы и сбросить собранные конфигурации"""
+        with self._lock:
+            self._globals = dict(self._load_globals())
+            self._profiles = {
+                profile_id: self._decode_profile(data)
+                for profile_id, data in self._db.get_profiles().items()
+            }
+            self._bindings = {}
+            self._overrides = {}
+            for agent, (profile_id, overrides) in self._db.get_agent_profiles().items():
+                self._bindings[agent] = profile_id
+                self._overrides[agent] = json.loads(overrides)
+            self._compiled = {}
+            self._agents_by_profile = defaultdict(set)
+            self._loaded = True
+
+    def create_profile(self, profile: SettingsProfile) -> None:
+        with self._lock:
+            self._ensure_loaded()
+            self._db.insert_profile(profile.id, self._encode_profile(profile))
+            self._profiles[profile.id] = profile
+            if profile.is_default:
+                self._recompile_profile(None)
+
+    def update_profile(self, profile_id: str, settings: Dict[str, Any]) -> SettingsProfile:
+        """Обновить значения профиля и пересобрать его агентов"""
+        with self._lock:
+            self._ensure_loaded()
+            profile = self._profiles.get(profile_id)
+            if profile is None:
+                raise KeyError(f"Profile not found: {profile_id}")
+            profile = replace(
+                profile,
+                settings={**profile.settings, **settings},
+                updated_at=datetime.now()
+            )
+            self._db.update_profile(profile_id, self._encode_profile(profile))
+            self._profiles[profile_id] = profile
+            self._recompile_profile(profile_id)
+            if profile.is_default:
+                self._recompile_profile(None)
+            return profile
+
+    def get_profile(self, profile_id: str) -> Optional[SettingsProfile]:
+        self._ensure_loaded()
+        return self._profiles.get(profile_id)
+
+    def get_profiles(self) -> Dict[str, SettingsProfile]:
+        self._ensure_loaded()
+        return dict(self._profiles)
+
+    def assign_profile(self, agent: str, profile_id: Optional[str]) -> None:
+        """Привязать агента к профилю; None - профиль по умолчанию"""
+        with self._lock:
+            self._ensure_loaded()
+            if profile_id is not None and profile_id not in self._profiles:
+                raise KeyError(f"Profile not found: {profile_id}")
+            self._save_binding(agent, profile_id, self._overrides.get(agent, {}))
+
+    def set_agent_overrides(self, agent: str, overrides: Dict[str, Any]) -> None:
+        """Заменить переопределения агента"""
+        with self._lock:
+            self._ensure_loaded()
+            self._save_binding(agent, self._bindings.get(agent), dict(overrides))
+
+    def get_agent_config(self, agent: str) -> Mapping[str, Any]:
+        """Итоговая конфигурация агента: плоский неизменяемый словарь"""
+        config = self._compiled.get(agent)
+        if config is not None:
+            return config
+        with self._lock:
+            self._ensure_loaded()
+            return self._compiled.get(agent) or self._compile(agent)
+
+    def _ensure_loaded(self) -> None:
+        if not self._loaded:
+            self.reload()
+
+    def _default_profile_id(self) -> Optional[str]:
+        for profile in self._profiles.values():
+            if profile.is_default:
+                return profile.id
+        return None
+
+    def _ensure_subscribed(self) -> None:
+        """Подписаться на глобальные изменения перед первой сборкой"""
+        if self._subscribed or self._watcher is None:
+            return
+        self._watcher.subscribe(self._on_settings_changed)
+        # Перечитать глобальные значения: изменения до подписки лента не доставит
+        self._globals = dict(self._load_globals())
+        self._subscribed = True
+
+    def _compile(self, agent: str) -> Mapping[str, Any]:
+        self._ensure_subscribed()
+        bound = self._bindings.get(agent)
+        profile = self._profiles.get(bound if bound is not None else self._default_profile_id())
+        config = dict(self._globals)
+        if profile is not None:
+            config.update(profile.settings)
+        config.update(self._overrides.get(agent, {}))
+
+        compiled = MappingProxyType(config)
+        self._compiled[agent] = compiled
+        # None - группа агентов без явной привязки, они следуют профилю по умолчанию
+        self._agents_by_profile[bound].add(agent)
+        return compiled
+
+    def _save_binding(self, agent: str, profile_id: Optional[str], overrides: Dict[str, Any]) -> None:
+        self._db.set_agent_profile(agent, profile_id, json.dumps(overrides, ensure_ascii=False))
+        self._agents_by_profile[self._bindings.get(agent)].discard(agent)
+        self._bindings[agent] = profile_id
+        self._overrides[agent] = overrides
+        self._compile(agent)
+
+    def _recompile_profile(self, profile_id: Optional[str]) -> None:
+        """Пересобрать агентов профиля (None - агентов без явной привязки)"""
+        for agent in list(self._agents_by_profile.get(profile_id, ())):
+            self._compile(agent)
+
+    def _recompile_for_keys(self, keys: Iterable[str]) -> None:
+        """Пересобрать агентов, у которых глобальный ключ не переопределён"""
+        keys = set(keys)
+        default_profile = self._profiles.get(self._default_profile_id())
+        for agent in list(self._compiled):
+            bound = self._bindings.get(agent)
+            profile = self._profiles.get(bound) if bound is not None else default_profile
+            shadowed = set(self._overrides.get(agent, {}))
+            if profile is not None:
+                shadowed.update(profile.settings)
+            if not keys <= shadowed:
+                self._compile(agent)
+
+    def _on_settings_changed(self, changes: List[SettingChange]) -> None:
+        with self._lock:
+            for change in changes:
+                self._globals[change.key] = change.value
+            self._recompile_for_keys(change.key for change in changes)
+
+    @staticmethod
+    def _encode_profile(profile: SettingsProfile) -> str:
+        data = asdict(profile)
+        data["created_at"] = profile.created_at.isoformat()
+        data["updated_at"] = profile.updated_at.isoformat()
+        return json.dumps(data, ensure_ascii=False)
+
+    @staticmethod
+    def _decode_profile(raw: str) -> SettingsProfile:
+        data = json.loads(raw)
+        data["created_at"] = datetime.fromisoformat(data["created_at"])
+        data["updated_at"] = datetime.fromisoformat(data["updated_at"])
+        return SettingsProfile(**data)
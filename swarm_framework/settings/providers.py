@@ -1,5 +1,7 @@
 from typing import Any, Dict, List, Optional
 from datetime import datetime
+import pickle
+import threading
 import uuid
 from .interfaces import (
     ISettingsProvider, 
@@ -15,16 +17,58 @@ from .models import (
     SettingOption
 )
 from .manager import SettingsManager
+from .tools import ToolCall, ToolResult, ToolRuntime
 
-class EnhancedSettingsProvider(ISettingsProvider):
+class LazyManagerMixin:
+    """Ленивое создание менеджера настроек
+
+    Конструктор провайдера ничего не открывает и не пишет: менеджер
+    создаётся и инициализируется при первом обращении, один раз.
+    """
+    
+    def _init_lazy_manager(self, storage_dir: str) -> None:
+        self._storage_dir = storage_dir
+        self._lazy_manager: Optional[SettingsManager] = None
+        self._lazy_lock = threading.Lock()
+        
+    @property
+    def manager(self) -> SettingsManager:
+        """Инициализированный менеджер настроек"""
+        return self._manager
+        
+    @property
+    def _manager(self) -> SettingsManager:
+        if self._lazy_manager is None:
+            with self._lazy_lock:
+                if self._lazy_manager is None:
+                    manager = SettingsManager(self._storage_dir)
+                    self._initialize(manager)
+                    self._lazy_manager = manager
+        return self._lazy_manager
+        
+    def _initialize(self, manager: SettingsManager) -> None:
+        """Инициализация менеджера при первом обращении"""
+        raise NotImplementedError
+
+class EnhancedSettingsProvider(LazyManagerMixin, ISettingsProvider):
     """Расширенный провайдер настроек с поддержкой профилей"""
     
+    # Увеличивать при изменении списка настроек по умолчанию
+    DEFAULTS_VERSION = "1"
+    DEFAULTS_STAMP = "default_settings"
+    
     def __init__(self, storage_dir: str = "settings"):
-        self._manager = SettingsManager(storage_dir)
-        self._initialize_default_settings()
+        self._init_lazy_manager(storage_dir)
         
-    def _initialize_default_settings(self):
-        """Инициализация настроек по умолчанию"""
+    def _initialize(self, manager: SettingsManager) -> None:
+        self._initialize_default_settings(manager)
+        
+    def _initialize_default_settings(self, manager: SettingsManager):
+        """Инициализация настроек по умолчанию
+
+        Описания регистрируются при каждом запуске, а значения по умолчанию
+        записываются в базу один раз для каждой версии DEFAULTS_VERSION.
+        """
         default_settings = [
             Setting(
                 key="temperature",
@@ -59,7 +103,9 @@ class EnhancedSettingsProvider(ISettingsProvider):
                 options=[
                     SettingOption("gpt-4", "GPT-4", "Самая мощная модель"),
                     SettingOption("gpt-3.5-turbo", "GPT-3.5 Turbo", "Быстрая и эффективная модель"),
-                    SettingOption("claude-2", "Claude 2", "Альтернативная модель от Anthropic")
+                    SettingOption("claude-2", "Claude 2", "Альтернативная модель от Anthropic"),
+                    SettingOption("auto:fast", "Авто: быстрая", "Маршрутизатор выбирает самую быструю исправную модель"),
+                    SettingOption("auto:quality", "Авто: качество", "Маршрутизатор выбирает лучшую модель для пакетных задач")
                 ]
             ),
             Setting(
@@ -88,12 +134,14 @@ class EnhancedSettingsProvider(ISettingsProvider):
             )
         ]
         
-        for setting in default_settings:
-            try:
-                self._manager.register_setting(setting)
-            except KeyError:
-                pass
-                
+        seeded = manager.register_settings(
+            default_settings,
+            stamp=self.DEFAULTS_STAMP,
+            version=self.DEFAULTS_VERSION
+        )
+        if not seeded:
+            return
+            
         # Создание профиля по умолчанию
         try:
             default_profile = SettingsProfile(
@@ -102,7 +150,7 @@ class EnhancedSettingsProvider(ISettingsProvider):
                 description="Профиль по умолчанию",
                 is_default=True
             )
-            self._manager.create_profile(default_profile)
+            manager.create_profile(default_profile)
         except KeyError:
             pass
             
@@ -120,21 +168,27 @@ class EnhancedSettingsProvider(ISettingsProvider):
         
     def validate_setting(self, key: str, value: Any) -> bool:
         """Проверка значения настройки"""
-        setting = self.get_setting(key)
-        if not setting:
-            return False
-        is_valid, _ = self._manager._validator.validate(setting, value)
+        is_valid, _ = self._manager.validate_value(key, value)
         return is_valid
 
-class EnhancedInstructionProvider(IInstructionProvider):
+class EnhancedInstructionProvider(LazyManagerMixin, IInstructionProvider):
     """Расширенный провайдер инструкций с поддержкой шаблонов"""
     
+    # Увеличивать при изменении шаблонов по умолчанию
+    DEFAULTS_VERSION = "2"
+    DEFAULTS_STAMP = "default_templates"
+    
     def __init__(self, storage_dir: str = "settings"):
-        self._manager = SettingsManager(storage_dir)
-        self._initialize_default_templates()
+        self._init_lazy_manager(storage_dir)
+        
+    def _initialize(self, manager: SettingsManager) -> None:
+        self._initialize_default_templates(manager)
         
-    def _initialize_default_templates(self):
-        """Инициализация шаблонов по умолчанию"""
+    def _initialize_default_templates(self, manager: SettingsManager):
+        """Инициализация шаблонов по умолчанию, один раз для каждой версии"""
+        if manager.db.get_stamp(self.DEFAULTS_STAMP) == self.DEFAULTS_VERSION:
+            return
+            
         default_templates = [
             InstructionTemplate(
                 id="base_agent",
@@ -193,10 +247,12 @@ class EnhancedInstructionProvider(IInstructionProvider):
         
         for template in default_templates:
             try:
-                self._manager.create_template(template)
+                manager.create_template(template)
             except KeyError:
                 pass
                 
+        manager.db.set_stamp(self.DEFAULTS_STAMP, self.DEFAULTS_VERSION)
+                
     def get_instructions(self) -> Dict[str, str]:
         """Получение всех инструкций"""
         templates = self._manager.get_templates()
@@ -233,8 +289,14 @@ class EnhancedInstructionProvider(IInstructionProvider):
 class EnhancedToolProvider(IToolProvider):
     """Расширенный провайдер инструментов с валидацией"""
     
-    def __init__(self):
+    def __init__(self, max_workers: int = 8, default_timeout: float = 30.0,
+                 sandbox_options: Optional[Dict[str, Any]] = None):
         self._tools: Dict[str, Any] = {}
+        self._max_workers = max_workers
+        self._default_timeout = default_timeout
+        self._sandbox_options = sandbox_options
+        self._runtime: Optional[ToolRuntime] = None
+        self._runtime_lock = threading.Lock()
         self._initialize_default_tools()
         
     def _initialize_default_tools(self):
@@ -242,6 +304,20 @@ class EnhancedToolProvider(IToolProvider):
         # TODO: Добавить базовые инструменты
         pass
         
+    @property
+    def runtime(self) -> ToolRuntime:
+        """Среда исполнения инструментов, создаётся при первом вызове"""
+        if self._runtime is None:
+            with self._runtime_lock:
+                if self._runtime is None:
+                    self._runtime = ToolRuntime(
+                        self,
+                        max_workers=self._max_workers,
+                        default_timeout=self._default_timeout,
+                        sandbox_options=self._sandbox_options
+                    )
+        return self._runtime
+        
     def get_tools(self) -> Dict[str, Any]:
         """Получение всех инструментов"""
         return self._tools
@@ -256,8 +332,49 @@ class EnhancedToolProvider(IToolProvider):
             raise ValueError(f"Invalid tool {key}")
             
         self._tools[key] = tool
+        if self._runtime is not None:
+            self._runtime.forget(key)
+        
+    def call_tool(self, key: str, function: str, *args: Any, **kwargs: Any) -> Any:
+        """Вызов функции инструмента с таймаутом и учётом статистики"""
+        return self.runtime.call(key, function, *args, **kwargs)
+        
+    def call_tools(self, calls: List[ToolCall]) -> List[ToolResult]:
+        """Параллельный вызов независимых функций инструментов"""
+        return self.runtime.call_many(calls)
+        
+    def get_tool_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Статистика задержек по функциям инструментов"""
+        return self.runtime.get_stats()
         
     def validate_tool(self, key: str, tool: Any) -> bool:
         """Валидация инструмента"""
-        # TODO: Реализовать валидацию инструментов
-        return True
+        if not key or not isinstance(tool, dict):
+            return False
+        functions = tool.get("functions")
+        if not isinstance(functions, dict):
+            return False
+        if tool.get("sandbox"):
+            # В процесс песочницы функция передаётся по ссылке: "module:attr" или pickle
+            for function in functions.values():
+                if isinstance(function, str):
+                    if ":" not in function:
+                        return False
+                    continue
+                try:
+                    pickle.dumps(function)
+                except Exception:
+                    return False
+        elif not all(callable(f) for f in functions.values()):
+            return False
+        for option in ("timeout", "cpu_limit"):
+            value = tool.get(option)
+            if value is not None and (not isinstance(value, (int, float)) or value <= 0):
+                return False
+        limit = tool.get("max_concurrency")
+        if limit is not None and (not isinstance(limit, int) or limit < 1):
+            return False
+        pure = tool.get("pure", False)
+        if isinstance(pure, bool):
+            return True
+        return isinstance(pure, (list, tuple, set)) and all(name in functions for name in pure)
@@ -0,0 +1,298 @@
+import array
+import importlib
+import math
+import multiprocessing
+import threading
+import time
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+from .tools import ToolError, ToolTimeout
+from ..utils.logger import log
+
+try:
+    import resource
+except ImportError:  # Windows: лимиты CPU и памяти недоступны
+    resource = None
+
+# Функция инструмента: вызываемый объект уровня модуля или строка "module:attr"
+SandboxTarget = Union[str, Callable[..., Any]]
+
+@dataclass(frozen=True)
+class SharedArg:
+    """Аргумент, переданный через разделяемую память вместо pickle"""
+    name: str
+    nbytes: int
+    format: str
+    shape: Tuple[int, ...]
+    numpy: bool = False
+
+def _share(value: Any, threshold: int) -> Tuple[Any, Optional[shared_memory.SharedMemory]]:
+    """Скопировать большой числовой буфер в разделяемую память"""
+    if type(value).__module__ == "numpy" and hasattr(value, "dtype"):
+        if value.nbytes < threshold or value.dtype.hasobject:
+            return value, None
+        source = memoryview(value.reshape(-1) if value.flags.c_contiguous else value.copy().reshape(-1))
+        block = shared_memory.SharedMemory(create=True, size=value.nbytes)
+        block.buf[:value.nbytes] = source.cast("B")
+        return SharedArg(block.name, value.nbytes, value.dtype.str, tuple(value.shape), numpy=True), block
+    if not isinstance(value, (array.array, bytes, bytearray, memoryview)):
+        return value, None
+    view = memoryview(value)
+    if view.nbytes < threshold or not view.c_contiguous:
+        return value, None
+    block = shared_memory.SharedMemory(create=True, size=view.nbytes)
+    block.buf[:view.nbytes] = view.cast("B")
+    return SharedArg(block.name, view.nbytes, view.format, tuple(view.shape or (view.nbytes,))), block
+
+def _attach(arg: SharedArg, blocks: List[shared_memory.SharedMemory]) -> Any:
+    """Представление разделяемого буфера в процессе-исполнителе без копирования"""
+    block = shared_memory.SharedMemory(name=arg.name)
+    blocks.append(block)
+    view = block.buf[:arg.nbytes]
+    if arg.numpy:
+        import numpy
+        return numpy.frombuffer(view, dtype=arg.format).reshape(arg.shape)
+    return view.cast(arg.format, arg.shape) if arg.format != "B" else view
+
+def _worker_main(conn: Any, memory_limit: Optional[int]) -> None:
+    """Цикл процесса-исполнителя: получить вызов, выполнить, вернуть результат"""
+    if resource is not None and memory_limit:
+        resource.setrlimit(resource.RLIMIT_AS, (memory_limit, memory_limit))
+    targets: Dict[str, Callable[..., Any]] = {}
+
+    while True:
+        try:
+            message = conn.recv()
+        except EOFError:
+            return
+        if message is None:
+            return
+        target, args, kwargs, cpu_limit = message
+
+        if resource is not None and cpu_limit:
+            # RLIMIT_CPU считает всё время процесса, поэтому лимит сдвигается на уже потраченное
+            usage = resource.getrusage(resource.RUSAGE_SELF)
+            soft = math.ceil(usage.ru_utime + usage.ru_stime + cpu_limit)
+            resource.setrlimit(resource.RLIMIT_CPU, (soft, soft + 1))
+
+        blocks: List[shared_memory.SharedMemory] = []
+        try:
+            if isinstance(target, str):
+                if target not in targets:
+                    module, _, attr = target.partition(":")
+                    targets[target] = getattr(importlib.import_module(module), attr)
+                target = targets[target]
+            args = [_attach(arg, blocks) if isinstance(arg, SharedArg) else arg for arg in args]
+            kwargs = {
+                key: _attach(arg, blocks) if isinstance(arg, SharedArg) else arg
+                for key, arg in kwargs.items()
+            }
+            reply = ("ok", target(*args, **kwargs))
+        except BaseException as e:
+            reply = ("error", f"{type(e).__name__}: {e}")
+        finally:
+            del args, kwargs
+            for block in blocks:
+                try:
+                    block.close()
+                except BufferError:
+                    # Результат держит ссылку на буфер; блок закроется вместе с процессом
+                    pass
+
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024 if resource else 0
+        try:
+            conn.send(reply + (rss,))
+        except Exception as e:
+            conn.send(("error", f"Unpicklable result: {e}", rss))
+
+class _Worker:
+    """Процесс-исполнитель и канал к нему"""
+
+    def __init__(self, context: Any, memory_limit: Optional[int]):
+        self.conn, child = context.Pipe()
+        self.process = context.Process(
+            target=_worker_main,
+            args=(child, memory_limit),
+            name="tool-sandbox",
+            daemon=True
+        )
+        self.process.start()
+        child.close()
+        self.calls = 0
+        self.rss = 0
+
+    def kill(self) -> None:
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join(1.0)
+        self.conn.close()
+
+    def close(self) -> None:
+        try:
+            self.conn.send(None)
+        except (OSError, ValueError):
+            pass
+        self.process.join(1.0)
+        if self.process.is_alive():
+            self.process.kill()
+        self.conn.close()
+
+class SandboxPool:
+    """Пул заранее запущенных процессов для недоверенных функций инструментов
+
+    Каждый вызов выполняется в отдельном процессе с лимитами памяти
+    (RLIMIT_AS) и процессорного времени (RLIMIT_CPU), а по истечении
+    таймаута процесс принудительно завершается - поэтому медленный или
+    прожорливый инструмент не останавливает API. Процесс заменяется после
+    max_calls вызовов, при росте пиковой памяти выше max_rss и после
+    аварийного завершения. Буферы чисел (array, bytes, memoryview, numpy)
+    от share_threshold байт передаются через разделяемую память.
+
+    Функции передаются по ссылке: это функции уровня модуля или строки
+    "module:attr"; лямбды и замыкания в песочнице недоступны.
+    """
+
+    def __init__(self, size: int = 2, max_calls: int = 100, max_rss: int = 256 * 1024 * 1024,
+                 memory_limit: Optional[int] = 512 * 1024 * 1024, cpu_limit: Optional[float] = None,
+                 share_threshold: int = 64 * 1024, start_method: Optional[str] = None):
+        methods = multiprocessing.get_all_start_methods()
+        if start_method is None:
+            # forkserver порождает процессы от чистого процесса, а не от многопоточного API
+            start_method = "forkserver" if "forkserver" in methods else "spawn"
+        self._context = multiprocessing.get_context(start_method)
+        self.size = size
+        self.max_calls = max_calls
+        self.max_rss = max_rss
+        self.memory_limit = memory_limit
+        self.cpu_limit = cpu_limit
+        self.share_threshold = share_threshold
+        self.recycled = 0
+        self._idle: List[_Worker] = []
+        self._busy = 0
+        self._closed = False
+        self._condition = threading.Condition()
+
+    def start(self) -> None:
+        """Заранее запустить процессы пула"""
+        with self._condition:
+            while len(self._idle) + self._busy < self.size:
+                self._idle.append(self._spawn())
+
+    def run(self, target: SandboxTarget, args: Tuple[Any, ...] = (),
+            kwargs: Optional[Dict[str, Any]] = None, timeout: Optional[float] = None,
+            cpu_limit: Optional[float] = None) -> Any:
+        """Выполнить функцию в процессе пула; ToolError при ошибке, ToolTimeout по таймауту"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        worker = self._acquire(deadline)
+        blocks: List[shared_memory.SharedMemory] = []
+        healthy = False
+        try:
+            args = tuple(self._share(arg, blocks) for arg in args)
+            kwargs = {key: self._share(arg, blocks) for key, arg in (kwargs or {}).items()}
+            try:
+                worker.conn.send((target, args, kwargs, cpu_limit or self.cpu_limit))
+                remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+                if not worker.conn.poll(remaining):
+                    raise ToolTimeout(f"Sandboxed call {self._describe(target)} timed out")
+                status, value, rss = worker.conn.recv()
+            except (EOFError, OSError):
+                # Процесс убит ядром: превышен лимит CPU или памяти
+                worker.process.join(1.0)
+                raise ToolError(
+                    f"Sandboxed call {self._describe(target)} killed "
+                    f"(exit code {worker.process.exitcode})"
+                ) from None
+
+            healthy = True
+            worker.calls += 1
+            worker.rss = rss
+            if status != "ok":
+                raise ToolError(f"Sandboxed call {self._describe(target)} failed: {value}")
+            return value
+        finally:
+            for block in blocks:
+                block.close()
+                block.unlink()
+            self._release(worker, healthy)
+
+    def close(self) -> None:
+        """Остановить все процессы пула"""
+        with self._condition:
+            self._closed = True
+            workers, self._idle = self._idle, []
+            self._condition.notify_all()
+        for worker in workers:
+            worker.close()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._condition:
+            return {
+                "size": self.size,
+                "idle": len(self._idle),
+                "busy": self._busy,
+                "recycled": self.recycled
+            }
+
+    def _spawn(self) -> _Worker:
+        return _Worker(self._context, self.memory_limit)
+
+    def _share(self, value: Any, blocks: List[shared_memory.SharedMemory]) -> Any:
+        shared, block = _share(value, self.share_threshold)
+        if block is not None:
+            blocks.append(block)
+        return shared
+
+    def _acquire(self, deadline: Optional[float]) -> _Worker:
+        with self._condition:
+            while True:
+                if self._closed:
+                    raise ToolError("Sandbox pool is closed")
+                if self._idle:
+                    worker = self._idle.pop()
+                    break
+                if self._busy < self.size:
+                    worker = None
+                    break
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise ToolTimeout("Timed out waiting for a sandbox worker")
+                self._condition.wait(remaining)
+            self._busy += 1
+        if worker is None or not worker.process.is_alive():
+            try:
+                worker = self._spawn()
+            except Exception:
+                with self._condition:
+                    self._busy -= 1
+                    self._condition.notify()
+                raise
+        return worker
+
+    def _release(self, worker: _Worker, healthy: bool) -> None:
+        recycle = (
+            not healthy
+            or worker.calls >= self.max_calls
+            or (self.max_rss and worker.rss > self.max_rss)
+        )
+        if recycle:
+            if not healthy:
+                worker.kill()
+                log("Sandbox worker recycled after failure", level="warning", event="sandbox_worker_recycled",
+                    pid=worker.process.pid)
+            else:
+                worker.close()
+            self.recycled += 1
+            # Замена запускается сразу, чтобы следующий вызов попал в тёплый процесс
+            worker = None if self._closed else self._spawn()
+        with self._condition:
+            self._busy -= 1
+            if worker is not None and self._closed:
+                worker.close()
+            elif worker is not None:
+                self._idle.append(worker)
+            self._condition.notify()
+
+    @staticmethod
+    def _describe(target: SandboxTarget) -> str:
+        return target if isinstance(target, str) else getattr(target, "__qualname__", repr(target))
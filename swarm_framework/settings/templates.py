@@ -0,0 +1,208 @@
+import itertools
+import json
+import threading
+from collections import OrderedDict
+from dataclasses import asdict, replace
+from datetime import datetime
+from string import Formatter
+from typing import Any, Dict, List, Optional, Tuple
+from .database import SettingsDatabase
+from .models import InstructionTemplate
+
+class CompiledTemplate:
+    """План рендеринга шаблона: текст разобран один раз на куски и переменные"""
+
+    __slots__ = ("parts", "placeholders", "defaults", "required")
+
+    def __init__(self, content: str, defaults: Optional[Dict[str, str]] = None):
+        parts: List[Tuple[str, Optional[str], str, Optional[str]]] = []
+        placeholders: List[str] = []
+        for literal, field, spec, conversion in Formatter().parse(content):
+            if field is not None and not field.isidentifier():
+                raise ValueError(f"Unsupported placeholder in template: {{{field}}}")
+            parts.append((literal, field, spec or "", conversion))
+            if field is not None and field not in placeholders:
+                placeholders.append(field)
+
+        self.parts = tuple(parts)
+        self.placeholders = tuple(placeholders)
+        self.defaults = dict(defaults or {})
+        # Переменные без значения по умолчанию известны уже при компиляции
+        self.required = frozenset(name for name in placeholders if name not in self.defaults)
+
+    def missing(self, variables: Optional[Dict[str, Any]] = None) -> List[str]:
+        """Переменные без значения ни в variables, ни в значениях по умолчанию"""
+        if not self.required:
+            return []
+        provided = variables or {}
+        return [name for name in self.placeholders if name in self.required and name not in provided]
+
+    def render(self, variables: Optional[Dict[str, Any]] = None) -> str:
+        missing = self.missing(variables)
+        if missing:
+            raise KeyError(f"Missing template variables: {', '.join(missing)}")
+
+        values = {**self.defaults, **variables} if variables else self.defaults
+        chunks = []
+        for literal, field, spec, conversion in self.parts:
+            chunks.append(literal)
+            if field is None:
+                continue
+            value = values[field]
+            if conversion == "r":
+                value = repr(value)
+            elif conversion == "s":
+                value = str(value)
+            elif conversion == "a":
+                value = ascii(value)
+            chunks.append(format(value, spec) if spec else str(value))
+        return "".join(chunks)
+
+class TemplateEngine:
+    """Компиляция шаблонов и кэш результатов рендеринга
+
+    План рендеринга строится один раз для каждой версии шаблона, а
+    результаты для повторяющихся наборов переменных берутся из LRU-кэша.
+    """
+
+    def __init__(self, cache_size: int = 1024):
+        self.cache_size = cache_size
+        self._plans: Dict[str, Tuple[InstructionTemplate, CompiledTemplate, int]] = {}
+        self._renders: "OrderedDict[tuple, str]" = OrderedDict()
+        # Номер плана входит в ключ кэша, чтобы результаты старой версии не всплывали
+        self._serials = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def compile(self, template: InstructionTemplate) -> CompiledTemplate:
+        return self._plan(template)[0]
+
+    def render(self, template: InstructionTemplate, variables: Optional[Dict[str, Any]] = None) -> str:
+        plan, serial = self._plan(template)
+        try:
+            key = (serial, tuple(sorted((variables or {}).items())))
+            hash(key)
+        except TypeError:
+            # Нехешируемые значения рендерятся без кэша
+            return plan.render(variables)
+
+        with self._lock:
+            rendered = self._renders.get(key)
+            if rendered is not None:
+                self._renders.move_to_end(key)
+                return rendered
+
+        rendered = plan.render(variables)
+        with self._lock:
+            self._renders[key] = rendered
+            if len(self._renders) > self.cache_size:
+                self._renders.popitem(last=False)
+        return rendered
+
+    def render_many(self, template: InstructionTemplate,
+                    variables_list: List[Optional[Dict[str, Any]]]) -> List[str]:
+        """Рендеринг пакета наборов переменных одним планом"""
+        plan = self.compile(template)
+        rendered: Dict[tuple, str] = {}
+        results = []
+        for variables in variables_list:
+            try:
+                key = tuple(sorted((variables or {}).items()))
+                hash(key)
+            except TypeError:
+                results.append(plan.render(variables))
+                continue
+            if key not in rendered:
+                rendered[key] = plan.render(variables)
+            results.append(rendered[key])
+        return results
+
+    def _plan(self, template: InstructionTemplate) -> Tuple[CompiledTemplate, int]:
+        cached = self._plans.get(template.id)
+        if cached is not None and cached[0] is template:
+            return cached[1], cached[2]
+        plan = CompiledTemplate(template.content, template.variables)
+        serial = next(self._serials)
+        self._plans[template.id] = (template, plan, serial)
+        return plan, serial
+
+    def forget(self, template_id: str) -> None:
+        """Сбросить план шаблона; его результаты вытеснятся из LRU сами"""
+        self._plans.pop(template_id, None)
+
+class TemplateStore:
+    """Хранилище шаблонов инструкций в базе настроек с копией в памяти"""
+
+    def __init__(self, db: SettingsDatabase, engine: Optional[TemplateEngine] = None):
+        self._db = db
+        self.engine = engine or TemplateEngine()
+        self._templates: Optional[Dict[str, InstructionTemplate]] = None
+        self._lock = threading.RLock()
+
+    def create(self, template: InstructionTemplate) -> None:
+        """Сохранить новый шаблон; KeyError, если шаблон уже существует"""
+        # Ошибки в плейсхолдерах обнаруживаются до записи
+        CompiledTemplate(template.content, template.variables)
+        with self._lock:
+            templates = self._load()
+            self._db.insert_template(template.id, self._encode(template))
+            templates[template.id] = template
+
+    def update(self, template_id: str, content: str, variables: Dict[str, str] = None) -> InstructionTemplate:
+        with self._lock:
+            templates = self._load()
+            template = templates.get(template_id)
+            if template is None:
+                raise KeyError(f"Template not found: {template_id}")
+            template = replace(
+                template,
+                content=content,
+                variables=template.variables if variables is None else dict(variables),
+                updated_at=datetime.now()
+            )
+            CompiledTemplate(template.content, template.variables)
+            self._db.update_template(template_id, self._encode(template))
+            templates[template_id] = template
+            self.engine.forget(template_id)
+            return template
+
+    def get(self, template_id: str) -> Optional[InstructionTemplate]:
+        return self._load().get(template_id)
+
+    def get_all(self) -> Dict[str, InstructionTemplate]:
+        return dict(self._load())
+
+    def render(self, template_id: str, variables: Optional[Dict[str, Any]] = None) -> str:
+        return self.engine.render(self._require(template_id), variables)
+
+    def render_many(self, template_id: str, variables_list: List[Optional[Dict[str, Any]]]) -> List[str]:
+        return self.engine.render_many(self._require(template_id), variables_list)
+
+    def _require(self, template_id: str) -> InstructionTemplate:
+        template = self._load().get(template_id)
+        if template is None:
+            raise KeyError(f"Template not found: {template_id}")
+        return template
+
+    def _load(self) -> Dict[str, InstructionTemplate]:
+        if self._templates is None:
+            with self._lock:
+                if self._templates is None:
+                    self._templates = {
+                        template_id: self._decode(data)
+                        for template_id, data in self._db.get_templates().items()
+                    }
+        return self._templates
+
+    @staticmethod
+    def _encode(template: InstructionTemplate) -> str:
+        data = asdict(template)
+        data["created_at"] = template.created_at.isoformat()
+        data["updated_at"] = template.updated_at.isoformat()
+        return json.dumps(data, ensure_ascii=False)
+
+    @staticmethod
+    def _decode(raw: str) -> InstructionTemplate:
+        data = json.loads(raw)
+        data["created_at"] = datetime.fromisoformat(data["created_at"])
+        data["updated_at"] = datetime.fromisoformat(data["updated_at"])
+        return InstructionTemplate(**data)
@@ -0,0 +1,259 @@
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, List, Mapping, Optional, Sequence, Tuple
+from ..utils.logger import bind_context
+
+class ToolError(Exception):
+    """Ошибка вызова инструмента"""
+
+class ToolTimeout(ToolError):
+    """Вызов инструмента не уложился в таймаут"""
+
+@dataclass
+class ToolCall:
+    """Вызов функции инструмента"""
+    tool: str
+    function: str
+    args: Tuple[Any, ...] = ()
+    kwargs: Dict[str, Any] = field(default_factory=dict)
+
+@dataclass
+class ToolResult:
+    """Результат вызова: значение или ошибка и время выполнения"""
+    call: ToolCall
+    value: Any = None
+    error: Optional[Exception] = None
+    elapsed: float = 0.0
+    cached: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+class LatencyStats:
+    """Статистика задержек одной функции инструмента по последним вызовам"""
+
+    def __init__(self, window: int = 1000):
+        self.calls = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.cache_hits = 0
+        self._latencies: Deque[float] = deque(maxlen=window)
+
+    def record(self, elapsed: float, error: Optional[Exception] = None) -> None:
+        self.calls += 1
+        if isinstance(error, ToolTimeout):
+            self.timeouts += 1
+        elif error is not None:
+            self.errors += 1
+        self._latencies.append(elapsed)
+
+    def report(self) -> Dict[str, Any]:
+        latencies = sorted(self._latencies)
+        if not latencies:
+            return {"calls": self.calls, "errors": self.errors, "timeouts": self.timeouts,
+                    "cache_hits": self.cache_hits}
+
+        def percentile(p: float) -> float:
+            return latencies[min(len(latencies) - 1, int(p * len(latencies)))]
+
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "timeouts": self.timeouts,
+            "cache_hits": self.cache_hits,
+            "mean": sum(latencies) / len(latencies),
+            "p50": percentile(0.5),
+            "p95": percentile(0.95),
+            "max": latencies[-1]
+        }
+
+class ToolRuntime:
+    """Исполнение функций инструментов из EnhancedToolProvider
+
+    Параметры берутся из описания инструмента:
+    - timeout: таймаут вызова в секундах (по умолчанию default_timeout);
+    - max_concurrency: сколько вызовов инструмента выполняется одновременно;
+    - pure: True или список функций без побочных эффектов, их результаты
+      кэшируются по аргументам;
+    - sandbox: выполнять функции в отдельных процессах SandboxPool
+      (cpu_limit - лимит процессорного времени на вызов).
+
+    Независимые вызовы одного шага агента выполняются параллельно в общем
+    пуле потоков. Таймаут отсчитывается с момента постановки вызова,
+    включая ожидание слота; вызов, не успевший начаться до таймаута,
+    не выполняется. Уже начатый вызов прервать нельзя - он досчитывается
+    в фоне и держит слот инструмента до завершения; процесс песочницы по
+    таймауту завершается принудительно.
+    """
+
+    def __init__(self, provider: Any, max_workers: int = 8, default_timeout: float = 30.0,
+                 cache_size: int = 1024, stats_window: int = 1000,
+                 sandbox_options: Optional[Dict[str, Any]] = None):
+        self._provider = provider
+        self._sandbox_options = dict(sandbox_options or {})
+        self._sandbox = None
+        self.default_timeout = default_timeout
+        self.cache_size = cache_size
+        self.stats_window = stats_window
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="tool")
+        self._slots: Dict[str, threading.BoundedSemaphore] = {}
+        self._results: "OrderedDict[tuple, Any]" = OrderedDict()
+        self._stats: Dict[str, LatencyStats] = {}
+        self._lock = threading.Lock()
+
+    def call(self, tool: str, function: str, *args: Any, **kwargs: Any) -> Any:
+        """Вызвать функцию инструмента; ToolError при ошибке или таймауте"""
+        result = self.call_many([ToolCall(tool, function, args, kwargs)])[0]
+        if result.error is not None:
+            raise result.error
+        return result.value
+
+    def call_many(self, calls: Sequence[ToolCall]) -> List[ToolResult]:
+        """Выполнить независимые вызовы параллельно, результаты в порядке вызовов"""
+        started = time.monotonic()
+        pending = []
+        results: List[Optional[ToolResult]] = [None] * len(calls)
+        for index, call in enumerate(calls):
+            try:
+                tool, target = self._resolve(call)
+            except ToolError as e:
+                results[index] = ToolResult(call, error=e)
+                continue
+
+            key = self._cache_key(tool, call)
+            if key is not None:
+                with self._lock:
+                    hit = key in self._results
+                    if hit:
+                        self._results.move_to_end(key)
+                        results[index] = ToolResult(call, value=self._results[key], cached=True)
+                if hit:
+                    self._stats_for(call).cache_hits += 1
+                    continue
+
+            deadline = started + float(tool.get("timeout", self.default_timeout))
+            future = self._executor.submit(bind_context(self._invoke, call, tool, target, deadline))
+            pending.append((index, call, key, deadline, future))
+
+        for index, call, key, deadline, future in pending:
+            try:
+                value, elapsed = future.result(timeout=max(0.0, deadline - time.monotonic()))
+                result = ToolResult(call, value=value, elapsed=elapsed)
+            except FutureTimeout:
+                future.cancel()
+                result = ToolResult(call, error=ToolTimeout(
+                    f"Tool {call.tool}.{call.function} timed out"
+                ), elapsed=time.monotonic() - started)
+            except ToolError as e:
+                result = ToolResult(call, error=e, elapsed=getattr(e, "elapsed", 0.0))
+
+            if result.ok and key is not None:
+                self._remember(key, result.value)
+            self._stats_for(call).record(result.elapsed, result.error)
+            results[index] = result
+        return results
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Статистика задержек по функциям инструментов ("tool.function")"""
+        with self._lock:
+            stats = dict(self._stats)
+        return {name: item.report() for name, item in sorted(stats.items())}
+
+    def forget(self, tool: str) -> None:
+        """Сбросить кэш результатов и лимит инструмента после его замены"""
+        with self._lock:
+            self._slots.pop(tool, None)
+            for key in [key for key in self._results if key[0] == tool]:
+                del self._results[key]
+
+    @property
+    def sandbox(self) -> "SandboxPool":
+        """Пул процессов для инструментов с sandbox, создаётся при первом вызове"""
+        if self._sandbox is None:
+            from .sandbox import SandboxPool
+            with self._lock:
+                if self._sandbox is None:
+                    self._sandbox = SandboxPool(**self._sandbox_options)
+        return self._sandbox
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._executor.shutdown(wait=wait)
+        if self._sandbox is not None:
+            self._sandbox.close()
+
+    def _resolve(self, call: ToolCall) -> Tuple[Mapping[str, Any], Any]:
+        tool = self._provider.get_tool(call.tool)
+        if tool is None:
+            raise ToolError(f"Tool not found: {call.tool}")
+        target = tool.get("functions", {}).get(call.function)
+        if target is None:
+            raise ToolError(f"Function not found: {call.tool}.{call.function}")
+        return tool, target
+
+    def _invoke(self, call: ToolCall, tool: Mapping[str, Any], target: Any,
+                deadline: float) -> Tuple[Any, float]:
+        slot = self._slot(call.tool)
+        if not slot.acquire(timeout=max(0.0, deadline - time.monotonic())):
+            raise ToolTimeout(f"Tool {call.tool}.{call.function} timed out waiting for a slot")
+        try:
+            started = time.monotonic()
+            try:
+                if tool.get("sandbox"):
+                    value = self.sandbox.run(
+                        target, tuple(call.args), call.kwargs,
+                        timeout=max(0.0, deadline - started),
+                        cpu_limit=tool.get("cpu_limit")
+                    )
+                else:
+                    value = target(*call.args, **call.kwargs)
+            except ToolError as e:
+                e.elapsed = time.monotonic() - started
+                raise
+            except Exception as e:
+                error = ToolError(f"Tool {call.tool}.{call.function} failed: {e}")
+                error.elapsed = time.monotonic() - started
+                raise error from e
+            return value, time.monotonic() - started
+        finally:
+            slot.release()
+
+    def _slot(self, name: str) -> threading.BoundedSemaphore:
+        slot = self._slots.get(name)
+        if slot is None:
+            with self._lock:
+                slot = self._slots.get(name)
+                if slot is None:
+                    tool = self._provider.get_tool(name) or {}
+                    slot = threading.BoundedSemaphore(int(tool.get("max_concurrency", 1 << 16)))
+                    self._slots[name] = slot
+        return slot
+
+    def _cache_key(self, tool: Mapping[str, Any], call: ToolCall) -> Optional[tuple]:
+        pure = tool.get("pure", False)
+        if pure is not True and call.function not in (pure or ()):
+            return None
+        key = (call.tool, call.function, tuple(call.args), tuple(sorted(call.kwargs.items())))
+        try:
+            hash(key)
+        except TypeError:
+            # Нехешируемые аргументы (списки, словари) вызываются без кэша
+            return None
+        return key
+
+    def _remember(self, key: tuple, value: Any) -> None:
+        with self._lock:
+            self._results[key] = value
+            if len(self._results) > self.cache_size:
+                self._results.popitem(last=False)
+
+    def _stats_for(self, call: ToolCall) -> LatencyStats:
+        name = f"{call.tool}.{call.function}"
+        stats = self._stats.get(name)
+        if stats is None:
+            with self._lock:
+                stats = self._stats.setdefault(name, LatencyStats(self.stats_window))
+        return stats
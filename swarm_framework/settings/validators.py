@@ -1,32 +1,163 @@
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, Mapping, Optional, Sequence, Tuple
 from datetime import datetime
+from functools import lru_cache
 import re
 import json
-from .models import Setting, SettingType, SettingValidation
+from .models import Setting, SettingOption, SettingType, SettingValidation
+
+# Проверка возвращает текст ошибки или None
+Check = Callable[[Any], Optional[str]]
+
+# Типы, которые проверяются так же, как другой тип
+TYPE_ALIASES = {
+    SettingType.SLIDER: SettingType.NUMBER,
+    SettingType.MARKDOWN: SettingType.STRING,
+    SettingType.CODE: SettingType.STRING,
+    SettingType.RICH_TEXT: SettingType.STRING,
+    SettingType.TEMPLATE: SettingType.STRING,
+}
+
+@lru_cache(maxsize=1024)
+def _cached_option_values(options: Tuple[SettingOption, ...]) -> FrozenSet[str]:
+    return frozenset(option.value for option in options)
+
+def _option_values(options: Sequence[SettingOption]) -> FrozenSet[str]:
+    """Допустимые значения; для общих списков опций множество строится один раз"""
+    try:
+        return _cached_option_values(tuple(options))
+    except TypeError:
+        return frozenset(option.value for option in options)
+
+class CompiledValidation:
+    """Заранее собранный план проверки одной настройки"""
+    
+    __slots__ = ("key", "required", "checks")
+    
+    def __init__(self, key: str, required: bool, checks: List[Check]):
+        self.key = key
+        self.required = required
+        self.checks = tuple(checks)
+        
+    def __call__(self, value: Any) -> tuple[bool, Optional[str]]:
+        if value is None:
+            return (False, "Значение обязательно") if self.required else (True, None)
+        for check in self.checks:
+            error = check(value)
+            if error is not None:
+                return False, error
+        return True, None
+
+class SettingsSchema:
+    """Планы проверки набора настроек для пакетной валидации"""
+    
+    def __init__(self, plans: Mapping[str, CompiledValidation]):
+        self.plans = dict(plans)
+        self.required = frozenset(key for key, plan in self.plans.items() if plan.required)
+        
+    def validate(self, values: Mapping[str, Any], partial: bool = True) -> Dict[str, str]:
+        """Проверить значения за один проход; ошибки по ключам
+
+        При partial=False отсутствие обязательных настроек тоже ошибка.
+        Ключи без описания не проверяются.
+        """
+        errors = {}
+        plans = self.plans
+        for key, value in values.items():
+            plan = plans.get(key)
+            if plan is None:
+                continue
+            is_valid, error = plan(value)
+            if not is_valid:
+                errors[key] = error or "Некорректное значение"
+        if not partial:
+            for key in self.required.difference(values):
+                errors[key] = "Значение обязательно"
+        return errors
+        
+    def validate_batch(self, configs: Mapping[str, Mapping[str, Any]],
+                       partial: bool = True) -> Dict[str, Dict[str, str]]:
+        """Проверить конфигурации нескольких агентов; только конфигурации с ошибками"""
+        report = {}
+        for name, values in configs.items():
+            errors = self.validate(values, partial)
+            if errors:
+                report[name] = errors
+        return report
 
 class SettingValidator:
-    """Валидатор настроек"""
+    """Валидатор настроек
+
+    Планы не кэшируются здесь: их хранит владелец описаний (SettingsSchema
+    в SettingsManager), чтобы они жили не дольше самих описаний.
+    """
     
     @staticmethod
     def validate(setting: Setting, value: Any) -> tuple[bool, Optional[str]]:
-        """Валидация значения настройки"""
-        if setting.validation is None:
-            return True, None
-            
-        # Проверка обязательности
-        if setting.validation.required and value is None:
-            return False, "Значение обязательно"
+        """Разовая валидация значения; для повторных проверок используйте compile"""
+        return SettingValidator.compile(setting)(value)
+        
+    @staticmethod
+    def compile_schema(settings: Iterable[Setting]) -> SettingsSchema:
+        """Собрать планы проверки для набора описаний"""
+        return SettingsSchema({setting.key: SettingValidator.compile(setting) for setting in settings})
+        
+    @staticmethod
+    def compile(setting: Setting) -> CompiledValidation:
+        """Собрать план проверки: тип, границы, регулярные выражения, опции"""
+        validation = setting.validation
+        checks: List[Check] = []
+        setting_type = TYPE_ALIASES.get(setting.type, setting.type)
+        
+        if setting.options and setting.type in (SettingType.SELECT, SettingType.MULTISELECT):
+            allowed = _option_values(setting.options)
+            if setting.type == SettingType.SELECT:
+                checks.append(lambda value: None if value in allowed else "Значение не входит в список опций")
+            else:
+                checks.append(
+                    lambda value: None
+                    if isinstance(value, (list, tuple)) and allowed.issuperset(value)
+                    else "Значения не входят в список опций"
+                )
+                
+        if validation is None:
+            return CompiledValidation(setting.key, False, checks)
             
-        # Валидация в зависимости от типа
-        if value is not None:
-            validator_method = getattr(
-                SettingValidator, 
-                f"_validate_{setting.type.value}", 
-                SettingValidator._validate_default
-            )
-            return validator_method(value, setting.validation)
+        if setting_type == SettingType.NUMBER:
+            checks.extend(SettingValidator._compile_number(validation))
+        elif setting_type == SettingType.STRING:
+            checks.extend(SettingValidator._compile_string(validation))
+        else:
+            method = getattr(SettingValidator, f"_validate_{setting_type.value}", SettingValidator._validate_default)
+            checks.append(lambda value: method(value, validation)[1])
             
-        return True, None
+        return CompiledValidation(setting.key, validation.required, checks)
+        
+    @staticmethod
+    def _compile_number(validation: SettingValidation) -> List[Check]:
+        checks: List[Check] = [
+            lambda value: None if isinstance(value, (int, float)) else "Значение должно быть числом"
+        ]
+        min_value, max_value = validation.min_value, validation.max_value
+        if min_value is not None:
+            checks.append(lambda value: None if value >= min_value else f"Значение должно быть не меньше {min_value}")
+        if max_value is not None:
+            checks.append(lambda value: None if value <= max_value else f"Значение должно быть не больше {max_value}")
+        return checks
+        
+    @staticmethod
+    def _compile_string(validation: SettingValidation) -> List[Check]:
+        checks: List[Check] = [
+            lambda value: None if isinstance(value, str) else "Значение должно быть строкой"
+        ]
+        min_length, max_length = validation.min_length, validation.max_length
+        if min_length is not None:
+            checks.append(lambda value: None if len(value) >= min_length else f"Длина должна быть не меньше {min_length}")
+        if max_length is not None:
+            checks.append(lambda value: None if len(value) <= max_length else f"Длина должна быть не больше {max_length}")
+        if validation.pattern is not None:
+            match = re.compile(validation.pattern).match
+            checks.append(lambda value: None if match(value) else "Значение не соответствует шаблону")
+        return checks
     
     @staticmethod
     def _validate_number(value: Any, validation: SettingValidation) -> tuple[bool, Optional[str]]:
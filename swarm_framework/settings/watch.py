@@ -0,0 +1,143 @@
+import itertools
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+from .database import SettingsDatabase
+from .cache import SettingsCache
+from ..utils.logger import log
+
+@dataclass
+class SettingChange:
+    """Запись журнала изменений настроек"""
+    seq: int
+    version: int
+    key: str
+    value: Any
+
+SettingsCallback = Callable[[List[SettingChange]], None]
+
+class SettingsWatcher:
+    """Лента изменений настроек поверх журнала SettingsDatabase
+
+    Подписчики получают только новые записи журнала. Записи этого процесса
+    доставляются сразу после записи, записи других процессов - при
+    следующем опросе базы (раз в poll_interval секунд, в фоновом потоке,
+    который запускается при первой подписке или ожидании).
+    """
+
+    PAGE_SIZE = 1000
+
+    def __init__(self, db: SettingsDatabase, poll_interval: float = 1.0):
+        self._db = db
+        self.poll_interval = poll_interval
+        self._last_seq: Optional[int] = None
+        self._subscribers: Dict[int, Tuple[SettingsCallback, Optional[Set[str]]]] = {}
+        self._tokens = itertools.count(1)
+        self._condition = threading.Condition()
+        self._poll_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+
+    @property
+    def last_seq(self) -> int:
+        """Номер последней известной записи журнала"""
+        if self._last_seq is None:
+            self._last_seq = self._db.get_changelog_bounds()[1]
+        return self._last_seq
+
+    def subscribe(self, callback: SettingsCallback, keys: Optional[Iterable[str]] = None) -> int:
+        """Подписаться на изменения, при необходимости только для указанных ключей"""
+        token = next(self._tokens)
+        # Подписчик получает только изменения после момента подписки
+        if self._last_seq is None:
+            self._last_seq = self._db.get_changelog_bounds()[1]
+        self._subscribers[token] = (callback, set(keys) if keys is not None else None)
+        self._ensure_polling()
+        return token
+
+    def unsubscribe(self, token: int) -> None:
+        self._subscribers.pop(token, None)
+
+    def poll(self) -> List[SettingChange]:
+        """Дочитать новые записи журнала и оповестить подписчиков"""
+        with self._poll_lock:
+            changes = self._read(self.last_seq)
+            if not changes:
+                return []
+            self._last_seq = changes[-1].seq
+
+        with self._condition:
+            self._condition.notify_all()
+
+        for callback, keys in list(self._subscribers.values()):
+            selected = changes if keys is None else [c for c in changes if c.key in keys]
+            if not selected:
+                continue
+            try:
+                callback(selected)
+            except Exception as e:
+                log("Settings subscriber failed", level="error", event="settings_subscriber_failed", error=str(e))
+        return changes
+
+    def changes_since(self, since: int) -> Tuple[int, List[SettingChange], bool]:
+        """Изменения после номера since: (последний номер, изменения, сброс)
+
+        Сброс означает, что нужные записи уже вытеснены из журнала и
+        клиенту следует перечитать настройки целиком.
+        """
+        first, last = self._db.get_changelog_bounds()
+        if first and since < first - 1:
+            return last, [], True
+        changes = self._read(since, limit=self.PAGE_SIZE)
+        return (changes[-1].seq if changes else max(since, last)), changes, False
+
+    def wait(self, since: int, timeout: float) -> Tuple[int, List[SettingChange], bool]:
+        """Дождаться изменений после номера since (long-poll)"""
+        self._ensure_polling()
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            while self.last_seq <= since:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+        return self.changes_since(since)
+
+    def stop(self) -> None:
+        """Остановить фоновый опрос базы"""
+        self._stopped.set()
+        with self._condition:
+            self._condition.notify_all()
+
+    def _ensure_polling(self) -> None:
+        if self._thread is not None:
+            return
+        with self._poll_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run,
+                    name="settings-watcher",
+                    daemon=True
+                )
+                self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.poll_interval):
+            try:
+                self.poll()
+            except Exception as e:
+                log("Settings watcher poll failed", level="error", event="settings_poll_failed", error=str(e))
+
+    def _read(self, since: int, limit: Optional[int] = None) -> List[SettingChange]:
+        changes = []
+        while True:
+            page_size = self.PAGE_SIZE if limit is None else min(self.PAGE_SIZE, limit - len(changes))
+            rows = self._db.get_changelog(since, page_size)
+            changes.extend(
+                SettingChange(seq=seq, version=version, key=key, value=SettingsCache.decode(raw))
+                for seq, version, key, raw in rows
+            )
+            if len(rows) < page_size or (limit is not None and len(changes) >= limit):
+                return changes
+            since = rows[-1][0]
@@ -0,0 +1,195 @@
+import atexit
+import copy
+import json
+import logging
+import queue
+import random
+import sys
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, Mapping, Optional, TextIO, Union
+from .logger import LOGGER_NAME, current_context
+
+_logger = logging.getLogger(LOGGER_NAME)
+
+class JsonFormatter(logging.Formatter):
+    """Formats records as JSON lines: time, level, logger, message, context and fields"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": round(record.created, 6),
+            "level": record.levelname.lower(),
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        entry.update(getattr(record, "context", None) or {})
+        entry.update(getattr(record, "fields", None) or {})
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+class SamplingFilter(logging.Filter):
+    """Drops part of high-volume records
+
+    level_rates keeps the given share of records per level, e.g.
+    {"debug": 0.01}. rate_limit caps records per event (the "event" field,
+    or the message template) to that many per second with bursts of
+    burst records. Records at exempt_level and above always pass. The
+    next record let through for an event reports how many were dropped.
+    """
+
+    def __init__(self, level_rates: Optional[Mapping[Union[str, int], float]] = None,
+                 rate_limit: Optional[float] = None, burst: int = 10,
+                 exempt_level: int = logging.WARNING, seed: Optional[int] = None):
+        super().__init__()
+        self.level_rates = {_level(level): rate for level, rate in (level_rates or {}).items()}
+        self.rate_limit = rate_limit
+        self.burst = burst
+        self.exempt_level = exempt_level
+        self.dropped = 0
+        # Event -> [tokens, last refill, dropped since last emitted record]
+        self._buckets: Dict[str, list] = {}
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= self.exempt_level:
+            return True
+        rate = self.level_rates.get(record.levelno)
+        if rate is not None and self._random.random() >= rate:
+            self._drop()
+            return False
+        if self.rate_limit is None:
+            return True
+
+        fields = getattr(record, "fields", None) or {}
+        event = str(fields.get("event") or record.msg)
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(event)
+            if bucket is None:
+                if len(self._buckets) >= 10000:
+                    self._buckets.clear()
+                bucket = self._buckets[event] = [float(self.burst), now, 0]
+            bucket[0] = min(float(self.burst), bucket[0] + (now - bucket[1]) * self.rate_limit)
+            bucket[1] = now
+            if bucket[0] < 1.0:
+                bucket[2] += 1
+                self.dropped += 1
+                return False
+            bucket[0] -= 1.0
+            suppressed, bucket[2] = bucket[2], 0
+        if suppressed:
+            record.fields = {**fields, "suppressed": suppressed}
+        return True
+
+    def _drop(self) -> None:
+        with self._lock:
+            self.dropped += 1
+
+class NonBlockingQueueHandler(QueueHandler):
+    """Queue handler that never blocks: records are dropped and counted when the queue is full
+
+    Formatting happens on the listener thread; only the message and the
+    correlation context are captured on the calling thread.
+    """
+
+    def __init__(self, log_queue: "queue.Queue[logging.LogRecord]"):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        record.context = current_context()
+        if record.exc_info:
+            # Traceback objects keep frames alive, render them now
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+class _Listener(QueueListener):
+    def enqueue_sentinel(self) -> None:
+        # Waits for room: with a full queue put_nowait would fail and the thread would never stop
+        self.queue.put(self._sentinel)
+
+_listener: Optional[QueueListener] = None
+_handler: Optional[NonBlockingQueueHandler] = None
+_configure_lock = threading.RLock()
+
+def configure_logging(level: Union[str, int] = "info", stream: Optional[TextIO] = None,
+                      level_rates: Optional[Mapping[Union[str, int], float]] = None,
+                      rate_limit: Optional[float] = None, burst: int = 10,
+                      queue_size: int = 10000) -> NonBlockingQueueHandler:
+    """Route framework logs as JSON lines to stream through a background thread
+
+    Replaces the previous configuration; the queue is flushed at exit.
+    """
+    global _listener, _handler
+    with _configure_lock:
+        _stop()
+        output = logging.StreamHandler(stream or sys.stdout)
+        output.setFormatter(JsonFormatter())
+        log_queue: "queue.Queue[logging.LogRecord]" = queue.Queue(maxsize=queue_size)
+        handler = NonBlockingQueueHandler(log_queue)
+        if level_rates or rate_limit is not None:
+            handler.addFilter(SamplingFilter(level_rates, rate_limit, burst))
+        _listener = _Listener(log_queue, output, respect_handler_level=False)
+        _listener.start()
+        _handler = handler
+        _logger.addHandler(handler)
+        _logger.setLevel(_level(level))
+        _logger.propagate = False
+        return handler
+
+def shutdown_logging() -> None:
+    """Flush queued records and stop the background thread"""
+    with _configure_lock:
+        _stop()
+
+def get_stats() -> Dict[str, int]:
+    """Records dropped by a full queue and by sampling"""
+    handler = _handler
+    if handler is None:
+        return {"queue_dropped": 0, "sampled_out": 0}
+    sampled_out = sum(f.dropped for f in handler.filters if isinstance(f, SamplingFilter))
+    return {"queue_dropped": handler.dropped, "sampled_out": sampled_out}
+
+def emit(message: str, level: Union[str, int], fields: Dict[str, Any]) -> None:
+    """Log record for logger.log, configuring default output on first use"""
+    if _handler is None and not _logger.handlers:
+        with _configure_lock:
+            if _handler is None and not _logger.handlers:
+                configure_logging()
+    levelno = _level(level)
+    if _logger.isEnabledFor(levelno):
+        _logger.log(levelno, message, extra={"fields": fields}, stacklevel=3)
+
+def _level(level: Union[str, int]) -> int:
+    if isinstance(level, int):
+        return level
+    levelno = logging.getLevelName(level.upper())
+    if not isinstance(levelno, int):
+        raise ValueError(f"Unknown log level: {level}")
+    return levelno
+
+def _stop() -> None:
+    global _listener, _handler
+    if _handler is not None:
+        _logger.removeHandler(_handler)
+        _handler = None
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+atexit.register(shutdown_logging)
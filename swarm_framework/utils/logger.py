@@ -1,2 +1,59 @@
-def log(message):
-    print(f"[LOG] {message}")
+import contextvars
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Union
+
+# Name of the stdlib logger records go to; handlers live in log_handlers,
+# which is imported on first use to keep logging off the import path
+LOGGER_NAME = "swarm_framework"
+
+# Correlation fields (task_id, agent, request_id, ...) of the current task or request
+_context: contextvars.ContextVar[Dict[str, Any]] = contextvars.ContextVar("swarm_log_context", default={})
+
+@contextmanager
+def log_context(**fields: Any) -> Iterator[Dict[str, Any]]:
+    """Attach fields to every record logged inside the block, including nested blocks"""
+    token = push_context(**fields)
+    try:
+        yield _context.get()
+    finally:
+        pop_context(token)
+
+def push_context(**fields: Any) -> contextvars.Token:
+    """Attach fields until pop_context is called with the returned token"""
+    return _context.set({**_context.get(), **{key: value for key, value in fields.items() if value is not None}})
+
+def pop_context(token: contextvars.Token) -> None:
+    _context.reset(token)
+
+def current_context() -> Dict[str, Any]:
+    return _context.get()
+
+def bind_context(function, *args: Any, **kwargs: Any):
+    """Callable running function in a copy of the current context, for thread pools"""
+    context = contextvars.copy_context()
+    return lambda: context.run(function, *args, **kwargs)
+
+def configure_logging(**options: Any):
+    """Route framework logs as JSON lines through a background thread, see log_handlers.configure_logging"""
+    from . import log_handlers
+    return log_handlers.configure_logging(**options)
+
+def shutdown_logging() -> None:
+    """Flush queued records and stop the background thread"""
+    from . import log_handlers
+    log_handlers.shutdown_logging()
+
+def get_stats() -> Dict[str, int]:
+    """Records dropped by a full queue and by sampling"""
+    from . import log_handlers
+    return log_handlers.get_stats()
+
+_emit = None
+
+def log(message: str, level: Union[str, int] = "info", **fields: Any) -> None:
+    """Log message with structured fields, e.g. log("Model failed", level="warning", model=name)"""
+    global _emit
+    if _emit is None:
+        from .log_handlers import emit
+        _emit = emit
+    _emit(message, level, fields)